@@ -0,0 +1,254 @@
+#----------------------------------------------------------------------------#
+# Imports
+#----------------------------------------------------------------------------#
+
+import asyncio
+import io
+import sys
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from sqlalchemy.orm import sessionmaker
+from werkzeug.exceptions import HTTPException
+from models import db
+from database import engine_options
+
+#----------------------------------------------------------------------------#
+# Async serving.
+#
+# AsyncApp wraps the Flask app as an ASGI app. The read routes run on the
+# event loop: each request opens an AsyncSession on an async driver
+# (asyncpg, or aiosqlite for SQLite) and the unchanged Flask view, with its
+# conditional GET, page cache, queries and Jinja templates, runs inside
+# AsyncSession.run_sync(). Its queries go through db.session as usual, but
+# every database wait yields to the event loop instead of blocking a
+# thread, so one process can hold many more requests waiting on the
+# database. All other routes run as plain WSGI on a thread pool.
+#
+# Needs `pip install uvicorn asyncpg` (or aiosqlite); see asgi.py.
+#----------------------------------------------------------------------------#
+
+# endpoints served on the event loop
+ASYNC_ENDPOINTS = {
+    'main.index',
+    'main.venues',
+    'main.show_venue',
+    'main.search_venues',
+    'main.artists',
+    'main.show_artist',
+    'main.search_artists',
+    'main.shows',
+}
+
+# async driver of each database
+ASYNC_DRIVERS = {
+    "postgresql": 'postgresql+asyncpg',
+    "sqlite": 'sqlite+aiosqlite',
+}
+
+
+# the database URI with its async driver, e.g. postgresql+asyncpg://...
+def async_database_uri(uri):
+    url = make_url(uri)
+    driver = ASYNC_DRIVERS.get(url.get_backend_name())
+    if driver is None:
+        raise ValueError('No async driver for %s' % url.get_backend_name())
+    return url.set(drivername=driver)
+
+
+# engine options for the async engine: the DB_* pool settings, on the
+# asyncio pool, with asyncpg's way of setting the statement timeout
+def async_engine_options(config):
+    options = engine_options(config)
+    options.pop('poolclass', None)
+    options.pop('connect_args', None)
+    timeout = config.get('DB_STATEMENT_TIMEOUT')
+    if timeout and config['SQLALCHEMY_DATABASE_URI'].startswith('postgresql'):
+        options['connect_args'] = {
+            "server_settings": {"statement_timeout": str(timeout)}}
+    return options
+
+#----------------------------------------------------------------------------#
+# ASGI <-> WSGI.
+#----------------------------------------------------------------------------#
+
+# reads the whole request body
+
+
+async def _read_body(receive):
+    body = b''
+    while True:
+        message = await receive()
+        body += message.get('body', b'')
+        if not message.get('more_body'):
+            return body
+
+
+# builds the WSGI environ of an ASGI http scope
+def _environ(scope, body):
+    server = scope.get('server') or ('localhost', 80)
+    environ = {
+        "REQUEST_METHOD": scope['method'],
+        "SCRIPT_NAME": scope.get('root_path', '').encode('utf-8').decode('latin-1'),
+        "PATH_INFO": scope['path'].encode('utf-8').decode('latin-1'),
+        "QUERY_STRING": scope['query_string'].decode('latin-1'),
+        "SERVER_NAME": server[0],
+        "SERVER_PORT": str(server[1]),
+        "SERVER_PROTOCOL": 'HTTP/%s' % scope['http_version'],
+        "wsgi.version": (1, 0),
+        "wsgi.url_scheme": scope.get('scheme', 'http'),
+        "wsgi.input": io.BytesIO(body),
+        "wsgi.errors": sys.stderr,
+        "wsgi.multithread": True,
+        "wsgi.multiprocess": True,
+        "wsgi.run_once": False,
+    }
+    if scope.get('client'):
+        environ['REMOTE_ADDR'] = scope['client'][0]
+
+    for name, value in scope['headers']:
+        name = name.decode('latin-1').upper().replace('-', '_')
+        value = value.decode('latin-1')
+        key = name if name in ('CONTENT_TYPE', 'CONTENT_LENGTH') else 'HTTP_' + name
+        if key in environ:
+            value = environ[key] + ('; ' if key == 'HTTP_COOKIE' else ',') + value
+        environ[key] = value
+    return environ
+
+
+# HEAD responses carry the headers of a GET, without its body
+def _is_head(environ):
+    return environ['REQUEST_METHOD'] == 'HEAD'
+
+
+async def _send_start(send, status, headers):
+    await send({
+        "type": 'http.response.start',
+        "status": status,
+        "headers": [(name.lower().encode('latin-1'), value.encode('latin-1'))
+                    for name, value in headers]
+    })
+
+#----------------------------------------------------------------------------#
+# App.
+#----------------------------------------------------------------------------#
+
+
+class AsyncApp:
+
+    def __init__(self, flask_app):
+        self.flask_app = flask_app
+        config = flask_app.config
+        self.engine = create_async_engine(
+            config.get('ASYNC_DATABASE_URI') or
+            async_database_uri(config['SQLALCHEMY_DATABASE_URI']),
+            **async_engine_options(config))
+        self.sessions = sessionmaker(self.engine, class_=AsyncSession)
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] == 'lifespan':
+            await self._lifespan(receive, send)
+            return
+        if scope['type'] != 'http':
+            return
+
+        environ = _environ(scope, await _read_body(receive))
+        if self._endpoint(environ) in ASYNC_ENDPOINTS:
+            await self._serve_async(environ, send)
+        else:
+            await self._serve_wsgi(environ, send)
+
+    async def _lifespan(self, receive, send):
+        while True:
+            message = await receive()
+            if message['type'] == 'lifespan.startup':
+                await send({"type": 'lifespan.startup.complete'})
+            elif message['type'] == 'lifespan.shutdown':
+                await self.engine.dispose()
+                await send({"type": 'lifespan.shutdown.complete'})
+                return
+
+    # the endpoint a request is routed to, or None
+    def _endpoint(self, environ):
+        try:
+            rule, _ = self.flask_app.url_map.bind_to_environ(environ).match(
+                return_rule=True)
+        except HTTPException:
+            return None
+        return rule.endpoint
+
+    # runs the Flask view for the request in an AsyncSession
+    async def _serve_async(self, environ, send):
+        ctx = self.flask_app.request_context(environ)
+        ctx.push()
+        try:
+            async with self.sessions() as session:
+                response = await session.run_sync(self._dispatch)
+        finally:
+            ctx.pop()
+
+        await _send_start(send, response.status_code, response.headers.to_wsgi_list())
+        await send({"type": 'http.response.body',
+                    "body": b'' if _is_head(environ) else response.get_data()})
+
+    # full request dispatch, with before/after request hooks and error
+    # handlers. run_sync() calls this in its own greenlet, which is the
+    # scope of db.session, so the view's queries use the async session
+    def _dispatch(self, sync_session):
+        db.session.registry.set(sync_session)
+        try:
+            try:
+                return self.flask_app.full_dispatch_request()
+            except Exception as e:
+                return self.flask_app.make_response(
+                    self.flask_app.handle_exception(e))
+        finally:
+            db.session.registry.clear()
+
+    # runs the WSGI app on a worker thread, which streams the response back
+    # through a queue. the whole response is produced on that one thread, as
+    # streamed views keep the request context open while they iterate
+    async def _serve_wsgi(self, environ, send):
+        loop = asyncio.get_running_loop()
+        queue = asyncio.Queue(maxsize=8)
+
+        def put(item):
+            asyncio.run_coroutine_threadsafe(queue.put(item), loop).result()
+
+        def start_response(status, headers, exc_info=None):
+            put((int(status.split(' ', 1)[0]), headers))
+
+        def run():
+            try:
+                result = self.flask_app.wsgi_app(environ, start_response)
+                try:
+                    for chunk in result:
+                        if chunk:
+                            put(chunk)
+                finally:
+                    if hasattr(result, 'close'):
+                        result.close()
+            finally:
+                put(None)
+
+        task = loop.run_in_executor(None, run)
+        start = await queue.get()
+        if start is None:
+            # the app raised before starting the response: answer 500 and
+            # re-raise for the server to log
+            await _send_start(send, 500, [('Content-Type', 'text/plain')])
+            await send({"type": 'http.response.body', "body":
+                        b'' if _is_head(environ) else b'Internal Server Error'})
+            await task
+            return
+
+        await _send_start(send, *start)
+        while True:
+            chunk = await queue.get()
+            if chunk is None:
+                break
+            if not _is_head(environ):
+                await send({"type": 'http.response.body', "body": chunk,
+                            "more_body": True})
+        # an error while streaming leaves the response unfinished
+        await task
+        await send({"type": 'http.response.body', "body": b''})
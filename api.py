@@ -0,0 +1,143 @@
+#----------------------------------------------------------------------------#
+# Imports
+#----------------------------------------------------------------------------#
+
+from flask import Blueprint, Response, request, abort, stream_with_context
+from werkzeug.exceptions import HTTPException
+from models import db, Venue, Artist, Show
+from pagination import paginate, page_args
+from serialization import dumps
+from exporter import FORMATS, export_chunks
+
+#----------------------------------------------------------------------------#
+# JSON API.
+#
+#   GET /api/v1/<venues|artists|shows>                    keyset-paged list
+#   GET /api/v1/<venues|artists|shows>?ids=1,2,3          batch fetch
+#   GET /api/v1/<venues|artists|shows>/<id>               single entity
+#   GET /api/v1/<venues|artists|shows>/export?format=csv  streamed export
+#
+# The list, batch and entity endpoints take ?fields=id,name,... to select
+# only those columns, which are the only ones queried. Batch fetches
+# resolve every id in one query and return them in the order asked,
+# listing unknown ids in `missing`.
+#----------------------------------------------------------------------------#
+
+api = Blueprint('api', __name__, url_prefix='/api/v1')
+
+# largest number of ids accepted by a batch fetch
+MAX_BATCH_IDS = 100
+
+# models served by the API, by collection name
+COLLECTIONS = {
+    "venues": Venue,
+    "artists": Artist,
+    "shows": Show,
+}
+
+
+def json_response(payload, status=200):
+    return Response(dumps(payload), status=status, mimetype='application/json')
+
+
+# API errors are JSON too. 400 and 404 are named so they take precedence
+# over the app's HTML error pages
+@api.errorhandler(400)
+@api.errorhandler(404)
+@api.errorhandler(HTTPException)
+def api_error(error):
+    return json_response({"error": error.description}, error.code)
+
+
+# returns the columns picked by ?fields=, or every column of the model
+def _selected_columns(model):
+    columns = model.__table__.columns
+    fields = request.args.get('fields')
+    if not fields:
+        return list(columns)
+
+    names = [name.strip() for name in fields.split(',') if name.strip()]
+    unknown = [name for name in names if name not in columns]
+    if unknown:
+        abort(400, 'Unknown fields: %s' % ', '.join(unknown))
+    # always include id so rows can be matched to batch ids and cursors
+    if 'id' not in names:
+        names.insert(0, 'id')
+    return [columns[name] for name in names]
+
+
+# parses ?ids=1,2,3
+def _requested_ids():
+    try:
+        ids = [int(value) for value in request.args['ids'].split(',') if value]
+    except ValueError:
+        abort(400, 'ids must be a comma-separated list of integers')
+    if len(ids) > MAX_BATCH_IDS:
+        abort(400, 'At most %d ids per request' % MAX_BATCH_IDS)
+    return ids
+
+
+def _as_dict(row, columns):
+    return {column.key: value for column, value in zip(columns, row)}
+
+
+def _model(collection):
+    model = COLLECTIONS.get(collection)
+    if model is None:
+        abort(404, 'Unknown collection %r' % collection)
+    return model
+
+#----------------------------------------------------------------------------#
+# Endpoints.
+#----------------------------------------------------------------------------#
+
+# list or batch fetch of a collection
+
+
+@api.route('/<collection>')
+def list_collection(collection):
+    model = _model(collection)
+    columns = _selected_columns(model)
+    query = db.session.query(*columns)
+
+    if 'ids' in request.args:
+        ids = _requested_ids()
+        rows = query.filter(model.id.in_(ids)).all() if ids else []
+        found = {row.id: _as_dict(row, columns) for row in rows}
+        return json_response({
+            "data": [found[entity_id] for entity_id in ids if entity_id in found],
+            "missing": [entity_id for entity_id in ids if entity_id not in found]
+        })
+
+    page = paginate(query, [model.id], **page_args())
+    return json_response({
+        "data": [_as_dict(row, columns) for row in page.items],
+        "next_cursor": page.next_cursor,
+        "prev_cursor": page.prev_cursor
+    })
+
+
+# a single entity of a collection
+@api.route('/<collection>/<int:entity_id>')
+def get_entity(collection, entity_id):
+    model = _model(collection)
+    columns = _selected_columns(model)
+    row = db.session.query(*columns).filter(model.id == entity_id).first()
+    if row is None:
+        abort(404, '%s %d not found' % (model.__name__, entity_id))
+    return json_response({"data": _as_dict(row, columns)})
+
+
+# the whole collection as a streamed NDJSON (default) or CSV download
+@api.route('/<collection>/export')
+def export_collection(collection):
+    _model(collection)
+    format = request.args.get('format', 'ndjson')
+    if format not in FORMATS:
+        abort(400, 'format must be one of: %s' % ', '.join(FORMATS))
+
+    response = Response(stream_with_context(export_chunks(collection, format)),
+                        mimetype=FORMATS[format])
+    response.headers['Content-Disposition'] = (
+        'attachment; filename=%s.%s' % (collection, format))
+    return response
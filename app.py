@@ -2,57 +2,109 @@
 # Imports
 #----------------------------------------------------------------------------#
 
+import os
 import sys
+import time
+import click
 import dateutil.parser
 import babel
+import babel.dates
+from functools import lru_cache
 from flask import (
     Flask,
+    Blueprint,
     render_template,
     request,
     flash,
     redirect,
     url_for,
-    jsonify)
-import phonenumbers
-from datetime import datetime
+    jsonify,
+    abort,
+    current_app)
+from datetime import datetime, timedelta
 import logging
 from logging import Formatter, FileHandler
 from wtforms import ValidationError
 from forms import *
 from models import *
+from queries import (
+    venue_areas,
+    venue_detail,
+    artist_list,
+    artist_detail,
+    show_list,
+    venue_version,
+    venues_version,
+    artist_version,
+    artists_version,
+    shows_version)
+from pagination import page_args
+from counters import reconcile_show_counts
+import cache
+from cache import cached_page, add_cache_tags, invalidate, cache_stats
+from conditional import conditional
+from api import api
+from search import search
+from importer import import_rows, read_rows
+from exporter import export_chunks
+from seeding import seed_catalog
+from partitions import maintain_partitions, partitioned
+# bundled, fingerprinted static files and static_url()
+import assets
+# resized, cached copies of venue, artist and static images
+import images
+# gzip and brotli responses
+import compression
+# bytecode cache, template precompilation and startup timings
+import warmup
+from warmup import startup_stats
+# records per-request SQL counts and timings
+import instrumentation
+from config import configs
+from database import engine_options, pool_stats, statement_timeout
+import replicas
+from replicas import replica_stats
 
 #----------------------------------------------------------------------------#
 # Filters.
 #----------------------------------------------------------------------------#
 
-# used for formatting user time input
+# babel patterns for the named datetime formats
+DATETIME_FORMATS = {
+    "full": "EEEE MMMM, d, y 'at' h:mma",
+    "medium": "EE MM, dd, y h:mma"
+}
 
 
-def format_datetime(value, format='medium'):
-    date = dateutil.parser.parse(value)
-    if format == 'full':
-        format = "EEEE MMMM, d, y 'at' h:mma"
-    elif format == 'medium':
-        format = "EE MM, dd, y h:mma"
-    return babel.dates.format_datetime(date, format)
+# compiled babel pattern and locale, built once per format and locale
+@lru_cache(maxsize=64)
+def _datetime_formatter(format, locale):
+    pattern = babel.dates.parse_pattern(DATETIME_FORMATS.get(format, format))
+    return pattern, babel.Locale.parse(locale)
 
 
-app.jinja_env.filters['datetime'] = format_datetime
+# used for formatting show times. takes datetime objects; strings are
+# still parsed for older callers
 
-# validates user phone numbers
 
+def format_datetime(value, format='medium', locale=None):
+    if isinstance(value, str):
+        value = dateutil.parser.parse(value)
+    pattern, locale = _datetime_formatter(
+        format, locale or babel.dates.LC_TIME)
+    return pattern.apply(value, locale)
 
-def phone_validator(num):
-    parsed = phonenumbers.parse(num, "US")
-    if not phonenumbers.is_valid_number(parsed):
-        raise ValidationError('Must be a valid US phone number.')
 
 #----------------------------------------------------------------------------#
 # Controllers.
 #----------------------------------------------------------------------------#
 
+# the site's pages, error pages and commands; create_app() registers them
+main = Blueprint('main', __name__, cli_group=None)
+main.add_app_template_filter(format_datetime, 'datetime')
+
 # home page route handler
-@app.route('/')
+@main.route('/')
 def index():
     return render_template('pages/home.html')
 
@@ -61,142 +113,45 @@ def index():
 #  ----------------------------------------------------------------
 
 # venues page route handler
-@app.route('/venues')
+@main.route('/venues')
+@conditional(venues_version)
+@cached_page
 def venues():
-    # list for storing venue data
-    data = []
-
-    # get all the venues and create a set from the cities
-    venues = Venue.query.all()
-    venue_cities = set()
-    for venue in venues:
-        # add city/state tuples
-        venue_cities.add((venue.city, venue.state))
-
-    # for each unique city/state, add venues
-    for location in venue_cities:
-        data.append({
-            "city": location[0],
-            "state": location[1],
-            "venues": []
-        })
-
-    # get number of upcoming shows for each venue
-    for venue in venues:
-        num_upcoming_shows = 0
-
-        shows = Show.query.filter_by(venue_id=venue.id).all()
-
-        # if the show start time is after now, add to upcoming
-        for show in shows:
-            if show.start_time > datetime.now():
-                num_upcoming_shows += 1
-
-        # for each entry, add venues to matching city/state
-        for entry in data:
-            if venue.city == entry['city'] and venue.state == entry['state']:
-                entry['venues'].append({
-                    "id": venue.id,
-                    "name": venue.name,
-                    "num_upcoming_shows": num_upcoming_shows
-                })
+    # get a page of venues grouped by city/state, with upcoming show counts
+    page = venue_areas(**page_args())
+    add_cache_tags('venues')
 
     # return venues page with data
-    return render_template('pages/venues.html', areas=data)
+    return render_template('pages/venues.html', areas=page.items, page=page)
 
 # venues search route handler
-@app.route('/venues/search', methods=['POST'])
+@main.route('/venues/search', methods=['POST'])
+@statement_timeout('SEARCH_STATEMENT_TIMEOUT')
 def search_venues():
-    # get the user search term
+    # get the user search term and requested page
     search_term = request.form.get('search_term', '')
+    page = request.form.get('page', 1, type=int)
 
-    # find all venues matching search term
-    # including partial match and case-insensitive
-    venues = Venue.query.filter(Venue.name.ilike(f'%{search_term}%')).all()
-
-    response = {
-        "count": len(venues),
-        "data": []
-    }
-
-    for venue in venues:
-        num_upcoming_shows = 0
-
-        shows = Show.query.filter_by(venue_id=venue.id).all()
-
-        # calculuate num of upcoming shows for each venue
-        for show in shows:
-            if show.start_time > datetime.now():
-                num_upcoming_shows += 1
-
-        # add venue data to response
-        response['data'].append({
-            "id": venue.id,
-            "name": venue.name,
-            "num_upcoming_shows": num_upcoming_shows,
-        })
+    # find ranked venues matching the search term, one page at a time
+    response = search(Venue, search_term, page=page)
 
     # return response with search results
-    return render_template('pages/search_venues.html', results=response, search_term=request.form.get('search_term', ''))
+    return render_template('pages/search_venues.html', results=response, search_term=search_term)
 
 # route handler for individual venue pages
-@app.route('/venues/<int:venue_id>')
+@main.route('/venues/<int:venue_id>')
+@conditional(venue_version)
+@cached_page
 def show_venue(venue_id):
-    # get all venues
-    venue = Venue.query.filter_by(id=venue_id).first()
+    # get venue data with its past and upcoming shows
+    data = venue_detail(venue_id)
+    if data is None:
+        abort(404)
 
-    # get all shows for given venue
-    shows = Show.query.filter_by(venue_id=venue_id).all()
-
-    # returns upcoming shows
-    def upcoming_shows():
-        upcoming = []
-
-        # if show is in future, add show details to upcoming
-        for show in shows:
-            if show.start_time > datetime.now():
-                upcoming.append({
-                    "artist_id": show.artist_id,
-                    "artist_name": Artist.query.filter_by(id=show.artist_id).first().name,
-                    "artist_image_link": Artist.query.filter_by(id=show.artist_id).first().image_link,
-                    "start_time": format_datetime(str(show.start_time))
-                })
-        return upcoming
-
-    # returns past shows
-    def past_shows():
-        past = []
-
-        # if show is in past, add show details to past
-        for show in shows:
-            if show.start_time < datetime.now():
-                past.append({
-                    "artist_id": show.artist_id,
-                    "artist_name": Artist.query.filter_by(id=show.artist_id).first().name,
-                    "artist_image_link": Artist.query.filter_by(id=show.artist_id).first().image_link,
-                    "start_time": format_datetime(str(show.start_time))
-                })
-        return past
-
-    # data for given venue
-    data = {
-        "id": venue.id,
-        "name": venue.name,
-        "genres": venue.genres,
-        "address": venue.address,
-        "city": venue.city,
-        "state": venue.state,
-        "phone": venue.phone,
-        "website": venue.website,
-        "facebook_link": venue.facebook_link,
-        "seeking_talent": venue.seeking_talent,
-        "seeking_description": venue.seeking_description,
-        "image_link": venue.image_link,
-        "past_shows": past_shows(),
-        "upcoming_shows": upcoming_shows(),
-        "past_shows_count": len(past_shows()),
-        "upcoming_shows_count": len(upcoming_shows())
-    }
+    # the page changes with the venue and the artists it lists
+    add_cache_tags('venue:%d' % venue_id, *[
+        'artist:%d' % show['artist_id']
+        for show in data['past_shows'] + data['upcoming_shows']])
 
     # return template with venue data
     return render_template('pages/show_venue.html', venue=data)
@@ -205,13 +160,13 @@ def show_venue(venue_id):
 #  ----------------------------------------------------------------
 
 # get the create venue form
-@app.route('/venues/create', methods=['GET'])
+@main.route('/venues/create', methods=['GET'])
 def create_venue_form():
     form = VenueForm()
     return render_template('forms/new_venue.html', form=form)
 
 # post handler for venue creation
-@app.route('/venues/create', methods=['POST'])
+@main.route('/venues/create', methods=['POST'])
 def create_venue_submission():
 
     # use try-except block to catch exceptions
@@ -242,6 +197,7 @@ def create_venue_submission():
         # add new venue to session and commit to database
         db.session.add(venue)
         db.session.commit()
+        invalidate('venues')
 
         # flash success if no errors/exceptions
         flash('Venue ' + request.form['name'] + ' was successfully listed!')
@@ -264,7 +220,7 @@ def create_venue_submission():
     return render_template('pages/home.html')
 
 # route handler for deleting venues
-@app.route('/venues/<venue_id>', methods=['DELETE'])
+@main.route('/venues/<venue_id>', methods=['DELETE'])
 def delete_venue(venue_id):
     # catch exceptions with try-except block
     try:
@@ -274,8 +230,12 @@ def delete_venue(venue_id):
         # print('Venue', venue)
         name = venue.name
 
+        # its shows are deleted with it, which updates the
+        # show counters of the artists that played them
+
         db.session.delete(venue)
         db.session.commit()
+        invalidate('venue:%s' % venue_id, 'venues', 'artists', 'shows')
 
         # flash if successful delete
         flash('Venue ' + name + ' was successfully deleted.')
@@ -292,7 +252,7 @@ def delete_venue(venue_id):
         db.session.close()
 
     # if not error:
-    #     return redirect(url_for('index'))
+    #     return redirect(url_for('main.index'))
     # else:
     #     abort(500)
 
@@ -303,116 +263,45 @@ def delete_venue(venue_id):
 #  ----------------------------------------------------------------
 
 # route handler for artists overview page
-@app.route('/artists')
+@main.route('/artists')
+@conditional(artists_version)
+@cached_page
 def artists():
-    # get all artists, return data with name & id of each artist
-
-    data = []
-
-    artists = Artist.query.all()
+    # get a page of artists, with name & id of each artist
+    page = artist_list(**page_args())
+    add_cache_tags('artists')
 
-    for artist in artists:
-        data.append({
-            "id": artist.id,
-            "name": artist.name
-        })
-
-    return render_template('pages/artists.html', artists=data)
+    return render_template('pages/artists.html', artists=page.items, page=page)
 
 # artist search route handler
-@app.route('/artists/search', methods=['POST'])
+@main.route('/artists/search', methods=['POST'])
+@statement_timeout('SEARCH_STATEMENT_TIMEOUT')
 def search_artists():
 
-    # get search term from user input
+    # get search term and requested page from user input
     search_term = request.form.get('search_term', '')
+    page = request.form.get('page', 1, type=int)
 
-    # find all artists matching search term
-    # including partial match and case-insensitive
-    artists = Artist.query.filter(Artist.name.ilike(f'%{search_term}%')).all()
-
-    response = {
-        "count": len(artists),
-        "data": []
-    }
-
-    # for all matching artists, get num of upcoming shows
-    # and add data to reponse
-    for artist in artists:
-        num_upcoming_shows = 0
-
-        shows = Show.query.filter_by(artist_id=artist.id).all()
-
-        for show in shows:
-            if show.start_time > datetime.now():
-                num_upcoming_shows += 1
-
-        response['data'].append({
-            "id": artist.id,
-            "name": artist.name,
-            "num_upcoming_shows": num_upcoming_shows,
-        })
+    # find ranked artists matching the search term, one page at a time
+    response = search(Artist, search_term, page=page)
 
     # return reponse with matching search results
-    return render_template('pages/search_artists.html', results=response, search_term=request.form.get('search_term', ''))
+    return render_template('pages/search_artists.html', results=response, search_term=search_term)
 
 # route handler for individual artist pages
-@app.route('/artists/<int:artist_id>')
+@main.route('/artists/<int:artist_id>')
+@conditional(artist_version)
+@cached_page
 def show_artist(artist_id):
+    # get artist data with its past and upcoming shows
+    data = artist_detail(artist_id)
+    if data is None:
+        abort(404)
 
-    # get artist by id
-    artist = Artist.query.filter_by(id=artist_id).first()
-
-    # get all shows matching artist id
-    shows = Show.query.filter_by(artist_id=artist_id).all()
-
-    # returns upcoming shows
-    def upcoming_shows():
-        upcoming = []
-
-        # if the show is upcoming, add to upcoming
-        for show in shows:
-            if show.start_time > datetime.now():
-                upcoming.append({
-                    "venue_id": show.venue_id,
-                    "venue_name": Venue.query.filter_by(id=show.venue_id).first().name,
-                    "venue_image_link": Venue.query.filter_by(id=show.venue_id).first().image_link,
-                    "start_time": format_datetime(str(show.start_time))
-                })
-        return upcoming
-
-    # returns past shows
-    def past_shows():
-        past = []
-
-        # if show is in past, add to past
-        for show in shows:
-            if show.start_time < datetime.now():
-                past.append({
-                    "venue_id": show.venue_id,
-                    "venue_name": Venue.query.filter_by(id=show.venue_id).first().name,
-                    "venue_image_link": Venue.query.filter_by(id=show.venue_id).first().image_link,
-                    "start_time": format_datetime(str(show.start_time))
-                })
-        return past
-
-    # data for given artist
-    data = {
-        "id": artist.id,
-        "name": artist.name,
-        "genres": artist.genres,
-        "city": artist.city,
-        "state": artist.state,
-        "phone": artist.phone,
-        "website": artist.website,
-        "facebook_link": artist.facebook_link,
-        "seeking_venue": artist.seeking_venue,
-        "seeking_description": artist.seeking_description,
-        "image_link": artist.image_link,
-        "past_shows": past_shows(),
-        "upcoming_shows": upcoming_shows(),
-        "past_shows_count": len(past_shows()),
-        "upcoming_shows_count": len(upcoming_shows()),
-    }
+    # the page changes with the artist and the venues it lists
+    add_cache_tags('artist:%d' % artist_id, *[
+        'venue:%d' % show['venue_id']
+        for show in data['past_shows'] + data['upcoming_shows']])
 
     # return artist page with data
     return render_template('pages/show_artist.html', artist=data)
@@ -421,7 +310,7 @@ def show_artist(artist_id):
 #  ----------------------------------------------------------------
 
 # route handler for GET edit artist form
-@app.route('/artists/<int:artist_id>/edit', methods=['GET'])
+@main.route('/artists/<int:artist_id>/edit', methods=['GET'])
 def edit_artist(artist_id):
     form = ArtistForm()
 
@@ -452,7 +341,7 @@ def edit_artist(artist_id):
     return render_template('forms/edit_artist.html', form=form, artist=artist)
 
 # edit artist POST handler
-@app.route('/artists/<int:artist_id>/edit', methods=['POST'])
+@main.route('/artists/<int:artist_id>/edit', methods=['POST'])
 def edit_artist_submission(artist_id):
 
     # catch exceptions with try-except block
@@ -478,6 +367,7 @@ def edit_artist_submission(artist_id):
 
         # commit the changes
         db.session.commit()
+        invalidate('artist:%d' % artist_id, 'artists', 'shows')
 
         flash('Artist ' + request.form['name'] + ' was successfully updated!')
     except ValidationError as e:
@@ -498,10 +388,10 @@ def edit_artist_submission(artist_id):
         db.session.close()
 
     # return redirect to artist page
-    return redirect(url_for('show_artist', artist_id=artist_id))
+    return redirect(url_for('main.show_artist', artist_id=artist_id))
 
 # handler for venue edit GET
-@app.route('/venues/<int:venue_id>/edit', methods=['GET'])
+@main.route('/venues/<int:venue_id>/edit', methods=['GET'])
 def edit_venue(venue_id):
     form = VenueForm()
 
@@ -533,7 +423,7 @@ def edit_venue(venue_id):
     return render_template('forms/edit_venue.html', form=form, venue=venue)
 
 # venue edit POST handler
-@app.route('/venues/<int:venue_id>/edit', methods=['POST'])
+@main.route('/venues/<int:venue_id>/edit', methods=['POST'])
 def edit_venue_submission(venue_id):
 
     # catch exceptions with try-except block
@@ -560,6 +450,7 @@ def edit_venue_submission(venue_id):
 
         # commit changes, flash message if successful
         db.session.commit()
+        invalidate('venue:%d' % venue_id, 'venues', 'shows')
         flash('Venue ' + request.form['name'] + ' was successfully updated!')
     except ValidationError as e:
         # catch errors from phone validation
@@ -578,13 +469,13 @@ def edit_venue_submission(venue_id):
         db.session.close()
 
     # return redirect to venue page
-    return redirect(url_for('show_venue', venue_id=venue_id))
+    return redirect(url_for('main.show_venue', venue_id=venue_id))
 
 #  Create Artist
 #  ----------------------------------------------------------------
 
 # artist creation GET route handler
-@app.route('/artists/create', methods=['GET'])
+@main.route('/artists/create', methods=['GET'])
 def create_artist_form():
     form = ArtistForm()
 
@@ -592,7 +483,7 @@ def create_artist_form():
     return render_template('forms/new_artist.html', form=form)
 
 # artist creation POST handler
-@app.route('/artists/create', methods=['POST'])
+@main.route('/artists/create', methods=['POST'])
 def create_artist_submission():
 
     # catch exceptions with try-except block
@@ -621,6 +512,7 @@ def create_artist_submission():
         # add new artist and commit session
         db.session.add(artist)
         db.session.commit()
+        invalidate('artists')
 
         # flash message if successful
         flash('Artist ' + request.form['name'] + ' was successfully listed!')
@@ -643,7 +535,7 @@ def create_artist_submission():
     return render_template('pages/home.html')
 
 # delete artist route handler
-@app.route('/artists/<int:artist_id>', methods=['DELETE'])
+@main.route('/artists/<int:artist_id>', methods=['DELETE'])
 def delete_artist(artist_id):
 
     # catch exceptions with try-except block
@@ -652,9 +544,11 @@ def delete_artist(artist_id):
         artist = Artist.query.filter_by(id=artist_id).first()
         name = artist.name
 
-        # delete artist and commit changes
+        # delete artist and its shows, updating the show
+        # counters of the venues they were at, and commit changes
         db.session.delete(artist)
         db.session.commit()
+        invalidate('artist:%d' % artist_id, 'artists', 'venues', 'shows')
 
         flash('Artist ' + name + ' was successfully deleted.')
     except:
@@ -672,38 +566,62 @@ def delete_artist(artist_id):
 #  Shows
 #  ----------------------------------------------------------------
 
+# parses a from/to argument, a date or a date and time. a bare `to` date
+# includes that whole day. malformed values abort with 400
+def _show_time(name, end=False):
+    value = request.args.get(name) or None
+    if value is None:
+        return None
+    try:
+        parsed = datetime.fromisoformat(value)
+    except ValueError:
+        abort(400)
+    if end and len(value) == 10:
+        parsed += timedelta(days=1)
+    return parsed
+
+
+# reads the filters of the shows page: from, to, venue_id, artist_id and
+# city. without a from date only upcoming shows are listed
+def show_filters():
+    return {
+        "start": _show_time('from') or datetime.now(),
+        "end": _show_time('to', end=True),
+        "venue_id": request.args.get('venue_id', type=int),
+        "artist_id": request.args.get('artist_id', type=int),
+        "city": request.args.get('city') or None
+    }
+
+
 # route handler for shows page
-@app.route('/shows')
+@main.route('/shows')
+@conditional(shows_version)
+@cached_page
 def shows():
 
-    # get all the shows
-    shows = Show.query.all()
+    # get a page of shows in the requested window, in start time order,
+    # with their venue and artist information
+    page = show_list(**page_args(), **show_filters())
+    add_cache_tags('shows')
 
-    data = []
-
-    # get venue and artist information for each show
-    for show in shows:
-        data.append({
-            "venue_id": show.venue_id,
-            "venue_name": Venue.query.filter_by(id=show.venue_id).first().name,
-            "artist_id": show.artist_id,
-            "artist_name": Artist.query.filter_by(id=show.artist_id).first().name,
-            "artist_image_link": Artist.query.filter_by(id=show.artist_id).first().image_link,
-            "start_time": format_datetime(str(show.start_time))
-        })
+    # the filters as given, for the filter form and the pager links
+    filters = {name: request.args[name]
+               for name in ('from', 'to', 'venue_id', 'artist_id', 'city')
+               if request.args.get(name)}
 
     # return shows page with show data
-    return render_template('pages/shows.html', shows=data)
+    return render_template('pages/shows.html', shows=page.items, page=page,
+                           filters=filters)
 
 # handler for rendering create shows page
-@app.route('/shows/create')
+@main.route('/shows/create')
 def create_shows():
     # renders form. do not touch.
     form = ShowForm()
     return render_template('forms/new_show.html', form=form)
 
 # POST handler for show create
-@app.route('/shows/create', methods=['POST'])
+@main.route('/shows/create', methods=['POST'])
 def create_show_submission():
 
     # catch exceptions with try-except block
@@ -711,15 +629,20 @@ def create_show_submission():
         # get user input data from form
         artist_id = request.form['artist_id']
         venue_id = request.form['venue_id']
-        start_time = request.form['start_time']
+        # parsed so the show counters can tell upcoming from past
+        start_time = dateutil.parser.parse(request.form['start_time'])
 
         # create new show with user data
         show = Show(artist_id=artist_id, venue_id=venue_id,
                     start_time=start_time)
 
-        # add show and commit session
+        # add show and commit session -- the venue and artist
+        # show counters are updated in the same transaction
         db.session.add(show)
         db.session.commit()
+        # the listings show the venue and artist show counters too
+        invalidate('venue:%s' % venue_id, 'artist:%s' % artist_id,
+                   'venues', 'artists', 'shows')
 
         # on successful db insert, flash success
         flash('Show was successfully listed!')
@@ -734,29 +657,200 @@ def create_show_submission():
     # return homepage template
     return render_template('pages/home.html')
 
+# cache, pool and startup numbers for scraping by monitoring. they show
+# replica URLs and errors, so create_app() only registers them when
+# STATS_ENABLED is set; keep them off the public internet
+stats = Blueprint('stats', __name__, url_prefix='/stats')
+
+# cache counters
+@stats.route('/cache')
+def cache_stats_json():
+    return jsonify(cache_stats())
+
+# connection pool counters of this worker, and the health of its replicas
+@stats.route('/pool')
+def pool_stats_json():
+    return jsonify(dict(pool_stats(), replicas=replica_stats()))
+
+# how long this app took to start and to compile its templates
+@stats.route('/startup')
+def startup_stats_json():
+    return jsonify(startup_stats())
+
 # error handlers
 
 
-@app.errorhandler(404)
+@main.app_errorhandler(404)
 def not_found_error(error):
     return render_template('errors/404.html'), 404
 
 
-@app.errorhandler(500)
+@main.app_errorhandler(500)
 def server_error(error):
     return render_template('errors/500.html'), 500
 
 
-if not app.debug:
-    file_handler = FileHandler('error.log')
-    file_handler.setFormatter(
-        Formatter(
-            '%(asctime)s %(levelname)s: %(message)s [in %(pathname)s:%(lineno)d]')
-    )
-    app.logger.setLevel(logging.INFO)
-    file_handler.setLevel(logging.INFO)
-    app.logger.addHandler(file_handler)
-    app.logger.info('errors')
+#----------------------------------------------------------------------------#
+# Commands.
+#----------------------------------------------------------------------------#
+
+# recomputes the venue and artist show counters, moving shows that have
+# started from upcoming to past. run periodically, e.g. from cron:
+#   FLASK_APP=app.py flask reconcile-counts
+@main.cli.command('reconcile-counts')
+def reconcile_counts_command():
+    reconcile_show_counts()
+    click.echo('Show counters reconciled.')
+
+# bulk imports venues, artists or shows from a CSV or JSON Lines file:
+#   FLASK_APP=app.py flask import venues venues.csv
+#   FLASK_APP=app.py flask import shows shows.jsonl
+@main.cli.command('import')
+@click.argument('kind', type=click.Choice(['venues', 'artists', 'shows']))
+@click.argument('file', type=click.File('r', encoding='utf-8'))
+@click.option('--format', 'format', type=click.Choice(['csv', 'jsonl']),
+              help='Input format; guessed from the file extension by default.')
+@click.option('--batch-size', default=1000, show_default=True,
+              help='Rows per INSERT.')
+def import_command(kind, file, format, batch_size):
+    if format is None:
+        format = 'jsonl' if os.path.splitext(file.name)[1] in (
+            '.jsonl', '.ndjson', '.json') else 'csv'
+
+    def on_error(line_num, message):
+        click.echo('%s:%d: %s' % (file.name, line_num, message), err=True)
+
+    stats = import_rows(kind, read_rows(file, format),
+                        batch_size=batch_size, on_error=on_error)
+
+    # pages in a shared cache may now be out of date
+    invalidate(kind)
+    click.echo('Imported %d %s, %d rejected, in %.1fs (%.0f rows/s).' % (
+        stats['imported'], kind, stats['failed'], stats['seconds'],
+        stats['rows_per_second']))
+
+# streams venues, artists or shows out as NDJSON or CSV:
+#   FLASK_APP=app.py flask export shows -o shows.ndjson
+@main.cli.command('export')
+@click.argument('kind', type=click.Choice(['venues', 'artists', 'shows']))
+@click.option('--format', 'format', type=click.Choice(['ndjson', 'csv']),
+              default='ndjson', show_default=True)
+@click.option('-o', '--output', type=click.File('wb'), default='-',
+              help='Output file; standard output by default.')
+def export_command(kind, format, output):
+    for chunk in export_chunks(kind, format):
+        output.write(chunk)
+
+# creates next months' Show partitions, merges old months into yearly
+# partitions and detaches the oldest ones (see partitions.py). run daily:
+#   FLASK_APP=app.py flask maintain-partitions --archive-after 12
+@main.cli.command('maintain-partitions')
+@click.option('--ahead', default=3, show_default=True,
+              help='Months of partitions to keep ahead of the current one.')
+@click.option('--archive-after', type=int,
+              help='Merge the months of years that ended this many months '
+                   'ago into one partition per year.')
+@click.option('--detach-after', type=int,
+              help='Detach partitions whose shows all started this many '
+                   'months ago. Their shows leave the site.')
+@click.option('--tablespace', help='Tablespace of archived partitions.')
+def maintain_partitions_command(ahead, archive_after, detach_after, tablespace):
+    if not partitioned():
+        click.echo('Show is not partitioned; run `flask db upgrade` on Postgres.')
+        return
+
+    done = maintain_partitions(ahead=ahead, archive_after=archive_after,
+                               detach_after=detach_after, tablespace=tablespace)
+    for action, names in done.items():
+        click.echo('%s: %s' % (action.capitalize(), ', '.join(names) or 'none'))
+    if done['detached']:
+        # detached shows no longer count as past shows
+        reconcile_show_counts()
+        invalidate('venues', 'artists', 'shows')
+
+# bundles, minifies, fingerprints and precompresses the static files into
+# static/dist (see assets.py). run on deploy, before the app starts:
+#   FLASK_APP=app.py flask build-assets
+@main.cli.command('build-assets')
+def build_assets_command():
+    manifest = assets.build_assets(current_app.static_folder)
+    for bundle in assets.BUNDLES:
+        click.echo('%s -> %s' % (bundle, manifest[bundle]))
+    click.echo('Built %d files.' % len(manifest))
+
+# fills the database with realistic synthetic venues, artists and shows,
+# the same data for the same --seed:
+#   FLASK_APP=app.py flask seed --venues 1000 --artists 5000 --shows 100000
+@main.cli.command('seed')
+@click.option('--venues', default=100, show_default=True)
+@click.option('--artists', default=500, show_default=True)
+@click.option('--shows', default=5000, show_default=True)
+@click.option('--seed', 'seed', default=0, show_default=True,
+              help='Random seed.')
+def seed_command(venues, artists, shows, seed):
+    counts = seed_catalog(venues, artists, shows, seed=seed)
+    invalidate('venues', 'artists', 'shows')
+    click.echo('Added %d venues, %d artists and %d shows.' % (
+        counts['venues'], counts['artists'], counts['shows']))
+
+#----------------------------------------------------------------------------#
+# App factory.
+#----------------------------------------------------------------------------#
+
+# builds the app for a config name ('development', 'testing' or
+# 'production'; FYYUR_ENV or FLASK_ENV by default), with settings
+# overriding the config class. `flask` finds this through FLASK_APP=app.py
+
+
+def create_app(config_name=None, **settings):
+    started = time.perf_counter()
+    config_name = (config_name or os.environ.get('FYYUR_ENV')
+                   or os.environ.get('FLASK_ENV') or 'development')
+    app = Flask(__name__)
+    app.config.from_object(configs[config_name])
+    app.config.update(settings)
+    app.config.setdefault('SQLALCHEMY_ENGINE_OPTIONS', engine_options(app.config))
+    if not app.config.get('SECRET_KEY'):
+        raise RuntimeError('Set SECRET_KEY in the environment; every worker '
+                           'must sign sessions with the same key.')
+
+    moment.init_app(app)
+    db.init_app(app)
+    # SQLite can't alter constraints in place, so migrations rebuild the table
+    migrate.init_app(app, db, render_as_batch=app.config[
+        'SQLALCHEMY_DATABASE_URI'].startswith('sqlite'))
+    replicas.init_app(app, engine_options)
+    cache.init_app(app)
+    instrumentation.init_app(app)
+    assets.init_app(app)
+    images.init_app(app)
+    compression.init_app(app)
+    warmup.init_app(app)
+
+    app.register_blueprint(main)
+    # JSON API under /api/v1
+    app.register_blueprint(api)
+    if app.config.get('STATS_ENABLED'):
+        app.register_blueprint(stats)
+
+    if not app.debug and not app.testing:
+        file_handler = FileHandler('error.log')
+        file_handler.setFormatter(
+            Formatter(
+                '%(asctime)s %(levelname)s: %(message)s [in %(pathname)s:%(lineno)d]')
+        )
+        app.logger.setLevel(logging.INFO)
+        file_handler.setLevel(logging.INFO)
+        app.logger.addHandler(file_handler)
+        app.logger.info('errors')
+
+    # compile the templates now rather than on the first requests
+    templates, template_seconds = 0, 0.0
+    if app.config.get('TEMPLATE_WARMUP', True):
+        templates, template_seconds = warmup.warm_templates(app)
+    warmup.record_startup(app, started, templates, template_seconds)
+
+    return app
 
 #----------------------------------------------------------------------------#
 # Launch.
@@ -764,11 +858,11 @@ if not app.debug:
 
 # Default port:
 if __name__ == '__main__':
-    app.run()
+    create_app().run()
 
 # Or specify port manually:
 '''
 if __name__ == '__main__':
     port = int(os.environ.get('PORT', 5000))
-    app.run(host='0.0.0.0', port=port)
+    create_app().run(host='0.0.0.0', port=port)
 '''
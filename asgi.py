@@ -0,0 +1,15 @@
+#----------------------------------------------------------------------------#
+# Production ASGI entry point, serving the read routes asynchronously.
+#
+#   pip install uvicorn asyncpg
+#   SECRET_KEY=... DATABASE_URL=... uvicorn asgi:app --workers 4
+#
+# Uses the production config unless FYYUR_ENV names another one. Set
+# ASYNC_DATABASE_URI to override the async driver URL.
+#----------------------------------------------------------------------------#
+
+import os
+from app import create_app
+from aio import AsyncApp
+
+app = AsyncApp(create_app(os.environ.get('FYYUR_ENV', 'production')))
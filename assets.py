@@ -0,0 +1,258 @@
+#----------------------------------------------------------------------------#
+# Imports
+#----------------------------------------------------------------------------#
+
+import gzip
+import hashlib
+import json
+import mimetypes
+import os
+import posixpath
+import re
+from flask import current_app, request, url_for, send_from_directory, abort
+
+#----------------------------------------------------------------------------#
+# Static assets.
+#
+# `flask build-assets` bundles the stylesheets and scripts in BUNDLES into
+# one minified file each and copies every other file under static/ as well,
+# except unminified libraries shipped with a .min copy (bootstrap.css is
+# served as bootstrap.min.css).
+# Every output file is named by a hash of its content, e.g.
+# css/site.3f9a0c1d2b4e.css, and static/dist/manifest.json maps the plain
+# names to them. Text files also get .gz and .br (with the brotli package)
+# variants. Templates link assets with static_url('css/site.css'); the
+# fingerprinted files are served from /assets/ with far-future caching and
+# the best precompressed variant the client accepts, since a changed file
+# gets a new name.
+#
+# Without a build (in development), static_url() links the plain names and
+# /assets/ bundles the sources on every request, uncached.
+#----------------------------------------------------------------------------#
+
+# output folder, under the static folder
+OUTPUT_FOLDER = 'dist'
+MANIFEST = 'manifest.json'
+
+# bundle name -> source files under static/, in load order
+BUNDLES = {
+    "css/site.css": [
+        'css/bootstrap.min.css',
+        'css/layout.main.css',
+        'css/main.css',
+        'css/main.responsive.css',
+        'css/main.quickfix.css',
+    ],
+    # needed before the page renders
+    "js/head.js": [
+        'js/libs/modernizr-2.8.2.min.js',
+        'js/libs/moment.min.js',
+    ],
+    # loaded deferred at the end of the page
+    "js/site.js": [
+        'js/libs/jquery-1.11.1.min.js',
+        'js/libs/bootstrap-3.1.1.min.js',
+        'js/plugins.js',
+        'js/script.js',
+    ],
+}
+
+# types worth precompressing; images and woff fonts are compressed already
+COMPRESSIBLE = ('.css', '.js', '.map', '.svg', '.json', '.txt', '.eot', '.ttf',
+                '.otf')
+
+# encodings of the precompressed variants, best first
+ENCODINGS = (('br', '.br'), ('gzip', '.gz'))
+
+# a year, the longest max-age caches honor
+MAX_AGE = 31536000
+
+CSS_URL = re.compile(r'url\(\s*([\'"]?)([^\'")]+)\1\s*\)')
+
+#----------------------------------------------------------------------------#
+# Build.
+#----------------------------------------------------------------------------#
+
+# inserts the first 12 hex digits of content's hash before the extension
+
+
+def _fingerprint(name, content):
+    stem, ext = posixpath.splitext(name)
+    return '%s.%s%s' % (stem, hashlib.sha256(content).hexdigest()[:12], ext)
+
+
+# points the relative url()s of a stylesheet at source, which moves to
+# bundle, at resolve(path) of the files they name
+def _rebase_urls(css, source, bundle, resolve):
+    def rebase(match):
+        quote, url = match.groups()
+        if url.startswith(('/', 'data:', '#')) or '://' in url:
+            return match.group(0)
+        path, query = re.match(r'([^?#]*)(.*)', url).groups()
+        target = resolve(posixpath.normpath(
+            posixpath.join(posixpath.dirname(source), path)))
+        return 'url(%s%s%s%s)' % (quote, posixpath.relpath(
+            target, posixpath.dirname(bundle)), query, quote)
+    return CSS_URL.sub(rebase, css)
+
+
+# the minified contents of a bundle. resolve maps the static paths named
+# by its stylesheets to the paths they are served under
+def bundle_content(static_folder, bundle, resolve=lambda path: path):
+    import rcssmin
+    import rjsmin
+
+    parts = []
+    for source in BUNDLES[bundle]:
+        with open(os.path.join(static_folder, source), encoding='utf-8') as f:
+            text = f.read()
+        if bundle.endswith('.css'):
+            parts.append(rcssmin.cssmin(_rebase_urls(text, source, bundle, resolve)))
+        else:
+            # the libraries ship minified, and keep their license comments
+            parts.append(text if source.endswith('.min.js') else rjsmin.jsmin(text))
+    # a script missing its final semicolon must not run into the next one
+    separator = '\n' if bundle.endswith('.css') else ';\n'
+    return separator.join(parts).encode('utf-8')
+
+
+# name of the .min copy of a stylesheet or script, e.g. css/bootstrap.css
+# -> css/bootstrap.min.css, or None
+def _minified_name(name):
+    stem, ext = posixpath.splitext(name)
+    if ext not in ('.css', '.js') or stem.endswith('.min'):
+        return None
+    return stem + '.min' + ext
+
+
+# writes content to output/name with its precompressed variants
+def _write(output, name, content):
+    path = os.path.join(output, name)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, 'wb') as f:
+        f.write(content)
+    if not name.endswith(COMPRESSIBLE):
+        return
+
+    # mtime=0 so the same input always gives the same file
+    with open(path + '.gz', 'wb') as f:
+        f.write(gzip.compress(content, compresslevel=9, mtime=0))
+    try:
+        import brotli
+    except ImportError:
+        return
+    with open(path + '.br', 'wb') as f:
+        f.write(brotli.compress(content))
+
+
+# builds the output folder of static_folder and returns the manifest.
+# files of earlier builds are kept, as cached pages and workers still
+# running the old manifest link them
+def build_assets(static_folder):
+    output = os.path.join(static_folder, OUTPUT_FOLDER)
+    manifest = {}
+
+    # plain files first, so bundled stylesheets can point at their names
+    minified = {}
+    for root, dirs, files in os.walk(static_folder):
+        dirs[:] = [d for d in dirs if os.path.join(root, d) != output]
+        for filename in files:
+            name = os.path.relpath(os.path.join(root, filename),
+                                   static_folder).replace(os.sep, '/')
+            if filename.startswith('.'):
+                continue
+            # a library's unminified copy is served as its .min file
+            source = _minified_name(name)
+            if source is not None and posixpath.basename(source) in files:
+                minified[name] = source
+                continue
+            with open(os.path.join(root, filename), 'rb') as f:
+                content = f.read()
+            manifest[name] = _fingerprint(name, content)
+            _write(output, manifest[name], content)
+    for name, source in minified.items():
+        manifest[name] = manifest[source]
+
+    for bundle in BUNDLES:
+        content = bundle_content(static_folder, bundle,
+                                 lambda path: manifest.get(path, path))
+        manifest[bundle] = _fingerprint(bundle, content)
+        _write(output, manifest[bundle], content)
+
+    with open(os.path.join(output, MANIFEST), 'w') as f:
+        json.dump(manifest, f, indent=2, sort_keys=True)
+    return manifest
+
+
+# the manifest of the last build, or None
+def load_manifest(static_folder):
+    try:
+        with open(os.path.join(static_folder, OUTPUT_FOLDER, MANIFEST)) as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return None
+
+#----------------------------------------------------------------------------#
+# Serving.
+#----------------------------------------------------------------------------#
+
+# gives app the /assets/ route and the static_url() template helper, and
+# loads its manifest once
+
+
+def init_app(app):
+    app.extensions['assets'] = load_manifest(app.static_folder)
+    app.add_url_rule('/assets/<path:filename>', 'assets', serve_asset)
+    app.add_template_global(static_url)
+
+
+# URL of a static file or bundle by its plain name
+def static_url(name):
+    manifest = current_app.extensions['assets']
+    if manifest is not None and name in manifest:
+        return url_for('assets', filename=manifest[name])
+    return url_for('assets', filename=name)
+
+
+def serve_asset(filename):
+    manifest = current_app.extensions['assets']
+    if manifest is not None:
+        return _send_built(filename)
+
+    # development: bundles built per request, everything else as is
+    if filename in BUNDLES:
+        response = current_app.response_class(
+            bundle_content(current_app.static_folder, filename),
+            mimetype=mimetypes.guess_type(filename)[0])
+        response.cache_control.no_cache = True
+        return response
+    return send_from_directory(current_app.static_folder, filename,
+                               max_age=0)
+
+
+# sends a fingerprinted file, precompressed if the client accepts it
+def _send_built(filename):
+    output = os.path.join(current_app.static_folder, OUTPUT_FOLDER)
+    if filename == MANIFEST or filename.endswith(tuple(
+            suffix for encoding, suffix in ENCODINGS)):
+        abort(404)
+
+    encoding = None
+    path = filename
+    if filename.endswith(COMPRESSIBLE):
+        for name, suffix in ENCODINGS:
+            if (request.accept_encodings[name] and
+                    os.path.isfile(os.path.join(output, filename + suffix))):
+                encoding, path = name, filename + suffix
+                break
+
+    response = send_from_directory(
+        output, path, mimetype=mimetypes.guess_type(filename)[0],
+        max_age=MAX_AGE)
+    response.cache_control.public = True
+    response.cache_control.immutable = True
+    if filename.endswith(COMPRESSIBLE):
+        response.vary.add('Accept-Encoding')
+    if encoding is not None:
+        response.content_encoding = encoding
+    return response
@@ -0,0 +1,78 @@
+#----------------------------------------------------------------------------#
+# Imports
+#----------------------------------------------------------------------------#
+
+import os
+import time
+from contextlib import contextmanager
+from sqlalchemy import event
+from app import create_app
+from models import db
+from seeding import seed_catalog
+
+#----------------------------------------------------------------------------#
+# Database.
+#----------------------------------------------------------------------------#
+
+# benchmarks run against their own database so they never touch real data.
+# BENCH_DATABASE_URL=sqlite:// runs them in memory, without a server
+BENCH_DATABASE_URI = os.environ.get(
+    'BENCH_DATABASE_URL', 'postgresql://localhost:5432/fyyur_bench')
+
+
+# yields a testing app on a fresh schema in the benchmark database, which
+# is dropped afterwards. settings override the app config
+@contextmanager
+def bench_database(**settings):
+    app = create_app('testing', SQLALCHEMY_DATABASE_URI=BENCH_DATABASE_URI,
+                     **settings)
+    with app.app_context():
+        db.drop_all()
+        db.create_all()
+        try:
+            yield app
+        finally:
+            db.session.remove()
+            db.drop_all()
+
+
+# seeds venues, artists and shows with the same generator as `flask seed`,
+# so every benchmark run sees the same data
+def seed(num_venues, num_artists, num_shows):
+    seed_catalog(num_venues, num_artists, num_shows)
+
+#----------------------------------------------------------------------------#
+# Measurement.
+#----------------------------------------------------------------------------#
+
+# counts the statements executed on the engine while active
+
+
+@contextmanager
+def count_queries():
+    counter = {"count": 0}
+
+    def before_cursor_execute(*args):
+        counter['count'] += 1
+
+    event.listen(db.engine, 'before_cursor_execute', before_cursor_execute)
+    try:
+        yield counter
+    finally:
+        event.remove(db.engine, 'before_cursor_execute',
+                     before_cursor_execute)
+
+
+# runs fn and returns (seconds, query count) for the run
+def measure(fn, *args, **kwargs):
+    with count_queries() as counter:
+        start = time.perf_counter()
+        fn(*args, **kwargs)
+        elapsed = time.perf_counter() - start
+    db.session.remove()
+    return elapsed, counter['count']
+
+
+# prints a one-line report for a measured run
+def report(label, elapsed, queries):
+    print('%-28s %10.1f ms %10d queries' % (label, elapsed * 1000, queries))
@@ -0,0 +1,76 @@
+#----------------------------------------------------------------------------#
+# Compression benchmark.
+#
+# Renders every read route uncompressed, then compresses each body with
+# every encoding the app can produce, at the configured levels, and reports
+# bytes saved and the CPU time compression adds per response. A page cache
+# hit sends a stored variant and costs no compression at all. Run from the
+# project root:
+#
+#   BENCH_DATABASE_URL=sqlite:// python -m benchmarks.compression --shows 10000
+#----------------------------------------------------------------------------#
+
+import argparse
+import time
+from compression import available_encodings, compress, compressible
+from benchmarks.common import bench_database, seed
+from benchmarks.routes import routes
+
+
+# CPU seconds to compress body once with encoding, the best of runs
+def compress_time(body, encoding, runs):
+    best = None
+    for _ in range(runs):
+        start = time.process_time()
+        compress(body, encoding)
+        elapsed = time.process_time() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Measure the bytes saved and CPU spent compressing '
+                    'every route.')
+    parser.add_argument('--venues', type=int, default=1000)
+    parser.add_argument('--artists', type=int, default=5000)
+    parser.add_argument('--shows', type=int, default=100000)
+    parser.add_argument('--runs', type=int, default=20,
+                        help='Compressions timed per route and encoding.')
+    args = parser.parse_args()
+
+    with bench_database(CACHE_ENABLED=False, COMPRESS_ENABLED=False) as app:
+        seed(args.venues, args.artists, args.shows)
+        client = app.test_client()
+        encodings = available_encodings()
+
+        print('%-18s %10s %-9s %10s %7s %10s' % (
+            'route', 'bytes', 'encoding', 'bytes', 'saved', 'cpu ms'))
+        totals = {"raw": 0}
+        for label, method, url, data in routes():
+            response = client.open(url, method=method, data=data)
+            body = response.get_data()
+            totals['raw'] += len(body)
+            if not compressible(response.mimetype, len(body)):
+                print('%-18s %10d %-9s' % (label, len(body), 'skipped'))
+                continue
+
+            for encoding in encodings:
+                size = len(compress(body, encoding))
+                seconds = compress_time(body, encoding, args.runs)
+                totals[encoding] = totals.get(encoding, 0) + size
+                totals[encoding + ' cpu'] = totals.get(encoding + ' cpu', 0) + seconds
+                print('%-18s %10d %-9s %10d %6.1f%% %10.2f' % (
+                    label, len(body), encoding, size,
+                    (1 - size / len(body)) * 100, seconds * 1000))
+
+        print()
+        for encoding in encodings:
+            print('%-18s %10d %-9s %10d %6.1f%% %10.2f' % (
+                'all routes', totals['raw'], encoding, totals[encoding],
+                (1 - totals[encoding] / totals['raw']) * 100,
+                totals[encoding + ' cpu'] * 1000))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,202 @@
+#----------------------------------------------------------------------------#
+# Concurrency benchmark.
+#
+# Serves the seeded benchmark database from one process twice: the sync
+# Flask server (app.run(), a thread per request) and the async ASGI app
+# (asgi.py, under uvicorn). Both are driven with the same mix of read
+# requests at rising concurrency, and the report shows throughput, p50/p95
+# latency and errors per level, and the most concurrent users each server
+# holds within the p95 latency SLO. Needs uvicorn and an async driver
+# (asyncpg or aiosqlite). The database must outlive this process, so use a
+# server or a SQLite file. Run from the project root:
+#
+#   BENCH_DATABASE_URL=postgresql://localhost/fyyur_bench \
+#       python -m benchmarks.concurrency --concurrency 1 10 50 100 200
+#   BENCH_DATABASE_URL=sqlite:////tmp/fyyur_bench.db \
+#       python -m benchmarks.concurrency --shows 10000 --slo 250
+#----------------------------------------------------------------------------#
+
+import argparse
+import asyncio
+import os
+import socket
+import subprocess
+import sys
+import time
+from urllib.parse import urlencode
+from benchmarks.common import BENCH_DATABASE_URI, bench_database, seed
+from benchmarks.routes import percentile, routes
+
+# servers, as `python -c` programs serving the bench database on a port
+SERVERS = {
+    "sync": (
+        'from app import create_app\n'
+        'create_app("production", SQLALCHEMY_DATABASE_URI=%(uri)r, '
+        'CACHE_ENABLED=False).run(port=%(port)d, threaded=True)\n'),
+    "async": (
+        'import uvicorn\n'
+        'from aio import AsyncApp\n'
+        'from app import create_app\n'
+        'uvicorn.run(AsyncApp(create_app("production", '
+        'SQLALCHEMY_DATABASE_URI=%(uri)r, CACHE_ENABLED=False)), '
+        'port=%(port)d, log_level="warning")\n'),
+}
+
+
+def _free_port():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+# starts a server and waits until it accepts connections
+def start_server(name, port):
+    env = dict(os.environ, SECRET_KEY='benchmark-key')
+    env.pop('FLASK_ENV', None)
+    process = subprocess.Popen(
+        [sys.executable, '-c', SERVERS[name] % {
+            "uri": BENCH_DATABASE_URI, "port": port}],
+        env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    deadline = time.monotonic() + 30
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            sys.exit('The %s server exited with %d' % (name, process.returncode))
+        try:
+            socket.create_connection(('127.0.0.1', port), timeout=1).close()
+            return process
+        except OSError:
+            time.sleep(0.1)
+    process.kill()
+    sys.exit('The %s server did not start' % name)
+
+#----------------------------------------------------------------------------#
+# Load.
+#----------------------------------------------------------------------------#
+
+# raw HTTP/1.1 request, one connection each, so the client stays cheap next
+# to the servers. returns the status code
+
+
+async def fetch(port, method, url, data, timeout):
+    body = urlencode(data).encode() if data else b''
+    head = ('%s %s HTTP/1.1\r\nHost: 127.0.0.1:%d\r\nConnection: close\r\n'
+            'Content-Type: application/x-www-form-urlencoded\r\n'
+            'Content-Length: %d\r\n\r\n' % (method, url, port, len(body)))
+    reader, writer = await asyncio.wait_for(
+        asyncio.open_connection('127.0.0.1', port), timeout)
+    try:
+        writer.write(head.encode('latin-1') + body)
+        response = await asyncio.wait_for(reader.read(), timeout)
+    finally:
+        writer.close()
+    return int(response.split(b' ', 2)[1])
+
+
+# `users` clients each requesting the routes in turn, without pause, for
+# `duration` seconds
+async def load(port, requests, users, duration, timeout):
+    times, errors = [], 0
+    deadline = time.monotonic() + duration
+
+    async def user(offset):
+        nonlocal errors
+        i = offset
+        while time.monotonic() < deadline:
+            method, url, data = requests[i % len(requests)]
+            i += 1
+            start = time.perf_counter()
+            try:
+                status = await fetch(port, method, url, data, timeout)
+            except (OSError, asyncio.TimeoutError, IndexError, ValueError):
+                status = None
+            if status == 200:
+                times.append(time.perf_counter() - start)
+            else:
+                errors += 1
+
+    start = time.monotonic()
+    await asyncio.gather(*(user(offset) for offset in range(users)))
+    elapsed = time.monotonic() - start
+    return {
+        "requests_per_second": len(times) / elapsed,
+        "p50_ms": percentile(times, 50) * 1000 if times else None,
+        "p95_ms": percentile(times, 95) * 1000 if times else None,
+        "errors": errors
+    }
+
+
+# the highest concurrency with no errors and a p95 within the SLO
+def capacity(results, slo):
+    passed = [users for users, result in results.items()
+              if not result['errors'] and result['p95_ms'] is not None and
+              result['p95_ms'] <= slo]
+    return max(passed, default=0)
+
+
+def print_results(name, results):
+    print('%s server' % name)
+    print('%8s %10s %10s %10s %8s' % ('users', 'req/s', 'p50 ms', 'p95 ms',
+                                      'errors'))
+    for users, result in results.items():
+        print('%8d %10.1f %10s %10s %8d' % (
+            users, result['requests_per_second'],
+            '%.1f' % result['p50_ms'] if result['p50_ms'] is not None else '-',
+            '%.1f' % result['p95_ms'] if result['p95_ms'] is not None else '-',
+            result['errors']))
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Compare the concurrent users the sync and async '
+                    'servers hold on one process.')
+    parser.add_argument('--venues', type=int, default=1000)
+    parser.add_argument('--artists', type=int, default=5000)
+    parser.add_argument('--shows', type=int, default=100000)
+    parser.add_argument('--concurrency', type=int, nargs='+',
+                        default=[1, 10, 50, 100, 200],
+                        help='Concurrent users of each run.')
+    parser.add_argument('--duration', type=float, default=10,
+                        help='Seconds of each run.')
+    parser.add_argument('--timeout', type=float, default=10,
+                        help='Seconds before a request counts as failed.')
+    parser.add_argument('--slo', type=float, default=500,
+                        help='p95 latency target in milliseconds.')
+    parser.add_argument('--servers', nargs='+', choices=sorted(SERVERS),
+                        default=['sync', 'async'])
+    args = parser.parse_args()
+
+    if BENCH_DATABASE_URI in ('sqlite://', 'sqlite:///:memory:'):
+        sys.exit('The servers need a database they can share: set '
+                 'BENCH_DATABASE_URL to a server or a SQLite file.')
+
+    with bench_database():
+        seed(args.venues, args.artists, args.shows)
+        # the read routes served by both servers; the JSON API stays WSGI
+        requests = [(method, url, data) for label, method, url, data in routes()
+                    if not url.startswith('/api/')]
+
+        capacities = {}
+        for name in args.servers:
+            port = _free_port()
+            process = start_server(name, port)
+            try:
+                results = {}
+                for users in args.concurrency:
+                    results[users] = asyncio.run(load(
+                        port, requests, users, args.duration, args.timeout))
+            finally:
+                process.terminate()
+                process.wait()
+            print_results(name, results)
+            print()
+            capacities[name] = capacity(results, args.slo)
+
+    for name, users in capacities.items():
+        print('%-6s %d concurrent users within a p95 of %g ms' % (
+            name, users, args.slo))
+    if capacities.get('sync') and 'async' in capacities:
+        print('async/sync %.1fx' % (capacities['async'] / capacities['sync']))
+
+
+if __name__ == '__main__':
+    main()
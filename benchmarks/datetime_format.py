@@ -0,0 +1,55 @@
+#----------------------------------------------------------------------------#
+# Micro-benchmark for the datetime Jinja filter.
+#
+# Compares the original parse-then-format filter, which was handed
+# str(show.start_time), with format_datetime() on datetime objects. Run
+# from the project root:
+#
+#   python -m benchmarks.datetime_format --rows 100000
+#----------------------------------------------------------------------------#
+
+import argparse
+import time
+from datetime import datetime, timedelta
+import babel.dates
+import dateutil.parser
+from app import format_datetime
+
+
+# the filter as it was before compiled patterns were cached
+def legacy_format_datetime(value, format='medium'):
+    date = dateutil.parser.parse(value)
+    if format == 'full':
+        format = "EEEE MMMM, d, y 'at' h:mma"
+    elif format == 'medium':
+        format = "EE MM, dd, y h:mma"
+    return babel.dates.format_datetime(date, format)
+
+
+# formats every value and returns rows per second
+def rate(fn, values, format):
+    start = time.perf_counter()
+    for value in values:
+        fn(value, format)
+    return len(values) / (time.perf_counter() - start)
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Benchmark the datetime template filter.')
+    parser.add_argument('--rows', type=int, default=100000)
+    args = parser.parse_args()
+
+    start = datetime(2019, 10, 10, 20, 0)
+    times = [start + timedelta(minutes=37 * i) for i in range(args.rows)]
+    strings = [str(value) for value in times]
+
+    for format in ('full', 'medium'):
+        before = rate(legacy_format_datetime, strings, format)
+        after = rate(format_datetime, times, format)
+        print('%-6s %12.0f rows/s before %12.0f rows/s after  (%.1fx)'
+              % (format, before, after, after / before))
+
+
+if __name__ == '__main__':
+    main()
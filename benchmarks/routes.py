@@ -0,0 +1,169 @@
+#----------------------------------------------------------------------------#
+# Route benchmark suite.
+#
+# Seeds the benchmark database with `flask seed` data, requests every read
+# route through the Flask test client and reports p50/p95 latency, queries
+# per request and peak memory allocated per request. Results are saved as
+# JSON so runs can be diffed, and a saved run can be compared against the
+# current one. Exits non-zero if a route fails. Run from the project root:
+#
+#   BENCH_DATABASE_URL=postgresql://localhost/fyyur_bench \
+#       python -m benchmarks.routes --shows 100000
+#   python -m benchmarks.routes --compare benchmarks/results/routes-<...>.json
+#----------------------------------------------------------------------------#
+
+import argparse
+import json
+import os
+import sys
+import time
+import tracemalloc
+from datetime import datetime
+from models import db, Venue, Artist, Show
+from benchmarks.common import bench_database, seed, count_queries
+
+RESULTS_DIR = os.path.join(os.path.dirname(__file__), 'results')
+
+
+# (label, method, url, form data) for every read route, for the most
+# popular venue and artist (the lowest ids under the seeding distribution)
+def routes():
+    venue_id = db.session.query(db.func.min(Venue.id)).scalar()
+    artist_id = db.session.query(db.func.min(Artist.id)).scalar()
+    show_ids = ','.join(str(show_id) for show_id, in
+                        db.session.query(Show.id).order_by(Show.id).limit(50))
+    db.session.remove()
+    return [
+        ('index', 'GET', '/', None),
+        ('venues', 'GET', '/venues', None),
+        ('venue', 'GET', '/venues/%d' % venue_id, None),
+        ('venue search', 'POST', '/venues/search', {"search_term": 'blue'}),
+        ('artists', 'GET', '/artists', None),
+        ('artist', 'GET', '/artists/%d' % artist_id, None),
+        ('artist search', 'POST', '/artists/search', {"search_term": 'wolves'}),
+        ('shows', 'GET', '/shows', None),
+        ('api venues', 'GET', '/api/v1/venues', None),
+        ('api shows batch', 'GET', '/api/v1/shows?ids=' + show_ids, None),
+        ('api artist', 'GET', '/api/v1/artists/%d' % artist_id, None),
+    ]
+
+
+def percentile(values, p):
+    values = sorted(values)
+    return values[int(round(p / 100 * (len(values) - 1)))]
+
+
+# requests a route repeatedly and returns its measurements
+def measure_route(client, method, url, data, requests, warmup):
+    def fetch():
+        response = client.open(url, method=method, data=data)
+        response.get_data()
+        return response.status_code
+
+    for _ in range(warmup):
+        fetch()
+
+    times, queries = [], []
+    for _ in range(requests):
+        with count_queries() as counter:
+            start = time.perf_counter()
+            status = fetch()
+            times.append(time.perf_counter() - start)
+        queries.append(counter['count'])
+
+    # memory is traced in a separate request, as tracing slows everything
+    tracemalloc.start()
+    baseline = tracemalloc.get_traced_memory()[0]
+    fetch()
+    peak = tracemalloc.get_traced_memory()[1] - baseline
+    tracemalloc.stop()
+
+    return {
+        "status": status,
+        "p50_ms": percentile(times, 50) * 1000,
+        "p95_ms": percentile(times, 95) * 1000,
+        "queries": max(queries),
+        "peak_kb": peak / 1024
+    }
+
+
+def print_results(results, previous=None):
+    header = '%-18s %6s %10s %10s %8s %10s' % (
+        'route', 'status', 'p50 ms', 'p95 ms', 'queries', 'peak KB')
+    print(header)
+    for label, result in results['routes'].items():
+        print('%-18s %6d %10.2f %10.2f %8d %10.0f' % (
+            label, result['status'], result['p50_ms'], result['p95_ms'],
+            result['queries'], result['peak_kb']))
+        before = (previous or {}).get('routes', {}).get(label)
+        if before is not None:
+            print('%-18s %6s %+9.0f%% %+9.0f%% %+8d %+9.0f%%' % (
+                '  vs previous', '',
+                _change(before['p50_ms'], result['p50_ms']),
+                _change(before['p95_ms'], result['p95_ms']),
+                result['queries'] - before['queries'],
+                _change(before['peak_kb'], result['peak_kb'])))
+
+
+def _change(before, after):
+    return (after - before) / before * 100 if before else 0
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Benchmark the latency, queries and memory of every route.')
+    parser.add_argument('--venues', type=int, default=1000)
+    parser.add_argument('--artists', type=int, default=5000)
+    parser.add_argument('--shows', type=int, default=100000)
+    parser.add_argument('--requests', type=int, default=50,
+                        help='Measured requests per route.')
+    parser.add_argument('--warmup', type=int, default=5,
+                        help='Unmeasured requests per route.')
+    parser.add_argument('--cache', action='store_true',
+                        help='Leave the page cache on.')
+    parser.add_argument('--output',
+                        help='Results file; benchmarks/results/routes-<time>.json '
+                             'by default.')
+    parser.add_argument('--no-save', action='store_true',
+                        help="Don't write a results file.")
+    parser.add_argument('--compare', type=argparse.FileType('r'),
+                        help='Earlier results file to compare against.')
+    args = parser.parse_args()
+
+    previous = json.load(args.compare) if args.compare else None
+
+    with bench_database(CACHE_ENABLED=args.cache) as app:
+        seed(args.venues, args.artists, args.shows)
+        client = app.test_client()
+
+        results = {
+            "created": datetime.now().isoformat(timespec='seconds'),
+            "database": db.engine.dialect.name,
+            "rows": {"venues": args.venues, "artists": args.artists,
+                     "shows": args.shows},
+            "requests": args.requests,
+            "cache": args.cache,
+            "routes": {}
+        }
+        for label, method, url, data in routes():
+            results['routes'][label] = measure_route(
+                client, method, url, data, args.requests, args.warmup)
+
+    print_results(results, previous)
+
+    if not args.no_save:
+        output = args.output or os.path.join(RESULTS_DIR, 'routes-%s.json' % (
+            datetime.now().strftime('%Y%m%d-%H%M%S')))
+        os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+        with open(output, 'w') as f:
+            json.dump(results, f, indent=2, sort_keys=True)
+        print('Results saved to %s' % output)
+
+    failed = [label for label, result in results['routes'].items()
+              if result['status'] != 200]
+    if failed:
+        sys.exit('Failed routes: %s' % ', '.join(failed))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,91 @@
+#----------------------------------------------------------------------------#
+# Benchmark for the Show indexes.
+#
+# Seeds a large Show table without its indexes, prints the query plan and
+# timing of the per-venue, per-artist and start_time lookups, then creates
+# the indexes from the Show model and measures again. Run from the project
+# root:
+#
+#   BENCH_DATABASE_URL=postgresql://localhost/fyyur_bench \
+#       python -m benchmarks.show_indexes --shows 1000000
+#----------------------------------------------------------------------------#
+
+import argparse
+import time
+from datetime import datetime, timedelta
+from sqlalchemy import text
+from models import db, Show
+from benchmarks.common import bench_database, seed
+
+# the lookups app.py makes against Show, with their bind parameters
+QUERIES = [
+    ('venue shows',
+     'SELECT * FROM "Show" WHERE venue_id = :id ORDER BY start_time',
+     {"id": 42}),
+    ('artist shows',
+     'SELECT * FROM "Show" WHERE artist_id = :id ORDER BY start_time',
+     {"id": 42}),
+    ('venue upcoming count',
+     'SELECT count(*) FROM "Show" WHERE venue_id = :id AND start_time > :now',
+     {"id": 42}),
+    ('next two weeks',
+     'SELECT * FROM "Show" WHERE start_time BETWEEN :now AND :until '
+     'ORDER BY start_time',
+     {}),
+]
+
+
+# returns the plan lines for statement on the current dialect
+def explain(statement, params):
+    if db.engine.dialect.name == 'postgresql':
+        prefix = 'EXPLAIN ANALYZE '
+    else:
+        prefix = 'EXPLAIN QUERY PLAN '
+    rows = db.session.execute(text(prefix + statement), params).fetchall()
+    return [' '.join(str(col) for col in row) for row in rows]
+
+
+# runs every query `repeat` times, printing its plan and mean latency
+def run_queries(repeat):
+    now = datetime.now()
+    for label, statement, params in QUERIES:
+        params = dict(params, now=now, until=now + timedelta(days=14))
+        start = time.perf_counter()
+        for _ in range(repeat):
+            db.session.execute(text(statement), params).fetchall()
+        elapsed = (time.perf_counter() - start) / repeat
+
+        print('%-24s %10.3f ms' % (label, elapsed * 1000))
+        for line in explain(statement, params):
+            print('    ' + line)
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Benchmark the Show table indexes.')
+    parser.add_argument('--venues', type=int, default=10000)
+    parser.add_argument('--artists', type=int, default=10000)
+    parser.add_argument('--shows', type=int, default=1000000)
+    parser.add_argument('--repeat', type=int, default=20)
+    args = parser.parse_args()
+
+    with bench_database():
+        # start from a bare Show table
+        for index in Show.__table__.indexes:
+            index.drop(db.engine)
+        seed(args.venues, args.artists, args.shows)
+
+        print('== without indexes')
+        run_queries(args.repeat)
+
+        for index in Show.__table__.indexes:
+            index.create(db.engine)
+        db.session.execute(text('ANALYZE'))
+        db.session.commit()
+
+        print('== with indexes')
+        run_queries(args.repeat)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,74 @@
+#----------------------------------------------------------------------------#
+# Benchmark for the /venues listing data.
+#
+# Compares the original per-venue loop with the single aggregated query in
+# queries.venue_areas(). Run from the project root:
+#
+#   BENCH_DATABASE_URL=postgresql://localhost/fyyur_bench \
+#       python -m benchmarks.venues_listing --venues 10000 --shows 500000
+#----------------------------------------------------------------------------#
+
+import argparse
+from datetime import datetime
+from models import Venue, Show
+from queries import venue_areas
+from benchmarks.common import bench_database, seed, measure, report
+
+
+# the /venues data as it was built before queries.venue_areas()
+def legacy_venue_areas():
+    data = []
+
+    venues = Venue.query.all()
+    venue_cities = set()
+    for venue in venues:
+        venue_cities.add((venue.city, venue.state))
+
+    for location in venue_cities:
+        data.append({
+            "city": location[0],
+            "state": location[1],
+            "venues": []
+        })
+
+    for venue in venues:
+        num_upcoming_shows = 0
+
+        shows = Show.query.filter_by(venue_id=venue.id).all()
+
+        for show in shows:
+            if show.start_time > datetime.now():
+                num_upcoming_shows += 1
+
+        for entry in data:
+            if venue.city == entry['city'] and venue.state == entry['state']:
+                entry['venues'].append({
+                    "id": venue.id,
+                    "name": venue.name,
+                    "num_upcoming_shows": num_upcoming_shows
+                })
+
+    return data
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Benchmark the /venues listing data.')
+    parser.add_argument('--venues', type=int, default=10000)
+    parser.add_argument('--artists', type=int, default=5000)
+    parser.add_argument('--shows', type=int, default=500000)
+    parser.add_argument('--skip-legacy', action='store_true',
+                        help='only measure the aggregated query')
+    args = parser.parse_args()
+
+    with bench_database():
+        seed(args.venues, args.artists, args.shows)
+        print('%d venues, %d shows' % (args.venues, args.shows))
+
+        if not args.skip_legacy:
+            report('legacy per-venue loop', *measure(legacy_venue_areas))
+        report('aggregated venue_areas()', *measure(venue_areas))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,260 @@
+#----------------------------------------------------------------------------#
+# Imports
+#----------------------------------------------------------------------------#
+
+import json
+import threading
+import time
+from collections import OrderedDict
+from functools import wraps
+from flask import current_app, request, session, g, make_response
+from compression import compressed_variants, use_variant
+
+#----------------------------------------------------------------------------#
+# Page cache.
+#
+# Rendered GET responses are cached by path and query string and tagged with
+# the entities they show, e.g. `venue:12`, `artist:7`, or `venues` for the
+# venue listing. Write handlers invalidate exactly the tags they touch. The
+# in-process backend is per worker; use the redis backend to share entries
+# and invalidations between workers.
+#
+# A worker doesn't see the invalidations of other workers' in-process
+# caches, so views under conditional() are also keyed by the version of
+# the page: once the data changes, the version query gives a new key, and
+# the entry for the old version is never read again.
+#----------------------------------------------------------------------------#
+
+# defaults for the cache config keys
+DEFAULT_BACKEND = 'memory'
+DEFAULT_MAX_ENTRIES = 1000
+DEFAULT_TTL = 300
+
+# in-process LRU cache with per-entry expiry and tag index
+
+
+class MemoryBackend:
+
+    def __init__(self, max_entries=DEFAULT_MAX_ENTRIES):
+        self.max_entries = max_entries
+        self.lock = threading.Lock()
+        # key -> (expires, value, tags), least recently used first
+        self.entries = OrderedDict()
+        # tag -> set of keys
+        self.tags = {}
+        self.counters = {"hits": 0, "misses": 0,
+                         "evictions": 0, "expirations": 0,
+                         "invalidations": 0}
+
+    def get(self, key):
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is not None and entry[0] <= time.monotonic():
+                self._remove(key)
+                self.counters['expirations'] += 1
+                entry = None
+            if entry is None:
+                self.counters['misses'] += 1
+                return None
+            self.entries.move_to_end(key)
+            self.counters['hits'] += 1
+            return entry[1]
+
+    def set(self, key, value, ttl, tags):
+        with self.lock:
+            self._remove(key)
+            self.entries[key] = (time.monotonic() + ttl, value, tags)
+            for tag in tags:
+                self.tags.setdefault(tag, set()).add(key)
+            while len(self.entries) > self.max_entries:
+                self._remove(next(iter(self.entries)))
+                self.counters['evictions'] += 1
+
+    def invalidate(self, tags):
+        with self.lock:
+            for tag in tags:
+                for key in self.tags.pop(tag, ()):
+                    if self._remove(key):
+                        self.counters['invalidations'] += 1
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+            self.tags.clear()
+
+    def stats(self):
+        with self.lock:
+            return dict(self.counters, entries=len(self.entries),
+                        max_entries=self.max_entries)
+
+    # drops key from the entries and its tags, returning whether it existed
+    def _remove(self, key):
+        entry = self.entries.pop(key, None)
+        if entry is None:
+            return False
+        for tag in entry[2]:
+            keys = self.tags.get(tag)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self.tags[tag]
+        return True
+
+
+# cache on a local redis server, shared by every worker. redis handles
+# expiry and LRU eviction (set maxmemory-policy to allkeys-lru); tags are
+# kept as sets of keys
+
+
+class RedisBackend:
+
+    prefix = 'fyyur:page:'
+
+    def __init__(self, url):
+        # optional dependency, only needed for this backend
+        import redis
+        self.client = redis.Redis.from_url(url)
+        self.lock = threading.Lock()
+        self.counters = {"hits": 0, "misses": 0, "invalidations": 0}
+
+    def _count(self, name, n=1):
+        with self.lock:
+            self.counters[name] += n
+
+    def get(self, key):
+        data = self.client.hgetall(self.prefix + key)
+        if not data:
+            self._count('misses')
+            return None
+        self._count('hits')
+        value = json.loads(data[b'meta'])
+        value['body'] = data[b'body']
+        # compressed variants are stored as body.<encoding>
+        value['encodings'] = {
+            field.decode()[len('body.'):]: body for field, body in data.items()
+            if field.startswith(b'body.')}
+        return value
+
+    def set(self, key, value, ttl, tags):
+        meta = dict(value)
+        fields = {"body": meta.pop('body')}
+        for encoding, body in meta.pop('encodings', {}).items():
+            fields['body.' + encoding] = body
+        fields['meta'] = json.dumps(meta)
+        pipe = self.client.pipeline()
+        pipe.delete(self.prefix + key)
+        pipe.hset(self.prefix + key, mapping=fields)
+        pipe.expire(self.prefix + key, ttl)
+        for tag in tags:
+            pipe.sadd(self.prefix + 'tag:' + tag, key)
+            pipe.expire(self.prefix + 'tag:' + tag, ttl)
+        pipe.execute()
+
+    def invalidate(self, tags):
+        for tag in tags:
+            keys = self.client.smembers(self.prefix + 'tag:' + tag)
+            pipe = self.client.pipeline()
+            for key in keys:
+                pipe.delete(self.prefix + key.decode())
+            pipe.delete(self.prefix + 'tag:' + tag)
+            deleted = pipe.execute()
+            self._count('invalidations', sum(deleted[:-1]))
+
+    def clear(self):
+        keys = list(self.client.scan_iter(self.prefix + '*'))
+        if keys:
+            self.client.delete(*keys)
+
+    def stats(self):
+        with self.lock:
+            stats = dict(self.counters)
+        info = self.client.info('stats')
+        stats['evictions'] = info.get('evicted_keys', 0)
+        stats['expirations'] = info.get('expired_keys', 0)
+        return stats
+
+
+# builds the backend named by CACHE_BACKEND
+def _create_backend(config):
+    name = config.get('CACHE_BACKEND', DEFAULT_BACKEND)
+    if name == 'memory':
+        return MemoryBackend(
+            config.get('CACHE_MAX_ENTRIES', DEFAULT_MAX_ENTRIES))
+    if name == 'redis':
+        return RedisBackend(
+            config.get('CACHE_REDIS_URL', 'redis://localhost:6379/0'))
+    raise ValueError('Unknown CACHE_BACKEND %r' % name)
+
+
+# gives app its cache backend
+def init_app(app):
+    app.extensions['page_cache'] = _create_backend(app.config)
+
+
+def _backend():
+    return current_app.extensions['page_cache']
+
+#----------------------------------------------------------------------------#
+# Views.
+#----------------------------------------------------------------------------#
+
+# tags the page being rendered with the entities it shows
+
+
+def add_cache_tags(*tags):
+    if 'cache_tags' in g:
+        g.cache_tags.update(tags)
+
+
+# drops every cached page carrying any of the tags
+def invalidate(*tags):
+    _backend().invalidate(tags)
+
+
+# returns the hit/miss/eviction counters of the backend
+def cache_stats():
+    return _backend().stats()
+
+
+# caches the successful responses of a GET view under its path and query
+# string. the view tags its page with add_cache_tags(). pages are not
+# served from or stored in the cache while flashed messages are pending,
+# since those render into the layout
+
+
+def cached_page(view):
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        if not current_app.config.get('CACHE_ENABLED', True) or '_flashes' in session:
+            return view(*args, **kwargs)
+
+        g.cache_tags = set()
+        backend = _backend()
+        key = request.full_path
+        if 'page_version' in g:
+            key = '%s#%s' % (key, g.page_version)
+        value = backend.get(key)
+        if value is not None:
+            response = make_response(value['body'], value['status'])
+            response.headers['Content-Type'] = value['content_type']
+            response.headers['X-Cache'] = 'HIT'
+            if value.get('encodings'):
+                use_variant(response, value['encodings'])
+            return response
+
+        response = make_response(view(*args, **kwargs))
+        if response.status_code == 200 and not response.direct_passthrough:
+            # compressed once here rather than on every hit
+            encodings = compressed_variants(response.get_data(), response.mimetype)
+            backend.set(key, {
+                "status": response.status_code,
+                "content_type": response.headers['Content-Type'],
+                "body": response.get_data(),
+                "encodings": encodings
+            }, current_app.config.get('CACHE_DEFAULT_TTL', DEFAULT_TTL),
+                sorted(g.cache_tags))
+            if encodings:
+                use_variant(response, encodings)
+        response.headers['X-Cache'] = 'MISS'
+        return response
+    return wrapper
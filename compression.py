@@ -0,0 +1,137 @@
+#----------------------------------------------------------------------------#
+# Imports
+#----------------------------------------------------------------------------#
+
+import gzip
+from flask import current_app, request
+
+#----------------------------------------------------------------------------#
+# Response compression.
+#
+# Responses are compressed with brotli (when the brotli package is
+# installed) or gzip, whichever the client accepts, preferring brotli.
+# Bodies under COMPRESS_MIN_SIZE bytes, types outside COMPRESS_MIMETYPES
+# (images are compressed already), streamed and file responses, and
+# responses that already carry an encoding go out as they are. Pages in
+# the page cache are stored with their compressed variants, so a cache hit
+# sends the stored variant without compressing again (see cache.py).
+#
+# A compressed response gets a weak ETag, since its bytes differ from the
+# uncompressed one; conditional GETs compare ETags weakly.
+#----------------------------------------------------------------------------#
+
+# defaults for the COMPRESS_* config keys
+DEFAULT_MIN_SIZE = 500
+DEFAULT_GZIP_LEVEL = 6
+DEFAULT_BROTLI_QUALITY = 5
+DEFAULT_MIMETYPES = (
+    'text/html',
+    'text/css',
+    'text/plain',
+    'text/csv',
+    'text/javascript',
+    'application/javascript',
+    'application/json',
+    'application/x-ndjson',
+    'image/svg+xml',
+)
+
+
+def _brotli():
+    # optional dependency; without it responses are gzipped
+    try:
+        import brotli
+    except ImportError:
+        return None
+    return brotli
+
+
+# the encodings this process can produce, best first
+def available_encodings():
+    return ('br', 'gzip') if _brotli() is not None else ('gzip',)
+
+
+# body compressed with encoding, at the configured level
+def compress(body, encoding):
+    config = current_app.config
+    if encoding == 'br':
+        return _brotli().compress(body, quality=config.get(
+            'COMPRESS_BROTLI_QUALITY', DEFAULT_BROTLI_QUALITY))
+    return gzip.compress(body, compresslevel=config.get(
+        'COMPRESS_GZIP_LEVEL', DEFAULT_GZIP_LEVEL), mtime=0)
+
+
+# whether a body of this type and size is worth compressing
+def compressible(mimetype, size):
+    config = current_app.config
+    return (mimetype in config.get('COMPRESS_MIMETYPES', DEFAULT_MIMETYPES) and
+            size >= config.get('COMPRESS_MIN_SIZE', DEFAULT_MIN_SIZE))
+
+
+def _enabled():
+    return current_app.config.get('COMPRESS_ENABLED', True)
+
+
+# {encoding: compressed body} of a body, empty if it isn't worth it
+def compressed_variants(body, mimetype):
+    if not _enabled() or not compressible(mimetype, len(body)):
+        return {}
+    return {encoding: compress(body, encoding)
+            for encoding in available_encodings()}
+
+
+# the best of encodings the current request accepts, or None
+def negotiate(encodings):
+    accepted = request.accept_encodings
+    best = None
+    for encoding in encodings:
+        quality = accepted[encoding]
+        if quality and (best is None or quality > accepted[best]):
+            best = encoding
+    return best
+
+
+# sends the variant of the response the client accepts, from variants
+# computed for it earlier
+def use_variant(response, variants):
+    response.vary.add('Accept-Encoding')
+    encoding = negotiate(variants)
+    if encoding is not None:
+        response.set_data(variants[encoding])
+        response.content_encoding = encoding
+    return response
+
+
+def _compress_response(response):
+    if (not _enabled() or response.direct_passthrough or
+            response.is_streamed or response.status_code < 200 or
+            response.status_code in (204, 206, 304) or
+            request.method == 'HEAD'):
+        return response
+
+    if response.content_encoding in ('br', 'gzip'):
+        # a variant from the page cache
+        _weaken_etag(response)
+        return response
+    if response.content_encoding or not compressible(
+            response.mimetype, response.calculate_content_length() or 0):
+        return response
+
+    response.vary.add('Accept-Encoding')
+    encoding = negotiate(available_encodings())
+    if encoding is not None:
+        response.set_data(compress(response.get_data(), encoding))
+        response.content_encoding = encoding
+        _weaken_etag(response)
+    return response
+
+
+def _weaken_etag(response):
+    etag, weak = response.get_etag()
+    if etag is not None and not weak:
+        response.set_etag(etag, weak=True)
+
+
+# compresses the responses of app
+def init_app(app):
+    app.after_request(_compress_response)
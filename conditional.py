@@ -0,0 +1,73 @@
+#----------------------------------------------------------------------------#
+# Imports
+#----------------------------------------------------------------------------#
+
+import hashlib
+from datetime import timezone
+from functools import wraps
+from flask import request, session, g, make_response
+
+#----------------------------------------------------------------------------#
+# Conditional GET.
+#
+# Views wrapped with conditional() first run a cheap version query for the
+# page. Requests whose If-None-Match or If-Modified-Since still match get a
+# 304 without loading or rendering anything; every other response carries
+# the ETag and Last-Modified to revalidate with next time. The page cache
+# keys the pages it stores by the same version (see cache.py), so a worker
+# never answers with a body older than the ETag it sends.
+#----------------------------------------------------------------------------#
+
+# builds a strong ETag from the version parts of a page
+
+
+def make_etag(parts):
+    return hashlib.sha1(repr(parts).encode('utf-8')).hexdigest()
+
+
+# returns whether the request's validators still match the page version
+def _not_modified(etag, last_modified):
+    # weak comparison, as compressed responses carry a weak ETag
+    if request.if_none_match:
+        return request.if_none_match.contains_weak(etag)
+    if request.if_modified_since and last_modified is not None:
+        since = request.if_modified_since
+        if since.tzinfo is None:
+            since = since.replace(tzinfo=timezone.utc)
+        return last_modified.replace(microsecond=0) <= since
+    return False
+
+
+# answers revalidations for a GET view. version is called with the view's
+# arguments and returns (parts, last_modified), or None to always run the
+# view (e.g. for unknown ids)
+
+
+def conditional(version):
+    def decorator(view):
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            # pending flashed messages render into the page
+            if '_flashes' in session:
+                return view(*args, **kwargs)
+
+            result = version(**kwargs)
+            if result is None:
+                return view(*args, **kwargs)
+            parts, last_modified = result
+            etag = make_etag(parts)
+
+            if _not_modified(etag, last_modified):
+                response = make_response('', 304)
+            else:
+                g.page_version = etag
+                response = make_response(view(*args, **kwargs))
+
+            response.set_etag(etag)
+            if last_modified is not None:
+                response.last_modified = last_modified
+            # browsers and the CDN must revalidate before reusing the page
+            response.cache_control.no_cache = True
+            return response
+        return wrapper
+    return decorator
@@ -1,13 +1,135 @@
 import os
-SECRET_KEY = os.urandom(32)
 # Grabs the folder where the script runs.
 basedir = os.path.abspath(os.path.dirname(__file__))
 
-# Enable debug mode.
-DEBUG = True
 
-# Connect to the database
+# SQLAlchemy only accepts the postgresql:// scheme, which Heroku doesn't use
+def normalize_url(url):
+    if url.startswith('postgres://'):
+        url = 'postgresql://' + url[len('postgres://'):]
+    return url
 
 
-# TODO IMPLEMENT DATABASE URL
-SQLALCHEMY_DATABASE_URI = 'postgres://alex@localhost:5432/fyyur'
+# reads a database URL from the environment
+def database_url(name, default):
+    return normalize_url(os.environ.get(name, default))
+
+
+# Settings shared by every environment. create_app() picks one of the
+# classes below by name, from FYYUR_ENV (or FLASK_ENV) by default.
+class Config:
+    # Signs sessions and flashed messages, so every worker and restart must
+    # share it; production refuses to start without one.
+    SECRET_KEY = os.environ.get('SECRET_KEY')
+
+    DEBUG = False
+    TESTING = False
+
+    # Connect to the database. DATABASE_URL selects another one, e.g.
+    # sqlite:///fyyur.db for a file or sqlite:// for an in-memory database
+    SQLALCHEMY_DATABASE_URI = database_url(
+        'DATABASE_URL', 'postgresql://alex@localhost:5432/fyyur')
+    SQLALCHEMY_TRACK_MODIFICATIONS = False
+
+    # Connection pool of each worker process (Postgres). Every worker can
+    # hold DB_POOL_SIZE + DB_MAX_OVERFLOW connections, which must fit in
+    # max_connections. DB_POOL_TIMEOUT is how many seconds a request waits
+    # for a connection, and DB_POOL_RECYCLE is how many seconds a connection
+    # lives; DB_POOL_PRE_PING tests connections before handing them out.
+    DB_POOL_SIZE = int(os.environ.get('DB_POOL_SIZE', 5))
+    DB_MAX_OVERFLOW = int(os.environ.get('DB_MAX_OVERFLOW', 10))
+    DB_POOL_TIMEOUT = int(os.environ.get('DB_POOL_TIMEOUT', 10))
+    DB_POOL_RECYCLE = int(os.environ.get('DB_POOL_RECYCLE', 1800))
+    DB_POOL_PRE_PING = True
+
+    # Statement timeouts in milliseconds (Postgres): the default for every
+    # statement (None for no limit), and the limit for search requests
+    DB_STATEMENT_TIMEOUT = int(os.environ.get('DB_STATEMENT_TIMEOUT', 0)) or None
+    SEARCH_STATEMENT_TIMEOUT = int(os.environ.get('SEARCH_STATEMENT_TIMEOUT', 2000))
+
+    # Read replicas, e.g. DATABASE_REPLICA_URLS="postgresql://replica1/fyyur
+    # postgresql://replica2/fyyur". Read-only requests use a healthy replica,
+    # checked every DB_REPLICA_CHECK_INTERVAL seconds and skipped while it
+    # lags more than DB_REPLICA_MAX_LAG seconds. After writing, a client
+    # reads from the primary for DB_READ_YOUR_WRITES seconds.
+    DB_REPLICA_URIS = [normalize_url(url) for url in
+                       os.environ.get('DATABASE_REPLICA_URLS', '').split()]
+    DB_REPLICA_CHECK_INTERVAL = 10
+    DB_REPLICA_MAX_LAG = 5
+    DB_READ_YOUR_WRITES = 5
+
+    # Number of results per page on the venue and artist search pages
+    SEARCH_RESULTS_PER_PAGE = 20
+
+    # Rendered page cache: 'memory' (per worker) or 'redis' (shared)
+    CACHE_ENABLED = True
+    CACHE_BACKEND = 'memory'
+    CACHE_MAX_ENTRIES = 1000
+    CACHE_DEFAULT_TTL = 300
+    CACHE_REDIS_URL = os.environ.get('REDIS_URL', 'redis://localhost:6379/0')
+
+    # Response compression (see compression.py): bodies of at least
+    # COMPRESS_MIN_SIZE bytes are sent as brotli or gzip
+    COMPRESS_ENABLED = True
+    COMPRESS_MIN_SIZE = 500
+    COMPRESS_GZIP_LEVEL = 6
+    COMPRESS_BROTLI_QUALITY = 5
+
+    # Resized copies of venue, artist and static images (see images.py):
+    # where sources and copies are cached, the widths offered to browsers,
+    # and how long to wait for a source and how big it may be
+    IMAGE_CACHE_DIR = os.environ.get(
+        'IMAGE_CACHE_DIR', os.path.join(basedir, 'image_cache'))
+    IMAGE_WIDTHS = (160, 320, 640, 1280)
+    IMAGE_QUALITY = 80
+    IMAGE_FETCH_TIMEOUT = 5
+    IMAGE_MAX_BYTES = 10 * 1024 * 1024
+    IMAGE_RETRY_AFTER = 300
+    # Hosts image_links may be fetched from (and their subdomains), e.g.
+    # IMAGE_ALLOWED_HOSTS="images.unsplash.com cdn.example.com"; by default
+    # any host with only public addresses
+    IMAGE_ALLOWED_HOSTS = os.environ.get('IMAGE_ALLOWED_HOSTS', '').split() or None
+
+    # Compile every template when the app starts (in the gunicorn master
+    # before forking), and keep compiled templates on disk between
+    # restarts; None turns the bytecode cache off
+    TEMPLATE_WARMUP = True
+    JINJA_BYTECODE_CACHE_DIR = os.environ.get(
+        'JINJA_BYTECODE_CACHE_DIR', os.path.join(basedir, '.jinja_cache'))
+
+    # Serve cache, pool and startup stats under /stats/ for monitoring.
+    # They expose replica URLs and errors, so only turn this on where
+    # /stats/ is unreachable from the internet
+    STATS_ENABLED = os.environ.get('STATS_ENABLED', '') == '1'
+
+    # Per-request SQL counts and timings (Server-Timing header); a request
+    # running one statement more than SQL_REPEAT_THRESHOLD times is logged
+    SQL_INSTRUMENTATION = True
+    SQL_REPEAT_THRESHOLD = 10
+
+
+class DevelopmentConfig(Config):
+    # Enable debug mode.
+    DEBUG = True
+    SECRET_KEY = os.environ.get('SECRET_KEY', 'development-key')
+    STATS_ENABLED = True
+
+
+class TestingConfig(Config):
+    TESTING = True
+    SECRET_KEY = 'testing-key'
+    WTF_CSRF_ENABLED = False
+    # in memory by default, so test runs need no database server
+    SQLALCHEMY_DATABASE_URI = database_url('TEST_DATABASE_URL', 'sqlite://')
+
+
+# SECRET_KEY and DATABASE_URL come from the environment
+class ProductionConfig(Config):
+    pass
+
+
+configs = {
+    "development": DevelopmentConfig,
+    "testing": TestingConfig,
+    "production": ProductionConfig,
+}
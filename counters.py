@@ -0,0 +1,79 @@
+#----------------------------------------------------------------------------#
+# Imports
+#----------------------------------------------------------------------------#
+
+from datetime import datetime
+from sqlalchemy import event, func, or_, select
+from models import db, Venue, Artist, Show
+
+#----------------------------------------------------------------------------#
+# Show counters.
+#
+# Venue and Artist carry upcoming_shows_count and past_shows_count so pages
+# can read them as plain columns. Inserting or deleting a Show through the
+# ORM adjusts the counters of its venue and artist in the same transaction.
+# Each show records which counter it is in (Show.counted_upcoming), so
+# deleting a show that has started since it was counted takes it out of
+# the counter it was added to. Shows that start roll from upcoming to past
+# without any write, and bulk inserts skip ORM events, so
+# reconcile_show_counts() recomputes everything and is run periodically by
+# `flask reconcile-counts`.
+#----------------------------------------------------------------------------#
+
+# marks a new show as upcoming or past, as of now
+
+
+@event.listens_for(Show, 'before_insert')
+def _mark_show(mapper, connection, show):
+    show.counted_upcoming = show.start_time > datetime.now()
+
+
+# adds delta to the counter the show is in on its venue and artist
+def _adjust(connection, show, delta):
+    name = 'upcoming_shows_count' if show.counted_upcoming else 'past_shows_count'
+    for model, entity_id in ((Venue, show.venue_id), (Artist, show.artist_id)):
+        table = model.__table__
+        connection.execute(table.update().where(table.c.id == entity_id).values(
+            {name: table.c[name] + delta}))
+
+
+@event.listens_for(Show, 'after_insert')
+def _count_show(mapper, connection, show):
+    _adjust(connection, show, 1)
+
+
+@event.listens_for(Show, 'after_delete')
+def _uncount_show(mapper, connection, show):
+    _adjust(connection, show, -1)
+
+
+# recomputes both counters for every venue and artist as of now, and
+# which of them each show is in
+def reconcile_show_counts(now=None):
+    if now is None:
+        now = datetime.now()
+
+    # shows that have started move to the past counters. updated_at stays
+    # put, as the pages' versions already change when a show starts
+    db.session.query(Show).filter(
+        Show.counted_upcoming != (Show.start_time > now)
+    ).update({
+        Show.counted_upcoming: Show.start_time > now,
+        Show.updated_at: Show.updated_at
+    }, synchronize_session=False)
+
+    for model, fk in ((Venue, Show.venue_id), (Artist, Show.artist_id)):
+        upcoming = select(func.count(Show.id)).where(
+            fk == model.id, Show.start_time > now).scalar_subquery()
+        past = select(func.count(Show.id)).where(
+            fk == model.id, Show.start_time <= now).scalar_subquery()
+        # only touch rows whose counts changed, so updated_at stays put
+        db.session.query(model).filter(or_(
+            model.upcoming_shows_count != upcoming,
+            model.past_shows_count != past
+        )).update({
+            model.upcoming_shows_count: upcoming,
+            model.past_shows_count: past
+        }, synchronize_session=False)
+
+    db.session.commit()
@@ -0,0 +1,125 @@
+#----------------------------------------------------------------------------#
+# Imports
+#----------------------------------------------------------------------------#
+
+import threading
+import time
+from functools import wraps
+from flask import current_app, abort
+from sqlalchemy import exc, text
+from sqlalchemy.pool import QueuePool
+from models import db
+
+#----------------------------------------------------------------------------#
+# Connection pool.
+#
+# Engine settings come from the DB_* config keys: pool size, overflow,
+# checkout timeout, recycle age, pre-ping and a default statement timeout.
+# Views can set their own statement timeout with @statement_timeout. The
+# pool times every checkout, so pool_stats() can report how long requests
+# waited for a connection next to how many are checked out. Stats are per
+# worker process.
+#----------------------------------------------------------------------------#
+
+# SQLSTATE of a statement cancelled by statement_timeout
+QUERY_CANCELED = '57014'
+
+
+# QueuePool that counts checkouts and the time spent waiting for them
+class TimedQueuePool(QueuePool):
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.lock = threading.Lock()
+        self.counters = {"checkouts": 0, "timeouts": 0,
+                         "wait_seconds": 0.0, "max_wait_seconds": 0.0}
+
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            connection = super()._do_get()
+        except exc.TimeoutError:
+            with self.lock:
+                self.counters['timeouts'] += 1
+            raise
+        waited = time.perf_counter() - start
+        with self.lock:
+            self.counters['checkouts'] += 1
+            self.counters['wait_seconds'] += waited
+            self.counters['max_wait_seconds'] = max(
+                self.counters['max_wait_seconds'], waited)
+        return connection
+
+    def stats(self):
+        with self.lock:
+            stats = dict(self.counters)
+        stats.update({
+            "size": self.size(),
+            "checked_in": self.checkedin(),
+            "checked_out": self.checkedout(),
+            # negative until every pooled connection has been opened
+            "overflow": max(self.overflow(), 0),
+            "max_overflow": self._max_overflow
+        })
+        return stats
+
+
+# builds SQLALCHEMY_ENGINE_OPTIONS from the DB_* config keys. SQLite keeps
+# the pools Flask-SQLAlchemy picks for it
+
+
+def engine_options(config):
+    uri = config['SQLALCHEMY_DATABASE_URI']
+    if uri.startswith('sqlite'):
+        return {}
+
+    options = {
+        "poolclass": TimedQueuePool,
+        "pool_size": config.get('DB_POOL_SIZE', 5),
+        "max_overflow": config.get('DB_MAX_OVERFLOW', 10),
+        "pool_timeout": config.get('DB_POOL_TIMEOUT', 30),
+        "pool_recycle": config.get('DB_POOL_RECYCLE', -1),
+        "pool_pre_ping": config.get('DB_POOL_PRE_PING', False)
+    }
+    timeout = config.get('DB_STATEMENT_TIMEOUT')
+    if timeout and uri.startswith('postgresql'):
+        options['connect_args'] = {
+            "options": '-c statement_timeout=%d' % timeout}
+    return options
+
+
+# returns the pool counters of the current app's engine
+def pool_stats():
+    pool = db.engine.pool
+    if isinstance(pool, TimedQueuePool):
+        return pool.stats()
+    return {"status": pool.status()}
+
+#----------------------------------------------------------------------------#
+# Statement timeouts.
+#----------------------------------------------------------------------------#
+
+# limits the statements of a view to the milliseconds in config key, on
+# Postgres. SET LOCAL lasts until the request's transaction ends. a view
+# that runs out of time answers 503
+
+
+def statement_timeout(key):
+    def decorator(view):
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            timeout = current_app.config.get(key)
+            if timeout and db.engine.dialect.name == 'postgresql':
+                db.session.execute(text(
+                    'SET LOCAL statement_timeout = %d' % timeout))
+            try:
+                return view(*args, **kwargs)
+            except exc.OperationalError as e:
+                if getattr(e.orig, 'pgcode', None) != QUERY_CANCELED:
+                    raise
+                db.session.rollback()
+                current_app.logger.warning(
+                    '%s cancelled after %d ms', view.__name__, timeout)
+                abort(503)
+        return wrapper
+    return decorator
@@ -0,0 +1,102 @@
+#----------------------------------------------------------------------------#
+# Imports
+#----------------------------------------------------------------------------#
+
+import csv
+import io
+from datetime import datetime
+from models import db, Venue, Artist, Show
+from serialization import dumps
+
+#----------------------------------------------------------------------------#
+# Streaming export.
+#
+# Rows are read through a server-side cursor in chunks of CHUNK_SIZE and
+# written out chunk by chunk, so memory stays flat and the first bytes are
+# sent as soon as the first chunk arrives, however many rows there are.
+# Shows carry their artist and venue names, joined in the same statement.
+#----------------------------------------------------------------------------#
+
+# rows fetched from the cursor and written out at a time
+CHUNK_SIZE = 1000
+
+FORMATS = {
+    "ndjson": 'application/x-ndjson',
+    "csv": 'text/csv',
+}
+
+
+# returns the columns exported for kind
+def export_columns(kind):
+    if kind == 'venues':
+        return list(Venue.__table__.columns)
+    if kind == 'artists':
+        return list(Artist.__table__.columns)
+    if kind == 'shows':
+        return [
+            Show.id,
+            Show.start_time,
+            Show.artist_id,
+            Artist.name.label('artist_name'),
+            Show.venue_id,
+            Venue.name.label('venue_name'),
+            Show.updated_at
+        ]
+    raise ValueError('Unknown export %r' % kind)
+
+
+# yields the rows of kind, ordered by id, from a server-side cursor
+def export_rows(kind):
+    query = db.session.query(*export_columns(kind))
+    if kind == 'shows':
+        query = query.join(Artist, Artist.id == Show.artist_id).join(
+            Venue, Venue.id == Show.venue_id).order_by(Show.id)
+    else:
+        query = query.order_by('id')
+    return query.execution_options(stream_results=True).yield_per(CHUNK_SIZE)
+
+
+def _ndjson_chunks(rows, names):
+    chunk = []
+    for row in rows:
+        chunk.append(dumps(dict(zip(names, row))))
+        if len(chunk) >= CHUNK_SIZE:
+            yield b'\n'.join(chunk) + b'\n'
+            chunk = []
+    if chunk:
+        yield b'\n'.join(chunk) + b'\n'
+
+
+def _csv_value(value):
+    if isinstance(value, datetime):
+        return value.isoformat()
+    if isinstance(value, (list, tuple)):
+        return ';'.join(value)
+    return value
+
+
+# genres are joined with semicolons, as `flask import` reads them
+def _csv_chunks(rows, names):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(names)
+    count = 0
+    for row in rows:
+        writer.writerow([_csv_value(value) for value in row])
+        count += 1
+        if count % CHUNK_SIZE == 0:
+            yield buffer.getvalue().encode('utf-8')
+            buffer.seek(0)
+            buffer.truncate()
+    yield buffer.getvalue().encode('utf-8')
+
+
+# yields the export of kind in format ('ndjson' or 'csv') as byte chunks
+def export_chunks(kind, format):
+    names = [column.key for column in export_columns(kind)]
+    rows = export_rows(kind)
+    if format == 'ndjson':
+        return _ndjson_chunks(rows, names)
+    if format == 'csv':
+        return _csv_chunks(rows, names)
+    raise ValueError('Unknown format %r' % format)
@@ -5,11 +5,22 @@ from fabric.contrib.console import confirm
 
 
 def test():
+    with settings(warn_only=True):
+        result = local("python -m pytest", capture=True)
+    if result.failed and not confirm("Tests failed. Continue?"):
+        abort("Aborted at user request.")
+
+
+# request every route once on a small seeded database
+
+
+def smoke():
     with settings(warn_only=True):
         result = local(
-            "python test_tasks.py -v && python test_users.py -v", capture=True
+            "python -m benchmarks.routes --shows 10000 --requests 5 --no-save",
+            capture=True
         )
-    if result.failed and not confirm("Tests failed. Continue?"):
+    if result.failed and not confirm("Smoke run failed. Continue?"):
         abort("Aborted at user request.")
 
 
@@ -22,8 +33,16 @@ def push():
     local("git push origin master")
 
 
+# benchmark every route, saving the results to diff against later runs
+
+
+def bench():
+    local("python -m benchmarks.routes")
+
+
 def prepare():
     test()
+    smoke()
     commit()
     push()
 
@@ -47,6 +66,7 @@ def heroku_test():
 def deploy():
     pull()
     test()
+    smoke()
     commit()
     heroku()
     heroku_test()
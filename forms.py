@@ -1,9 +1,20 @@
 from datetime import datetime
+import phonenumbers
 from flask_wtf import Form
 from wtforms import StringField, SelectField, SelectMultipleField, DateTimeField
+from wtforms import ValidationError
 from wtforms.validators import DataRequired, AnyOf, URL
 
 
+# validates user phone numbers
+
+
+def phone_validator(num):
+    parsed = phonenumbers.parse(num, "US")
+    if not phonenumbers.is_valid_number(parsed):
+        raise ValidationError('Must be a valid US phone number.')
+
+
 class ShowForm(Form):
     artist_id = StringField(
         'artist_id'
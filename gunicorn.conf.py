@@ -0,0 +1,39 @@
+#----------------------------------------------------------------------------#
+# Gunicorn settings for wsgi:app.
+#
+# Each worker process serves requests on a few threads, which keeps a core
+# busy while other requests wait on the database. The app is loaded once in
+# the master before forking, so workers start fast and share its memory,
+# including the templates compiled at startup (see warmup.py).
+# WEB_CONCURRENCY and GUNICORN_THREADS override the defaults.
+#----------------------------------------------------------------------------#
+
+import multiprocessing
+import os
+
+bind = '0.0.0.0:%s' % os.environ.get('PORT', '8000')
+
+workers = int(os.environ.get('WEB_CONCURRENCY', multiprocessing.cpu_count() * 2 + 1))
+worker_class = 'gthread'
+# keep at or below DB_POOL_SIZE + DB_MAX_OVERFLOW (see config.py)
+threads = int(os.environ.get('GUNICORN_THREADS', 4))
+preload_app = True
+
+timeout = 30
+keepalive = 5
+# recycle workers now and then, so slow leaks can't accumulate
+max_requests = 1000
+max_requests_jitter = 100
+
+accesslog = '-'
+
+
+# database connections opened by the master must not be shared with the
+# workers. close=False leaves the master's connections to the master
+def post_fork(server, worker):
+    from models import db
+    from wsgi import app
+    with app.app_context():
+        db.engine.dispose(close=False)
+    for replica in app.extensions['replicas'].replicas:
+        replica.engine.dispose(close=False)
@@ -0,0 +1,360 @@
+#----------------------------------------------------------------------------#
+# Imports
+#----------------------------------------------------------------------------#
+
+import hashlib
+import hmac
+import http.client
+import ipaddress
+import os
+import socket
+import threading
+import time
+from urllib.parse import urljoin, urlsplit
+from flask import current_app, request, redirect, send_file, abort, url_for
+from werkzeug.security import safe_join
+from PIL import Image, ImageOps
+
+#----------------------------------------------------------------------------#
+# Responsive images.
+#
+# Venue and artist image_links, and images under /static/, are shown
+# through /images/: each source is fetched once into IMAGE_CACHE_DIR, keyed
+# by a hash of its URL, and resized on first request to each of the
+# IMAGE_WIDTHS as WebP and JPEG, which are cached next to it; browsers that
+# accept WebP get WebP. Templates use the responsive_image() macro in
+# includes/image.html, which offers the widths in a srcset and loads
+# lazily, so the browser fetches the smallest copy that fills the layout,
+# and only once it scrolls into view.
+#
+# /images/ URLs are signed with SECRET_KEY so the route only resizes images
+# the site links. A source that can't be fetched or decoded is skipped for
+# IMAGE_RETRY_AFTER seconds, and requests for it redirect to the source.
+#
+# image_links are submitted by users, so the signature doesn't make a
+# source safe to fetch. Sources are only fetched from hosts whose every
+# address is public (or from IMAGE_ALLOWED_HOSTS, when set), over a
+# connection to the address that was checked; each redirect is checked
+# the same way, and bodies over IMAGE_MAX_BYTES are refused.
+#----------------------------------------------------------------------------#
+
+# extension -> Pillow format and mimetype of the variants
+FORMATS = {
+    "webp": ('WEBP', 'image/webp'),
+    "jpg": ('JPEG', 'image/jpeg'),
+}
+
+# defaults for the image config keys
+DEFAULT_WIDTHS = (160, 320, 640, 1280)
+DEFAULT_QUALITY = 80
+DEFAULT_FETCH_TIMEOUT = 5
+DEFAULT_MAX_BYTES = 10 * 1024 * 1024
+DEFAULT_RETRY_AFTER = 300
+DEFAULT_MAX_AGE = 7 * 24 * 3600
+DEFAULT_MAX_REDIRECTS = 3
+
+# sources share this many locks, so the lock table stays the same size
+LOCK_STRIPES = 64
+
+REDIRECTS = (301, 302, 303, 307, 308)
+
+
+# the cache key of a source URL
+def url_key(url):
+    return hashlib.sha256(url.encode('utf-8')).hexdigest()
+
+
+#----------------------------------------------------------------------------#
+# Fetching.
+#----------------------------------------------------------------------------#
+
+# whether an IP address is on the public internet, so not loopback,
+# private, link-local (cloud metadata), multicast or reserved
+
+
+def public_address(address):
+    ip = ipaddress.ip_address(address)
+    if ip.version == 6 and ip.ipv4_mapped is not None:
+        ip = ip.ipv4_mapped
+    return ip.is_global and not ip.is_multicast
+
+
+# http.client connections to an address checked beforehand, rather than
+# whatever the host name resolves to when connecting. HTTPS still verifies
+# the certificate against the host name
+
+
+class _PinnedHTTPConnection(http.client.HTTPConnection):
+
+    def __init__(self, host, port, address, timeout):
+        super().__init__(host, port, timeout=timeout)
+        self.address = address
+
+    def connect(self):
+        self.sock = socket.create_connection((self.address, self.port),
+                                             self.timeout)
+
+
+class _PinnedHTTPSConnection(http.client.HTTPSConnection):
+
+    def __init__(self, host, port, address, timeout):
+        super().__init__(host, port, timeout=timeout)
+        self.address = address
+
+    def connect(self):
+        sock = socket.create_connection((self.address, self.port), self.timeout)
+        self.sock = self._context.wrap_socket(sock, server_hostname=self.host)
+
+
+def _allowed_host(host, allowed_hosts):
+    return any(host == allowed or host.endswith('.' + allowed)
+               for allowed in allowed_hosts)
+
+
+# an open connection to the host of url, after checking that the host may
+# be fetched from. raises ValueError if it may not
+def _connect(url, timeout, allowed_hosts):
+    parts = urlsplit(url)
+    if parts.scheme not in ('http', 'https') or not parts.hostname:
+        raise ValueError('Unsupported image URL: %s' % url)
+    host = parts.hostname.lower()
+    if allowed_hosts is not None and not _allowed_host(host, allowed_hosts):
+        raise ValueError('Image host not allowed: %s' % host)
+    port = parts.port or (443 if parts.scheme == 'https' else 80)
+
+    # every address must be public, so a host can't mix in a private one
+    try:
+        addresses = [info[4][0] for info in socket.getaddrinfo(
+            host, port, type=socket.SOCK_STREAM)]
+    except socket.gaierror as e:
+        raise ValueError('Image host not found: %s (%s)' % (host, e))
+    if not addresses or not all(public_address(a) for a in addresses):
+        raise ValueError('Image host is not public: %s' % host)
+
+    connection = (_PinnedHTTPSConnection if parts.scheme == 'https'
+                  else _PinnedHTTPConnection)
+    return connection(host, port, addresses[0], timeout)
+
+
+# the body of an http(s) image, following at most max_redirects redirects,
+# each to a host that may be fetched from. raises ValueError if it can't be
+def fetch(url, timeout=DEFAULT_FETCH_TIMEOUT, max_bytes=DEFAULT_MAX_BYTES,
+          allowed_hosts=None, max_redirects=DEFAULT_MAX_REDIRECTS):
+    for _ in range(max_redirects + 1):
+        connection = _connect(url, timeout, allowed_hosts)
+        parts = urlsplit(url)
+        path = parts.path or '/'
+        if parts.query:
+            path += '?' + parts.query
+        try:
+            connection.request('GET', path, headers={
+                "User-Agent": 'fyyur-images', "Accept": 'image/*'})
+            response = connection.getresponse()
+            if response.status in REDIRECTS and response.getheader('Location'):
+                url = urljoin(url, response.getheader('Location'))
+                continue
+            if response.status != 200:
+                raise ValueError('Image fetch got %d: %s' % (response.status, url))
+            length = response.getheader('Content-Length')
+            if length is not None and length.isdigit() and int(length) > max_bytes:
+                raise ValueError('Image over %d bytes: %s' % (max_bytes, url))
+            content = response.read(max_bytes + 1)
+        except http.client.HTTPException as e:
+            raise ValueError('Image fetch failed: %s (%s)' % (url, e))
+        finally:
+            connection.close()
+        if len(content) > max_bytes:
+            raise ValueError('Image over %d bytes: %s' % (max_bytes, url))
+        return content
+    raise ValueError('Image redirected more than %d times: %s' % (
+        max_redirects, url))
+
+#----------------------------------------------------------------------------#
+# Store.
+#----------------------------------------------------------------------------#
+
+# files of one source image under root: the original as fetched, a marker
+# of the last failure, and its resized variants
+
+
+class ImageStore:
+
+    def __init__(self, root, static_folder, static_url_path,
+                 timeout=DEFAULT_FETCH_TIMEOUT, max_bytes=DEFAULT_MAX_BYTES,
+                 retry_after=DEFAULT_RETRY_AFTER, quality=DEFAULT_QUALITY,
+                 allowed_hosts=None):
+        self.root = root
+        self.static_folder = static_folder
+        self.static_prefix = static_url_path.rstrip('/') + '/'
+        self.timeout = timeout
+        self.max_bytes = max_bytes
+        self.retry_after = retry_after
+        self.quality = quality
+        self.allowed_hosts = allowed_hosts
+        # locks shared by sources, so concurrent requests fetch and resize
+        # each source once
+        self.locks = [threading.Lock() for _ in range(LOCK_STRIPES)]
+
+    def _lock(self, key):
+        return self.locks[int(key[:8], 16) % len(self.locks)]
+
+    def _path(self, key, name):
+        return os.path.join(self.root, key[:2], key, name)
+
+    # reads the source: a file under the static folder, or over http(s)
+    def _read(self, url):
+        if url.startswith(self.static_prefix):
+            path = safe_join(self.static_folder, url[len(self.static_prefix):])
+            if path is None:
+                raise ValueError('Not a static file: %s' % url)
+            with open(path, 'rb') as f:
+                return f.read()
+
+        return fetch(url, timeout=self.timeout, max_bytes=self.max_bytes,
+                     allowed_hosts=self.allowed_hosts)
+
+    # writes content to path through a temporary file, so readers never
+    # see a partial file
+    def _write(self, path, content):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        temporary = '%s.%d.tmp' % (path, threading.get_ident())
+        with open(temporary, 'wb') as f:
+            f.write(content)
+        os.replace(temporary, path)
+
+    def _failed_recently(self, key):
+        try:
+            failed = os.path.getmtime(self._path(key, 'failed'))
+        except OSError:
+            return False
+        return time.time() - failed < self.retry_after
+
+    def _fail(self, key, url, error):
+        current_app.logger.warning('image %s: %s', url, error)
+        self._write(self._path(key, 'failed'), str(error).encode('utf-8'))
+
+    # path of the original, fetched on first use, or None if it can't be
+    def original(self, url):
+        key = url_key(url)
+        path = self._path(key, 'original')
+        if os.path.exists(path):
+            return path
+        if self._failed_recently(key):
+            return None
+
+        with self._lock(key):
+            if not os.path.exists(path):
+                try:
+                    self._write(path, self._read(url))
+                except (OSError, ValueError) as e:
+                    self._fail(key, url, e)
+                    return None
+        return path
+
+    # path of the image at most width pixels wide in format ext, or None
+    def variant(self, url, width, ext):
+        key = url_key(url)
+        path = self._path(key, '%d.%s' % (width, ext))
+        if os.path.exists(path):
+            return path
+        original = self.original(url)
+        if original is None:
+            return None
+
+        with self._lock(key):
+            if os.path.exists(path):
+                return path
+            try:
+                with Image.open(original) as image:
+                    # JPEGs can decode straight at a smaller scale
+                    image.draft('RGB', (width, width * 4))
+                    image = ImageOps.exif_transpose(image)
+                    if image.width > width:
+                        image.thumbnail((width, image.height))
+                    image = _convert(image, ext)
+                    temporary = '%s.%d.tmp' % (path, threading.get_ident())
+                    image.save(temporary, FORMATS[ext][0],
+                               quality=self.quality, optimize=True)
+                os.replace(temporary, path)
+            except (OSError, ValueError, Image.DecompressionBombError) as e:
+                self._fail(key, url, e)
+                return None
+        return path
+
+
+# image in a mode the format can store; JPEG has no transparency, so that
+# goes onto white
+def _convert(image, ext):
+    if ext == 'webp':
+        return image if image.mode in ('RGB', 'RGBA') else image.convert('RGBA')
+    if image.mode in ('RGBA', 'LA', 'P'):
+        image = image.convert('RGBA')
+        background = Image.new('RGB', image.size, 'white')
+        background.paste(image, mask=image.getchannel('A'))
+        return background
+    return image.convert('RGB')
+
+#----------------------------------------------------------------------------#
+# App.
+#----------------------------------------------------------------------------#
+
+# gives app its image store, the /images/ route and the template helpers
+
+
+def init_app(app):
+    config = app.config
+    app.extensions['images'] = ImageStore(
+        config.get('IMAGE_CACHE_DIR') or os.path.join(app.instance_path, 'images'),
+        app.static_folder, app.static_url_path,
+        timeout=config.get('IMAGE_FETCH_TIMEOUT', DEFAULT_FETCH_TIMEOUT),
+        max_bytes=config.get('IMAGE_MAX_BYTES', DEFAULT_MAX_BYTES),
+        retry_after=config.get('IMAGE_RETRY_AFTER', DEFAULT_RETRY_AFTER),
+        quality=config.get('IMAGE_QUALITY', DEFAULT_QUALITY),
+        allowed_hosts=config.get('IMAGE_ALLOWED_HOSTS'))
+    app.add_url_rule('/images/<int:width>', 'images', serve_image)
+    app.add_template_global(image_url)
+    app.add_template_global(image_srcset)
+
+
+def _widths():
+    return current_app.config.get('IMAGE_WIDTHS', DEFAULT_WIDTHS)
+
+
+def _signature(url):
+    return hmac.new(current_app.config['SECRET_KEY'].encode('utf-8'),
+                    url.encode('utf-8'), hashlib.sha256).hexdigest()[:16]
+
+
+# URL of the copy of image src at most width pixels wide
+def image_url(src, width):
+    return url_for('images', width=width, src=src, sig=_signature(src))
+
+
+# srcset offering the configured widths of image src, or those of them
+# in widths
+def image_srcset(src, widths=None):
+    return ', '.join('%s %dw' % (image_url(src, width), width)
+                     for width in _widths() if widths is None or width in widths)
+
+
+def serve_image(width):
+    src = request.args.get('src', '')
+    if width not in _widths() or not hmac.compare_digest(
+            request.args.get('sig', ''), _signature(src)):
+        abort(404)
+
+    # one URL per width keeps pages small; the format follows Accept.
+    # browsers that decode WebP name it, so */* alone gets JPEG
+    ext = 'webp' if any(value == 'image/webp' and quality
+                        for value, quality in request.accept_mimetypes) else 'jpg'
+    path = current_app.extensions['images'].variant(src, width, ext)
+    if path is None:
+        if src.startswith(('http://', 'https://')):
+            return redirect(src)
+        abort(404)
+
+    response = send_file(path, mimetype=FORMATS[ext][1], max_age=current_app.config.get(
+        'IMAGE_MAX_AGE', DEFAULT_MAX_AGE))
+    response.cache_control.public = True
+    response.vary.add('Accept')
+    return response
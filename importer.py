@@ -0,0 +1,294 @@
+#----------------------------------------------------------------------------#
+# Imports
+#----------------------------------------------------------------------------#
+
+import csv
+import json
+import time
+import dateutil.parser
+from sqlalchemy.exc import SQLAlchemyError
+from werkzeug.datastructures import MultiDict
+from forms import VenueForm, ArtistForm, ShowForm, phone_validator
+from models import db, Venue, Artist, Show
+from counters import reconcile_show_counts
+
+#----------------------------------------------------------------------------#
+# Bulk import.
+#
+# Streams CSV or JSON Lines input one row at a time, validates each row
+# with the same form rules and phone validation as the create handlers, and
+# inserts valid rows in batches with executemany. Shows name their artist
+# and venue by id, external id or name (`artist_id`, `artist_external_id`,
+# `artist_name`, and the same for venue); references are resolved one
+# batch at a time. In CSV input, genres are separated by semicolons.
+#----------------------------------------------------------------------------#
+
+# default number of rows per INSERT
+BATCH_SIZE = 1000
+
+
+class RowError(Exception):
+    pass
+
+
+# yields (line number, row dict) from a CSV or JSON Lines file
+def read_rows(file, format):
+    if format == 'csv':
+        reader = csv.DictReader(file)
+        for row in reader:
+            yield reader.line_num, row
+    elif format == 'jsonl':
+        for line_num, line in enumerate(file, 1):
+            if line.strip():
+                try:
+                    yield line_num, json.loads(line)
+                except ValueError as e:
+                    yield line_num, RowError('Invalid JSON: %s' % e)
+    else:
+        raise ValueError('Unknown format %r' % format)
+
+#----------------------------------------------------------------------------#
+# Validation.
+#----------------------------------------------------------------------------#
+
+# validates data against a form, returning the form. empty optional fields
+# are allowed, as they are when submitted through the site
+
+
+def _validate(form_class, data):
+    formdata = MultiDict()
+    for key, value in data.items():
+        if value is None:
+            continue
+        if isinstance(value, bool):
+            value = 'Yes' if value else 'No'
+        if isinstance(value, list):
+            for item in value:
+                formdata.add(key, str(item))
+        else:
+            formdata.add(key, str(value))
+
+    form = form_class(formdata=formdata, meta={'csrf': False})
+    form.validate()
+
+    messages = []
+    for name, errors in form.errors.items():
+        if formdata.get(name) or form[name].flags.required:
+            messages.append('%s: %s' % (name, ' '.join(errors)))
+    if messages:
+        raise RowError('; '.join(messages))
+    return form
+
+
+def _genres(value):
+    if isinstance(value, str):
+        return [genre.strip() for genre in value.split(';') if genre.strip()]
+    return value
+
+
+def _phone(value):
+    try:
+        phone_validator(value)
+    except Exception as e:
+        raise RowError('phone: %s' % (str(e) or 'Must be a valid US phone number.'))
+    return value
+
+
+def _optional(value):
+    return value or None
+
+
+# builds the insert values for a venue row
+def venue_values(data):
+    data = dict(data, genres=_genres(data.get('genres')))
+    form = _validate(VenueForm, data)
+    return {
+        "name": form.name.data,
+        "city": form.city.data,
+        "state": form.state.data,
+        "address": form.address.data,
+        "phone": _phone(form.phone.data),
+        "genres": form.genres.data,
+        "facebook_link": _optional(form.facebook_link.data),
+        "website": _optional(form.website.data),
+        "image_link": _optional(form.image_link.data),
+        "seeking_talent": form.seeking_talent.data == 'Yes',
+        "seeking_description": _optional(form.seeking_description.data),
+        "external_id": _optional(data.get('external_id'))
+    }
+
+
+# builds the insert values for an artist row
+def artist_values(data):
+    data = dict(data, genres=_genres(data.get('genres')))
+    form = _validate(ArtistForm, data)
+    return {
+        "name": form.name.data,
+        "city": form.city.data,
+        "state": form.state.data,
+        "phone": _phone(form.phone.data),
+        "genres": form.genres.data,
+        "facebook_link": _optional(form.facebook_link.data),
+        "website": _optional(form.website.data),
+        "image_link": _optional(form.image_link.data),
+        "seeking_venue": form.seeking_venue.data == 'Yes',
+        "seeking_description": _optional(form.seeking_description.data),
+        "external_id": _optional(data.get('external_id'))
+    }
+
+
+# builds the insert values for a show row, leaving the artist and venue
+# references to be resolved with the rest of its batch
+def show_values(data):
+    try:
+        start_time = dateutil.parser.parse(str(data.get('start_time', '')))
+    except (ValueError, OverflowError):
+        raise RowError('start_time: Not a valid datetime value')
+    form = _validate(ShowForm, {
+        "artist_id": data.get('artist_id'),
+        "venue_id": data.get('venue_id'),
+        "start_time": start_time.strftime('%Y-%m-%d %H:%M:%S')
+    })
+
+    values = {"start_time": form.start_time.data}
+    for kind in ('artist', 'venue'):
+        for key in ('id', 'external_id', 'name'):
+            value = data.get('%s_%s' % (kind, key))
+            if value not in (None, ''):
+                values[kind] = (key, value)
+                break
+        else:
+            raise RowError('%s: give %s_id, %s_external_id or %s_name'
+                           % (kind, kind, kind, kind))
+    return values
+
+#----------------------------------------------------------------------------#
+# Writing.
+#----------------------------------------------------------------------------#
+
+# replaces the artist/venue references of a batch of show values with ids,
+# using one query per reference kind. returns the rows that failed
+
+
+def _resolve_shows(batch):
+    failed = {}
+    for kind, model, column in (('artist', Artist, 'artist_id'),
+                                ('venue', Venue, 'venue_id')):
+        # normalize the references and group them by key
+        wanted = {}
+        for line_num, values in batch:
+            key, value = values.pop(kind)
+            try:
+                value = int(value) if key == 'id' else str(value)
+            except ValueError:
+                failed.setdefault(line_num, '%s_id must be an integer' % kind)
+                continue
+            values[kind] = (key, value)
+            wanted.setdefault(key, set()).add(value)
+
+        found = {}
+        for key, values in wanted.items():
+            field = getattr(model, key)
+            for entity_id, value in db.session.query(model.id, field).filter(
+                    field.in_(values)):
+                # a name shared by several entities can't be resolved
+                found[(key, value)] = None if (key, value) in found else entity_id
+
+        for line_num, values in batch:
+            if kind not in values:
+                continue
+            reference = values.pop(kind)
+            entity_id = found.get(reference)
+            if entity_id is None:
+                reason = 'is ambiguous' if reference in found else 'not found'
+                failed.setdefault(line_num, '%s %s %r %s' % (
+                    (kind,) + reference + (reason,)))
+            else:
+                values[column] = entity_id
+
+    batch[:] = [(line_num, values) for line_num, values in batch
+                if line_num not in failed]
+    return sorted(failed.items())
+
+
+# inserts a batch in one executemany. if the batch is rejected (e.g. for a
+# duplicate external_id), rows are retried one by one in savepoints so only
+# the bad rows fail. returns (inserted, failed rows)
+
+
+def _insert(model, batch):
+    if not batch:
+        return 0, []
+    table = model.__table__
+    try:
+        db.session.execute(table.insert(), [values for _, values in batch])
+        db.session.commit()
+        return len(batch), []
+    except SQLAlchemyError:
+        db.session.rollback()
+
+    inserted, failed = 0, []
+    for line_num, values in batch:
+        try:
+            with db.session.begin_nested():
+                db.session.execute(table.insert(), [values])
+            inserted += 1
+        except SQLAlchemyError as e:
+            failed.append((line_num, str(e.orig if hasattr(e, 'orig') else e)))
+    db.session.commit()
+    return inserted, failed
+
+
+IMPORTERS = {
+    "venues": (Venue, venue_values),
+    "artists": (Artist, artist_values),
+    "shows": (Show, show_values),
+}
+
+
+# imports kind ('venues', 'artists' or 'shows') from rows of (line number,
+# data), calling on_error(line number, message) for every rejected row.
+# returns {"imported", "failed", "seconds", "rows_per_second"}
+
+
+def import_rows(kind, rows, batch_size=BATCH_SIZE, on_error=None):
+    model, build = IMPORTERS[kind]
+    stats = {"imported": 0, "failed": 0}
+    start = time.perf_counter()
+
+    def fail(line_num, message):
+        stats['failed'] += 1
+        if on_error is not None:
+            on_error(line_num, message)
+
+    def flush(batch):
+        if kind == 'shows':
+            for line_num, message in _resolve_shows(batch):
+                fail(line_num, message)
+        inserted, failed = _insert(model, batch)
+        stats['imported'] += inserted
+        for line_num, message in failed:
+            fail(line_num, message)
+        del batch[:]
+
+    batch = []
+    for line_num, data in rows:
+        try:
+            if isinstance(data, RowError):
+                raise data
+            batch.append((line_num, build(data)))
+        except RowError as e:
+            fail(line_num, str(e))
+            continue
+        if len(batch) >= batch_size:
+            flush(batch)
+    flush(batch)
+
+    # executemany skips the ORM events that maintain the show counters
+    if kind == 'shows' and stats['imported']:
+        reconcile_show_counts()
+
+    stats['seconds'] = time.perf_counter() - start
+    total = stats['imported'] + stats['failed']
+    stats['rows_per_second'] = total / stats['seconds'] if stats['seconds'] else 0
+    return stats
@@ -0,0 +1,107 @@
+#----------------------------------------------------------------------------#
+# Imports
+#----------------------------------------------------------------------------#
+
+import json
+import re
+import time
+from collections import Counter
+from flask import current_app, g, request, has_request_context
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+#----------------------------------------------------------------------------#
+# SQL instrumentation.
+#
+# Every statement executed while handling a request is counted and timed.
+# Responses carry a Server-Timing header with the DB time and statement
+# count next to the total request time. When one normalized statement runs
+# more than SQL_REPEAT_THRESHOLD times in a request, which is the usual N+1
+# pattern, a structured warning naming the route is logged.
+#----------------------------------------------------------------------------#
+
+# default number of repeats of one statement tolerated per request
+REPEAT_THRESHOLD = 10
+
+# literals and IN lists, so statements differing only in values match
+_NORMALIZE = [
+    (re.compile(r"'(?:[^']|'')*'"), '?'),
+    (re.compile(r'\b\d+(?:\.\d+)?\b'), '?'),
+    (re.compile(r'%\(\w+\)s|:\w+|\$\d+'), '?'),
+    (re.compile(r'\(\s*\?(?:\s*,\s*\?)*\s*\)'), '(?)'),
+    (re.compile(r'\s+'), ' '),
+]
+
+
+# reduces a statement to its shape
+def normalize(statement):
+    for pattern, replacement in _NORMALIZE:
+        statement = pattern.sub(replacement, statement)
+    return statement.strip()
+
+
+def _enabled():
+    return has_request_context() and 'sql_stats' in g
+
+
+# statistics of the current request:
+# {"statements", "db_time", "repeats": Counter of normalized statements}
+def request_stats():
+    return g.get('sql_stats')
+
+
+@event.listens_for(Engine, 'before_cursor_execute')
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if _enabled():
+        conn.info.setdefault('query_start', []).append(time.perf_counter())
+
+
+@event.listens_for(Engine, 'after_cursor_execute')
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if not _enabled() or not conn.info.get('query_start'):
+        return
+    stats = g.sql_stats
+    stats['db_time'] += time.perf_counter() - conn.info['query_start'].pop()
+    stats['statements'] += 1
+    stats['repeats'][normalize(statement)] += 1
+
+
+def _start_request():
+    if current_app.config.get('SQL_INSTRUMENTATION', True):
+        g.request_start = time.perf_counter()
+        g.sql_stats = {"statements": 0, "db_time": 0.0, "repeats": Counter()}
+
+
+def _finish_request(response):
+    stats = g.get('sql_stats')
+    if stats is None:
+        return response
+
+    total = time.perf_counter() - g.request_start
+    response.headers.add('Server-Timing', 'db;dur=%.2f;desc="%d statements"' % (
+        stats['db_time'] * 1000, stats['statements']))
+    response.headers.add('Server-Timing', 'total;dur=%.2f' % (total * 1000))
+
+    threshold = current_app.config.get('SQL_REPEAT_THRESHOLD', REPEAT_THRESHOLD)
+    repeated = [(statement, count)
+                for statement, count in stats['repeats'].most_common()
+                if count > threshold]
+    if repeated:
+        current_app.logger.warning(json.dumps({
+            "event": 'sql_repeated_statements',
+            "route": request.url_rule.rule if request.url_rule else None,
+            "endpoint": request.endpoint,
+            "method": request.method,
+            "path": request.path,
+            "statements": stats['statements'],
+            "db_ms": round(stats['db_time'] * 1000, 2),
+            "repeated": [{"statement": statement, "count": count}
+                         for statement, count in repeated]
+        }))
+    return response
+
+
+# times the requests of app
+def init_app(app):
+    app.before_request(_start_request)
+    app.after_request(_finish_request)
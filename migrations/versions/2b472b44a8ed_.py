@@ -15,8 +15,24 @@ down_revision = '069143d23917'
 branch_labels = None
 depends_on = None
 
+# names the foreign keys on SQLite, which can't reflect the names of quoted
+# constraints, so the batch rebuilds below always find them by name
+NAMING_CONVENTION = {
+    "fk": 'fk_%(table_name)s_%(column_0_name)s_%(referred_table_name)s',
+}
+
 
 def upgrade():
+    # SQLite can't add constraints to a table, so rebuild Show with them
+    if op.get_bind().dialect.name == 'sqlite':
+        with op.batch_alter_table(
+                'Show', naming_convention=NAMING_CONVENTION) as batch_op:
+            batch_op.create_foreign_key(
+                'fk_Show_artist_id_Artist', 'Artist', ['artist_id'], ['id'])
+            batch_op.create_foreign_key(
+                'fk_Show_venue_id_Venue', 'Venue', ['venue_id'], ['id'])
+        return
+
     # ### commands auto generated by Alembic - please adjust! ###
     op.create_foreign_key(None, 'Show', 'Artist', ['artist_id'], ['id'])
     op.create_foreign_key(None, 'Show', 'Venue', ['venue_id'], ['id'])
@@ -24,7 +40,14 @@ def upgrade():
 
 
 def downgrade():
-    # ### commands auto generated by Alembic - please adjust! ###
-    op.drop_constraint(None, 'Show', type_='foreignkey')
-    op.drop_constraint(None, 'Show', type_='foreignkey')
-    # ### end Alembic commands ###
+    # and rebuild it without them
+    if op.get_bind().dialect.name == 'sqlite':
+        with op.batch_alter_table(
+                'Show', naming_convention=NAMING_CONVENTION) as batch_op:
+            batch_op.drop_constraint('fk_Show_venue_id_Venue', type_='foreignkey')
+            batch_op.drop_constraint('fk_Show_artist_id_Artist', type_='foreignkey')
+        return
+
+    # Postgres named them after the columns
+    op.drop_constraint('Show_venue_id_fkey', 'Show', type_='foreignkey')
+    op.drop_constraint('Show_artist_id_fkey', 'Show', type_='foreignkey')
@@ -0,0 +1,31 @@
+"""add indexes on Show foreign keys and start_time
+
+Revision ID: 3c9d0e7a4b21
+Revises: fef06cb9d325
+Create Date: 2026-10-17 09:12:44.318207
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '3c9d0e7a4b21'
+down_revision = 'fef06cb9d325'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_index('ix_Show_venue_id_start_time', 'Show',
+                    ['venue_id', 'start_time'], unique=False)
+    op.create_index('ix_Show_artist_id_start_time', 'Show',
+                    ['artist_id', 'start_time'], unique=False)
+    op.create_index('ix_Show_start_time', 'Show',
+                    ['start_time'], unique=False)
+
+
+def downgrade():
+    op.drop_index('ix_Show_start_time', table_name='Show')
+    op.drop_index('ix_Show_artist_id_start_time', table_name='Show')
+    op.drop_index('ix_Show_venue_id_start_time', table_name='Show')
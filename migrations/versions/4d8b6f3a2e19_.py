@@ -0,0 +1,108 @@
+"""partition Show by start_time month
+
+Revision ID: 4d8b6f3a2e19
+Revises: 7a5e2c91d4b8
+Create Date: 2026-10-17 17:41:36.902115
+
+"""
+from datetime import date, datetime
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '4d8b6f3a2e19'
+down_revision = '7a5e2c91d4b8'
+branch_labels = None
+depends_on = None
+
+# months of partitions created past the current one; `flask
+# maintain-partitions` keeps creating them from here on
+MONTHS_AHEAD = 3
+
+COLUMNS = 'id, artist_id, venue_id, start_time, updated_at'
+
+INDEXES = {
+    'ix_Show_venue_id_start_time': ['venue_id', 'start_time'],
+    'ix_Show_artist_id_start_time': ['artist_id', 'start_time'],
+    'ix_Show_start_time': ['start_time'],
+    'ix_Show_updated_at': ['updated_at'],
+}
+
+# the primary key of a partitioned table must include the partition key;
+# ids still come from the one sequence
+CREATE_TABLE = '''
+CREATE TABLE "Show" (
+    id integer NOT NULL DEFAULT nextval('"Show_id_seq"'::regclass),
+    artist_id integer NOT NULL,
+    venue_id integer NOT NULL,
+    start_time timestamp without time zone NOT NULL,
+    updated_at timestamp without time zone NOT NULL
+        DEFAULT (now() at time zone 'utc'),
+    {0}
+){1}
+'''
+
+
+def _month(day, offset):
+    months = day.year * 12 + day.month - 1 + offset
+    return date(months // 12, months % 12 + 1, 1)
+
+
+# renames Show to old_name and frees the names of its key and indexes
+def _set_aside(old_name):
+    op.execute('ALTER TABLE "Show" RENAME TO "{0}"'.format(old_name))
+    op.execute('ALTER INDEX "Show_pkey" RENAME TO "{0}_pkey"'.format(old_name))
+    for name in INDEXES:
+        op.drop_index(name, table_name=old_name)
+    op.execute('ALTER SEQUENCE "Show_id_seq" OWNED BY NONE')
+
+
+# copies the shows from old_name into the new Show, drops old_name and
+# restores the sequence, foreign keys and indexes
+def _move_from(old_name):
+    op.execute('INSERT INTO "Show" ({0}) SELECT {0} FROM "{1}"'.format(
+        COLUMNS, old_name))
+    op.execute('DROP TABLE "{0}" CASCADE'.format(old_name))
+    op.execute('ALTER SEQUENCE "Show_id_seq" OWNED BY "Show".id')
+    op.create_foreign_key('Show_artist_id_fkey', 'Show', 'Artist',
+                          ['artist_id'], ['id'])
+    op.create_foreign_key('Show_venue_id_fkey', 'Show', 'Venue',
+                          ['venue_id'], ['id'])
+    for name, columns in INDEXES.items():
+        op.create_index(name, 'Show', columns, unique=False)
+
+
+def upgrade():
+    # other databases keep one Show table
+    if op.get_bind().dialect.name != 'postgresql':
+        return
+
+    _set_aside('Show_unpartitioned')
+    op.execute(CREATE_TABLE.format(
+        'PRIMARY KEY (id, start_time)', ' PARTITION BY RANGE (start_time)'))
+
+    # a partition for every month from the first show on, and a default
+    # partition for shows past the last one
+    this_month = _month(datetime.now().date(), 0)
+    first = op.get_bind().execute(sa.text(
+        'SELECT min(start_time) FROM "Show_unpartitioned"')).scalar()
+    month = min(_month(first.date(), 0), this_month) if first else this_month
+    while month <= _month(this_month, MONTHS_AHEAD):
+        op.execute(
+            'CREATE TABLE "Show_{0:%Y_%m}" PARTITION OF "Show" '
+            "FOR VALUES FROM ('{0}') TO ('{1}')".format(month, _month(month, 1)))
+        month = _month(month, 1)
+    op.execute('CREATE TABLE "Show_default" PARTITION OF "Show" DEFAULT')
+
+    _move_from('Show_unpartitioned')
+
+
+def downgrade():
+    if op.get_bind().dialect.name != 'postgresql':
+        return
+
+    # partitions detached by `flask maintain-partitions` are left as they are
+    _set_aside('Show_partitioned')
+    op.execute(CREATE_TABLE.format('PRIMARY KEY (id)', ''))
+    _move_from('Show_partitioned')
@@ -0,0 +1,25 @@
+"""index Venue state, city and id for the pages of venue areas
+
+Revision ID: 5c3e8a1f7b62
+Revises: 4d8b6f3a2e19
+Create Date: 2026-10-17 21:12:48.306715
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '5c3e8a1f7b62'
+down_revision = '4d8b6f3a2e19'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_index('ix_Venue_state_city_id', 'Venue',
+                    ['state', 'city', 'id'], unique=False)
+
+
+def downgrade():
+    op.drop_index('ix_Venue_state_city_id', table_name='Venue')
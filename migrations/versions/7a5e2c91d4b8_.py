@@ -0,0 +1,25 @@
+"""index Venue city and state for the show listing filters
+
+Revision ID: 7a5e2c91d4b8
+Revises: f3b81d2a6c07
+Create Date: 2026-10-17 16:20:12.418503
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '7a5e2c91d4b8'
+down_revision = 'f3b81d2a6c07'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_index('ix_Venue_city_state', 'Venue',
+                    ['city', 'state'], unique=False)
+
+
+def downgrade():
+    op.drop_index('ix_Venue_city_state', table_name='Venue')
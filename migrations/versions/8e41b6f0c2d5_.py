@@ -0,0 +1,68 @@
+"""add ranked search columns and indexes for Venue and Artist
+
+Revision ID: 8e41b6f0c2d5
+Revises: 3c9d0e7a4b21
+Create Date: 2026-10-17 10:02:13.584920
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision = '8e41b6f0c2d5'
+down_revision = '3c9d0e7a4b21'
+branch_labels = None
+depends_on = None
+
+# keeps search_vector in step with name, genres, city and state. a frozen
+# copy of search.TRIGGER_FUNCTION and search.TRIGGER as of this revision;
+# change the trigger with a new revision
+TRIGGER_FUNCTION = '''CREATE OR REPLACE FUNCTION "{0}_search_vector_update"() RETURNS trigger AS $$
+BEGIN
+    NEW.search_vector :=
+        setweight(to_tsvector('simple', coalesce(NEW.name, '')), 'A') ||
+        setweight(to_tsvector('simple',
+            array_to_string(coalesce(NEW.genres, '{{}}'), ' ')), 'B') ||
+        setweight(to_tsvector('simple',
+            coalesce(NEW.city, '') || ' ' || coalesce(NEW.state, '')), 'C');
+    RETURN NEW;
+END
+$$ LANGUAGE plpgsql'''
+
+TRIGGER = '''CREATE TRIGGER "{0}_search_vector_trigger"
+BEFORE INSERT OR UPDATE ON "{0}"
+FOR EACH ROW EXECUTE PROCEDURE "{0}_search_vector_update"()'''
+
+
+def upgrade():
+    # other databases use the in-process index in search.py
+    if op.get_bind().dialect.name != 'postgresql':
+        return
+
+    op.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+    for table in ('Venue', 'Artist'):
+        op.add_column(table, sa.Column(
+            'search_vector', postgresql.TSVECTOR(), nullable=True))
+        op.execute(TRIGGER_FUNCTION.format(table))
+        op.execute(TRIGGER.format(table))
+        # fire the trigger once for existing rows
+        op.execute('UPDATE "{0}" SET search_vector = NULL'.format(table))
+        op.create_index('ix_{0}_search_vector'.format(table), table,
+                        ['search_vector'], postgresql_using='gin')
+        op.create_index('ix_{0}_name_trgm'.format(table), table, ['name'],
+                        postgresql_using='gin',
+                        postgresql_ops={'name': 'gin_trgm_ops'})
+
+
+def downgrade():
+    if op.get_bind().dialect.name != 'postgresql':
+        return
+
+    for table in ('Artist', 'Venue'):
+        op.drop_index('ix_{0}_name_trgm'.format(table), table_name=table)
+        op.drop_index('ix_{0}_search_vector'.format(table), table_name=table)
+        op.execute('DROP TRIGGER "{0}_search_vector_trigger" ON "{0}"'.format(table))
+        op.execute('DROP FUNCTION "{0}_search_vector_update"()'.format(table))
+        op.drop_column(table, 'search_vector')
@@ -0,0 +1,32 @@
+"""record which show counter each Show is in
+
+Revision ID: 9b2d4f6e8a10
+Revises: 5c3e8a1f7b62
+Create Date: 2026-10-17 22:05:31.742196
+
+"""
+from datetime import datetime
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '9b2d4f6e8a10'
+down_revision = '5c3e8a1f7b62'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column('Show', sa.Column('counted_upcoming', sa.Boolean(),
+                                    nullable=False, server_default=sa.false()))
+    # shows that haven't started are upcoming; run `flask reconcile-counts`
+    # after upgrading so the venue and artist counters agree
+    op.execute(sa.text(
+        'UPDATE "Show" SET counted_upcoming = (start_time > :now)'
+    ).bindparams(now=datetime.now()))
+
+
+def downgrade():
+    with op.batch_alter_table('Show') as batch_op:
+        batch_op.drop_column('counted_upcoming')
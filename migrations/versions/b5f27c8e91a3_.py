@@ -0,0 +1,39 @@
+"""add upcoming and past show counters to Venue and Artist
+
+Revision ID: b5f27c8e91a3
+Revises: 8e41b6f0c2d5
+Create Date: 2026-10-17 11:26:40.902315
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from datetime import datetime
+
+
+# revision identifiers, used by Alembic.
+revision = 'b5f27c8e91a3'
+down_revision = '8e41b6f0c2d5'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    for table, fk in (('Venue', 'venue_id'), ('Artist', 'artist_id')):
+        op.add_column(table, sa.Column('upcoming_shows_count', sa.Integer(),
+                                       server_default='0', nullable=False))
+        op.add_column(table, sa.Column('past_shows_count', sa.Integer(),
+                                       server_default='0', nullable=False))
+        # backfill from the existing shows
+        op.get_bind().execute(sa.text(
+            'UPDATE "{0}" SET '
+            'upcoming_shows_count = (SELECT count(*) FROM "Show" '
+            'WHERE "Show".{1} = "{0}".id AND "Show".start_time > :now), '
+            'past_shows_count = (SELECT count(*) FROM "Show" '
+            'WHERE "Show".{1} = "{0}".id AND "Show".start_time <= :now)'.format(table, fk)),
+            {"now": datetime.now()})
+
+
+def downgrade():
+    for table in ('Artist', 'Venue'):
+        op.drop_column(table, 'past_shows_count')
+        op.drop_column(table, 'upcoming_shows_count')
@@ -0,0 +1,39 @@
+"""add updated_at to Venue, Artist and Show
+
+Revision ID: d0a6e93c57f4
+Revises: b5f27c8e91a3
+Create Date: 2026-10-17 12:48:05.117634
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'd0a6e93c57f4'
+down_revision = 'b5f27c8e91a3'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # SQLite's CURRENT_TIMESTAMP is UTC already, but it can only add a
+    # column with a non-constant default by rebuilding the table
+    if op.get_bind().dialect.name == 'postgresql':
+        now = "(now() at time zone 'utc')"
+    else:
+        now = 'CURRENT_TIMESTAMP'
+    for table in ('Venue', 'Artist', 'Show'):
+        with op.batch_alter_table(table) as batch_op:
+            batch_op.add_column(sa.Column(
+                'updated_at', sa.DateTime(), nullable=False,
+                server_default=sa.text(now)))
+            batch_op.create_index('ix_{0}_updated_at'.format(table),
+                                  ['updated_at'], unique=False)
+
+
+def downgrade():
+    for table in ('Show', 'Artist', 'Venue'):
+        with op.batch_alter_table(table) as batch_op:
+            batch_op.drop_index('ix_{0}_updated_at'.format(table))
+            batch_op.drop_column('updated_at')
@@ -0,0 +1,30 @@
+"""add external_id to Venue and Artist
+
+Revision ID: f3b81d2a6c07
+Revises: d0a6e93c57f4
+Create Date: 2026-10-17 14:05:51.730128
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'f3b81d2a6c07'
+down_revision = 'd0a6e93c57f4'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    for table in ('Venue', 'Artist'):
+        op.add_column(table, sa.Column(
+            'external_id', sa.String(length=120), nullable=True))
+        op.create_index('ix_{0}_external_id'.format(table), table,
+                        ['external_id'], unique=True)
+
+
+def downgrade():
+    for table in ('Artist', 'Venue'):
+        op.drop_index('ix_{0}_external_id'.format(table), table_name=table)
+        op.drop_column(table, 'external_id')
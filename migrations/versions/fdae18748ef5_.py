@@ -17,12 +17,20 @@ depends_on = None
 
 
 def upgrade():
+    # other databases keep genres as a JSON list in the column created by
+    # 069143d23917 (see models.GENRES_TYPE)
+    if op.get_bind().dialect.name != 'postgresql':
+        return
+
     # ### commands auto generated by Alembic - please adjust! ###
     op.add_column('Artist', sa.Column('genres', sa.ARRAY(sa.String()), nullable=False))
     # ### end Alembic commands ###
 
 
 def downgrade():
+    if op.get_bind().dialect.name != 'postgresql':
+        return
+
     # ### commands auto generated by Alembic - please adjust! ###
     op.drop_column('Artist', 'genres')
     # ### end Alembic commands ###
@@ -2,31 +2,38 @@
 # Imports
 #----------------------------------------------------------------------------#
 
-from flask import Flask
 from flask_moment import Moment
-from flask_sqlalchemy import SQLAlchemy
 from datetime import datetime
 from flask_migrate import Migrate
+from replicas import RoutingSQLAlchemy
 #----------------------------------------------------------------------------#
-# App Config.
+# Extensions. Bound to the app by create_app() in app.py.
 #----------------------------------------------------------------------------#
 
-app = Flask(__name__)
-moment = Moment(app)
-app.config.from_object('config')
-db = SQLAlchemy(app)
-migrate = Migrate(app, db)
+moment = Moment()
+# reads from a replica where DB_REPLICA_URIS allow (see replicas.py)
+db = RoutingSQLAlchemy()
+migrate = Migrate()
 
 
 #----------------------------------------------------------------------------#
 # Models.
 #----------------------------------------------------------------------------#
 
+# genres are a native ARRAY on Postgres and a JSON list elsewhere, so the
+# app also runs on SQLite
+GENRES_TYPE = db.JSON().with_variant(db.ARRAY(db.String()), 'postgresql')
+
 # Venue model
 
 
 class Venue(db.Model):
     __tablename__ = 'Venue'
+    # the show listing's city filter, and the pages of venue areas
+    __table_args__ = (
+        db.Index('ix_Venue_city_state', 'city', 'state'),
+        db.Index('ix_Venue_state_city_id', 'state', 'city', 'id'),
+    )
 
     id = db.Column(db.Integer, primary_key=True)
     name = db.Column(db.String(120), nullable=False)
@@ -36,11 +43,22 @@ class Venue(db.Model):
     phone = db.Column(db.String(120), nullable=False)
     image_link = db.Column(db.String(500))
     facebook_link = db.Column(db.String(120))
-    genres = db.Column("genres", db.ARRAY(db.String()), nullable=False)
+    genres = db.Column("genres", GENRES_TYPE, nullable=False)
     website = db.Column(db.String(500))
     seeking_talent = db.Column(db.Boolean, default=True)
     seeking_description = db.Column(db.String(120))
-    shows = db.relationship('Show', backref='venue', lazy=True)
+    # id in a partner catalog, used to resolve imported shows
+    external_id = db.Column(db.String(120), unique=True, index=True)
+    # maintained by counters.py
+    upcoming_shows_count = db.Column(
+        db.Integer, nullable=False, default=0, server_default='0')
+    past_shows_count = db.Column(
+        db.Integer, nullable=False, default=0, server_default='0')
+    # bumped on every change, for conditional GETs
+    updated_at = db.Column(db.DateTime, nullable=False, index=True,
+                           default=datetime.utcnow, onupdate=datetime.utcnow)
+    shows = db.relationship('Show', backref='venue', lazy=True,
+                            cascade='all, delete-orphan')
 
     def __repr__(self):
         return f'<Venue {self.id} {self.name}>'
@@ -55,21 +73,41 @@ class Artist(db.Model):
     city = db.Column(db.String(120), nullable=False)
     state = db.Column(db.String(120), nullable=False)
     phone = db.Column(db.String(120))
-    genres = db.Column("genres", db.ARRAY(db.String()), nullable=False)
+    genres = db.Column("genres", GENRES_TYPE, nullable=False)
     image_link = db.Column(db.String(500))
     facebook_link = db.Column(db.String(120))
     website = db.Column(db.String(500))
     seeking_venue = db.Column(db.Boolean, default=True)
     seeking_description = db.Column(db.String(120))
-    shows = db.relationship('Show', backref='artist', lazy=True)
+    # id in a partner catalog, used to resolve imported shows
+    external_id = db.Column(db.String(120), unique=True, index=True)
+    # maintained by counters.py
+    upcoming_shows_count = db.Column(
+        db.Integer, nullable=False, default=0, server_default='0')
+    past_shows_count = db.Column(
+        db.Integer, nullable=False, default=0, server_default='0')
+    # bumped on every change, for conditional GETs
+    updated_at = db.Column(db.DateTime, nullable=False, index=True,
+                           default=datetime.utcnow, onupdate=datetime.utcnow)
+    shows = db.relationship('Show', backref='artist', lazy=True,
+                            cascade='all, delete-orphan')
 
     def __repr__(self):
         return f'<Artist {self.id} {self.name}>'
 
 
 # Show model
+# on Postgres the table is partitioned by start_time month, with a primary
+# key of (id, start_time); see partitions.py
 class Show(db.Model):
     __tablename__ = 'Show'
+    # per-venue and per-artist lookups filter on the foreign key and then
+    # on start_time; listings range-scan start_time on its own
+    __table_args__ = (
+        db.Index('ix_Show_venue_id_start_time', 'venue_id', 'start_time'),
+        db.Index('ix_Show_artist_id_start_time', 'artist_id', 'start_time'),
+        db.Index('ix_Show_start_time', 'start_time'),
+    )
 
     id = db.Column(db.Integer, primary_key=True)
     artist_id = db.Column(db.Integer, db.ForeignKey(
@@ -77,6 +115,13 @@ class Show(db.Model):
     venue_id = db.Column(db.Integer, db.ForeignKey('Venue.id'), nullable=False)
     start_time = db.Column(db.DateTime, nullable=False,
                            default=datetime.utcnow)
+    # bumped on every change, for conditional GETs
+    updated_at = db.Column(db.DateTime, nullable=False, index=True,
+                           default=datetime.utcnow, onupdate=datetime.utcnow)
+    # whether the show is in the upcoming (or else the past) counters of its
+    # venue and artist; maintained by counters.py
+    counted_upcoming = db.Column(db.Boolean, nullable=False, default=False,
+                                 server_default=db.false())
 
     def __repr__(self):
         return f'<Show {self.id}, Artist {self.artist_id}, Venue {self.venue_id}>'
@@ -0,0 +1,122 @@
+#----------------------------------------------------------------------------#
+# Imports
+#----------------------------------------------------------------------------#
+
+from datetime import datetime
+from urllib.parse import quote, unquote
+from flask import current_app, request, abort
+from sqlalchemy import tuple_
+
+#----------------------------------------------------------------------------#
+# Keyset pagination.
+#
+# List pages are addressed by the sort key of the row they start after
+# (`?after=`) or end before (`?before=`), e.g. `?after=42&limit=50` or
+# `?after=2019-10-10T20:00:00,17`. Every page is one range scan on the sort
+# key index, so page 5,000 costs the same as page 1.
+#----------------------------------------------------------------------------#
+
+# default and largest page sizes for list routes
+PAGE_SIZE = 50
+MAX_PAGE_SIZE = 200
+
+
+# one page of rows with the cursors for its neighbours (None at either end)
+class Page:
+
+    def __init__(self, items, next_cursor=None, prev_cursor=None, limit=None):
+        self.items = items
+        self.next_cursor = next_cursor
+        self.prev_cursor = prev_cursor
+        self.limit = limit
+
+    def __iter__(self):
+        return iter(self.items)
+
+    def __len__(self):
+        return len(self.items)
+
+
+# renders the sort key values of a row as a cursor string. strings are
+# percent-encoded, so a comma in a name can't split the cursor
+def encode_cursor(values):
+    return ','.join(
+        value.isoformat() if isinstance(value, datetime) else
+        quote(value, safe='') if isinstance(value, str) else str(value)
+        for value in values)
+
+
+# parses a cursor string into values for keys, raising ValueError if it
+# doesn't match them
+def decode_cursor(cursor, keys):
+    parts = cursor.split(',')
+    if len(parts) != len(keys):
+        raise ValueError('cursor must have %d parts' % len(keys))
+
+    values = []
+    for part, key in zip(parts, keys):
+        if key.type.python_type is datetime:
+            values.append(datetime.fromisoformat(part))
+        elif key.type.python_type is str:
+            values.append(unquote(part))
+        else:
+            values.append(key.type.python_type(part))
+    return tuple(values)
+
+
+# reads the after/before/limit arguments of the current request
+def page_args():
+    limit = request.args.get(
+        'limit', current_app.config.get('LIST_PAGE_SIZE', PAGE_SIZE), type=int)
+    return {
+        "after": request.args.get('after') or None,
+        "before": request.args.get('before') or None,
+        "limit": min(max(limit, 1), MAX_PAGE_SIZE)
+    }
+
+
+# returns the page of query rows after (or before) a cursor, ordered by keys.
+# keys must be unique together, e.g. (id,) or (start_time, id). rows must
+# expose the keys under their column names. a limit of None returns every
+# row on one page. malformed cursors abort with 400
+
+
+def paginate(query, keys, after=None, before=None, limit=PAGE_SIZE):
+    names = [key.key for key in keys]
+
+    def cursor_for(row):
+        return encode_cursor([getattr(row, name) for name in names])
+
+    # compare on the row value (a, b) > (x, y), or the bare column for one key
+    position = keys[0] if len(keys) == 1 else tuple_(*keys)
+
+    try:
+        if before is not None:
+            values = decode_cursor(before, keys)
+            query = query.filter(position < (values[0] if len(keys) == 1 else values))
+        elif after is not None:
+            values = decode_cursor(after, keys)
+            query = query.filter(position > (values[0] if len(keys) == 1 else values))
+    except ValueError:
+        abort(400)
+
+    if limit is None:
+        return Page(query.order_by(*keys).all())
+
+    # walk backwards from a before cursor, then restore the page order
+    if before is not None:
+        rows = query.order_by(*[key.desc() for key in keys]).limit(limit + 1).all()
+        has_more = len(rows) > limit
+        rows = rows[:limit][::-1]
+        return Page(rows,
+                    next_cursor=cursor_for(rows[-1]) if rows else None,
+                    prev_cursor=cursor_for(rows[0]) if has_more else None,
+                    limit=limit)
+
+    rows = query.order_by(*keys).limit(limit + 1).all()
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+    return Page(rows,
+                next_cursor=cursor_for(rows[-1]) if has_more else None,
+                prev_cursor=cursor_for(rows[0]) if after is not None and rows else None,
+                limit=limit)
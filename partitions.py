@@ -0,0 +1,213 @@
+#----------------------------------------------------------------------------#
+# Imports
+#----------------------------------------------------------------------------#
+
+import re
+from datetime import date, datetime
+from sqlalchemy import text
+from sqlalchemy.exc import OperationalError
+from models import db, Show
+
+#----------------------------------------------------------------------------#
+# Show partitions (Postgres).
+#
+# Migration 4d8b6f3a2e19 makes Show a table range-partitioned by start_time:
+# one partition per month (Show_2024_05), one per archived year (Show_2019)
+# and Show_default for shows outside all of them. Queries bounded on
+# start_time, like the upcoming lists and the shows listing, only scan the
+# partitions their range covers.
+#
+# `flask maintain-partitions` keeps the layout in shape, and is meant to run
+# daily or weekly:
+#
+# - it creates the monthly partitions of the coming months, moving any of
+#   their shows out of the default partition;
+# - it archives years that ended more than --archive-after months ago by
+#   merging their monthly partitions into one yearly partition, optionally
+#   on a cheaper --tablespace. Those shows stay in Show, so venue and artist
+#   pages still list them as past shows. The yearly table is built, loaded
+#   and indexed while Show stays readable and writable (only writes to that
+#   year's months wait); the exclusive lock on Show is held just to swap
+#   the months for the year. A swap that can't get its lock within
+#   SWAP_LOCK_TIMEOUT is rolled back and reported as postponed, to be
+#   retried on the next run;
+# - with --detach-after, it detaches partitions whose shows all started more
+#   than that many months ago. A detached partition keeps its rows as a
+#   standalone table, to dump or drop, but they leave Show and the pages.
+#   Its foreign keys to Venue and Artist are dropped, so venues and artists
+#   can still be deleted; its venue and artist ids may then point nowhere.
+#----------------------------------------------------------------------------#
+
+MONTH_PARTITION = re.compile(r'^Show_(\d{4})_(\d{2})$')
+YEAR_PARTITION = re.compile(r'^Show_(\d{4})$')
+DEFAULT_PARTITION = 'Show_default'
+
+# longest wait for the lock on Show when swapping in a yearly partition.
+# while the swap waits, new queries on Show queue behind it
+SWAP_LOCK_TIMEOUT = '5s'
+
+# Postgres error codes of a lock timeout and a deadlock
+LOCK_ERRORS = ('55P03', '40P01')
+
+# the partitions attached to Show
+PARTITIONS_QUERY = text(
+    'SELECT c.relname FROM pg_inherits i '
+    'JOIN pg_class c ON c.oid = i.inhrelid '
+    'WHERE i.inhparent = \'"Show"\'::regclass')
+
+
+# whether Show is partitioned: on Postgres, once migrated
+def partitioned():
+    if db.engine.dialect.name != 'postgresql':
+        return False
+    with db.engine.connect() as connection:
+        return connection.execute(text(
+            'SELECT EXISTS (SELECT 1 FROM pg_partitioned_table '
+            'WHERE partrelid = \'"Show"\'::regclass)')).scalar()
+
+
+# the first day of the month `offset` months after the month of day
+def add_months(day, offset):
+    months = day.year * 12 + day.month - 1 + offset
+    return date(months // 12, months % 12 + 1, 1)
+
+
+# {name: (start, end)} of the monthly and yearly partitions of Show
+def partitions(connection):
+    bounds = {}
+    for name, in connection.execute(PARTITIONS_QUERY):
+        month = MONTH_PARTITION.match(name)
+        year = YEAR_PARTITION.match(name)
+        if month:
+            start = date(int(month.group(1)), int(month.group(2)), 1)
+            bounds[name] = (start, add_months(start, 1))
+        elif year:
+            start = date(int(year.group(1)), 1, 1)
+            bounds[name] = (start, date(start.year + 1, 1, 1))
+    return bounds
+
+
+# {name: definition} of the foreign keys of table
+def _foreign_keys(connection, table):
+    return dict(connection.execute(text(
+        'SELECT conname, pg_get_constraintdef(oid) FROM pg_constraint '
+        "WHERE conrelid = CAST(:table AS regclass) AND contype = 'f'"),
+        {"table": '"%s"' % table}).fetchall())
+
+
+# creates table name with the columns, indexes and foreign keys of Show and
+# a check constraint proving its rows fall in [start, end), so attaching it
+# needs neither an index build nor a scan
+def _build_partition(connection, name, start, end, tablespace=None):
+    connection.execute(text(
+        'CREATE TABLE "%s" (LIKE "Show" INCLUDING DEFAULTS INCLUDING INDEXES)%s' % (
+            name, ' TABLESPACE "%s"' % tablespace if tablespace else '')))
+    for definition in _foreign_keys(connection, 'Show').values():
+        connection.execute(text('ALTER TABLE "%s" ADD %s' % (name, definition)))
+    connection.execute(text(
+        'ALTER TABLE "%s" ADD CONSTRAINT "%s_bounds" CHECK '
+        "(start_time >= '%s' AND start_time < '%s')" % (name, name, start, end)))
+
+
+# attaches table name, built by _build_partition, as the partition of Show
+# for [start, end)
+def _attach_partition(connection, name, start, end):
+    connection.execute(text(
+        'ALTER TABLE "Show" ATTACH PARTITION "%s" '
+        "FOR VALUES FROM ('%s') TO ('%s')" % (name, start, end)))
+    connection.execute(text(
+        'ALTER TABLE "%s" DROP CONSTRAINT "%s_bounds"' % (name, name)))
+
+
+# copies the shows of table source in [start, end) into table name
+def _copy_shows(connection, name, source, start=None, end=None):
+    columns = ', '.join('"%s"' % column.name for column in Show.__table__.columns)
+    where = ' WHERE start_time >= :start AND start_time < :end' if start else ''
+    connection.execute(text('INSERT INTO "%s" (%s) SELECT %s FROM "%s"%s' % (
+        name, columns, columns, source, where)), {"start": start, "end": end})
+
+
+# creates partition name of Show for [start, end) and attaches it, with the
+# default partition's shows in that range
+def _create_partition(connection, name, start, end):
+    _build_partition(connection, name, start, end)
+    _copy_shows(connection, name, DEFAULT_PARTITION, start, end)
+    connection.execute(text(
+        'DELETE FROM "%s" WHERE start_time >= :start AND start_time < :end' % (
+            DEFAULT_PARTITION)), {"start": start, "end": end})
+    _attach_partition(connection, name, start, end)
+
+
+# merges the monthly partitions months into the yearly partition of year.
+# writes to those months wait from the start so the copy stays complete;
+# the rest of Show is only locked for the swap at the end
+def _archive_year(connection, year, months, tablespace=None):
+    name = 'Show_%04d' % year
+    start, end = date(year, 1, 1), date(year + 1, 1, 1)
+    for month in months:
+        connection.execute(text('LOCK TABLE "%s" IN SHARE MODE' % month))
+
+    _build_partition(connection, name, start, end, tablespace=tablespace)
+    for month in months:
+        _copy_shows(connection, name, month)
+
+    connection.execute(text("SET LOCAL lock_timeout = '%s'" % SWAP_LOCK_TIMEOUT))
+    for month in months:
+        connection.execute(text('DROP TABLE "%s"' % month))
+    _attach_partition(connection, name, start, end)
+    return name
+
+
+# creates, archives and detaches partitions as described above, as of
+# today, and returns the names of the partitions created, archived,
+# postponed (archives whose swap timed out) and detached. each step, and
+# each archived year, runs in its own transaction
+def maintain_partitions(ahead=3, archive_after=None, detach_after=None,
+                        tablespace=None, today=None):
+    if today is None:
+        today = datetime.now().date()
+    this_month = add_months(today, 0)
+    done = {"created": [], "archived": [], "postponed": [], "detached": []}
+
+    with db.engine.begin() as connection:
+        existing = partitions(connection)
+        for offset in range(ahead + 1):
+            start = add_months(this_month, offset)
+            name = 'Show_%04d_%02d' % (start.year, start.month)
+            if name not in existing:
+                _create_partition(connection, name, start, add_months(start, 1))
+                done['created'].append(name)
+
+    if archive_after is not None:
+        cutoff = add_months(this_month, -archive_after)
+        with db.engine.connect() as connection:
+            existing = partitions(connection)
+        years = sorted({start.year for name, (start, end) in existing.items()
+                        if MONTH_PARTITION.match(name) and
+                        date(start.year + 1, 1, 1) <= cutoff})
+        for year in years:
+            months = sorted(name for name, (start, end) in existing.items()
+                            if MONTH_PARTITION.match(name) and start.year == year)
+            try:
+                with db.engine.begin() as connection:
+                    done['archived'].append(_archive_year(
+                        connection, year, months, tablespace=tablespace))
+            except OperationalError as e:
+                if getattr(e.orig, 'pgcode', None) not in LOCK_ERRORS:
+                    raise
+                # the year was rolled back as a whole
+                done['postponed'].append('Show_%04d' % year)
+
+    if detach_after is not None:
+        cutoff = add_months(this_month, -detach_after)
+        with db.engine.begin() as connection:
+            for name, (start, end) in sorted(partitions(connection).items()):
+                if end <= cutoff:
+                    connection.execute(text(
+                        'ALTER TABLE "Show" DETACH PARTITION "%s"' % name))
+                    for key in _foreign_keys(connection, name):
+                        connection.execute(text(
+                            'ALTER TABLE "%s" DROP CONSTRAINT "%s"' % (name, key)))
+                    done['detached'].append(name)
+
+    return done
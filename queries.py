@@ -0,0 +1,321 @@
+#----------------------------------------------------------------------------#
+# Imports
+#----------------------------------------------------------------------------#
+
+from datetime import datetime, timezone
+from itertools import groupby
+from sqlalchemy import func
+from models import db, Venue, Artist, Show
+from pagination import paginate
+
+#----------------------------------------------------------------------------#
+# Venues.
+#----------------------------------------------------------------------------#
+
+# returns a page of venues grouped by city/state with the number of upcoming
+# shows for each venue, all from a single query. venues are paged in
+# (state, city, id) order, so each area's venues are adjacent and an area
+# only continues onto the next page where the page ends inside it
+
+
+def venue_areas(after=None, before=None, limit=None):
+    # one row per venue, with its maintained upcoming show counter
+    query = db.session.query(
+        Venue.city,
+        Venue.state,
+        Venue.id,
+        Venue.name,
+        Venue.upcoming_shows_count.label('num_upcoming_shows')
+    )
+    page = paginate(query, [Venue.state, Venue.city, Venue.id],
+                    after=after, before=before, limit=limit)
+
+    # build the areas in one pass over the ordered rows
+    data = []
+    for (city, state), venues in groupby(page.items, key=lambda row: (row.city, row.state)):
+        data.append({
+            "city": city,
+            "state": state,
+            "venues": [{
+                "id": venue.id,
+                "name": venue.name,
+                "num_upcoming_shows": venue.num_upcoming_shows
+            } for venue in venues]
+        })
+
+    page.items = data
+    return page
+
+
+# returns the venue page data for venue_id, or None if there is no such venue.
+# the venue is fetched in one statement and its shows, joined with the
+# performing artist, in a second one; past and upcoming are split in SQL
+# against a single timestamp so every show lands in exactly one list
+
+
+def venue_detail(venue_id, now=None):
+    if now is None:
+        now = datetime.now()
+
+    venue = Venue.query.get(venue_id)
+    if venue is None:
+        return None
+
+    shows = db.session.query(
+        Show.artist_id,
+        Artist.name.label('artist_name'),
+        Artist.image_link.label('artist_image_link'),
+        Show.start_time,
+        (Show.start_time > now).label('upcoming')
+    ).join(Artist, Artist.id == Show.artist_id).filter(
+        Show.venue_id == venue_id
+    ).order_by(Show.start_time).all()
+
+    past_shows, upcoming_shows = _split_shows(shows, {
+        "artist_id": 'artist_id',
+        "artist_name": 'artist_name',
+        "artist_image_link": 'artist_image_link'
+    })
+
+    return {
+        "id": venue.id,
+        "name": venue.name,
+        "genres": venue.genres,
+        "address": venue.address,
+        "city": venue.city,
+        "state": venue.state,
+        "phone": venue.phone,
+        "website": venue.website,
+        "facebook_link": venue.facebook_link,
+        "seeking_talent": venue.seeking_talent,
+        "seeking_description": venue.seeking_description,
+        "image_link": venue.image_link,
+        "past_shows": past_shows,
+        "upcoming_shows": upcoming_shows,
+        "past_shows_count": len(past_shows),
+        "upcoming_shows_count": len(upcoming_shows)
+    }
+
+#----------------------------------------------------------------------------#
+# Artists.
+#----------------------------------------------------------------------------#
+
+# returns a page of artist ids and names, ordered by id
+
+
+def artist_list(after=None, before=None, limit=None):
+    query = db.session.query(Artist.id, Artist.name)
+    page = paginate(query, [Artist.id], after=after, before=before, limit=limit)
+    page.items = [{"id": row.id, "name": row.name} for row in page.items]
+    return page
+
+
+# returns the artist page data for artist_id, or None if there is no such
+# artist. same two-statement shape as venue_detail()
+
+
+def artist_detail(artist_id, now=None):
+    if now is None:
+        now = datetime.now()
+
+    artist = Artist.query.get(artist_id)
+    if artist is None:
+        return None
+
+    shows = db.session.query(
+        Show.venue_id,
+        Venue.name.label('venue_name'),
+        Venue.image_link.label('venue_image_link'),
+        Show.start_time,
+        (Show.start_time > now).label('upcoming')
+    ).join(Venue, Venue.id == Show.venue_id).filter(
+        Show.artist_id == artist_id
+    ).order_by(Show.start_time).all()
+
+    past_shows, upcoming_shows = _split_shows(shows, {
+        "venue_id": 'venue_id',
+        "venue_name": 'venue_name',
+        "venue_image_link": 'venue_image_link'
+    })
+
+    return {
+        "id": artist.id,
+        "name": artist.name,
+        "genres": artist.genres,
+        "city": artist.city,
+        "state": artist.state,
+        "phone": artist.phone,
+        "website": artist.website,
+        "facebook_link": artist.facebook_link,
+        "seeking_venue": artist.seeking_venue,
+        "seeking_description": artist.seeking_description,
+        "image_link": artist.image_link,
+        "past_shows": past_shows,
+        "upcoming_shows": upcoming_shows,
+        "past_shows_count": len(past_shows),
+        "upcoming_shows_count": len(upcoming_shows)
+    }
+
+#----------------------------------------------------------------------------#
+# Shows.
+#----------------------------------------------------------------------------#
+
+# returns a page of shows ordered by start time, each joined with its venue
+# and artist in the same statement. start and end bound start_time (end is
+# exclusive), and venue_id, artist_id and city narrow the shows down; each
+# filter is a range scan on one of the start_time indexes
+
+
+def show_list(after=None, before=None, limit=None, start=None, end=None,
+              venue_id=None, artist_id=None, city=None):
+    query = db.session.query(
+        Show.id,
+        Show.start_time,
+        Show.venue_id,
+        Venue.name.label('venue_name'),
+        Show.artist_id,
+        Artist.name.label('artist_name'),
+        Artist.image_link.label('artist_image_link')
+    ).join(Venue, Venue.id == Show.venue_id).join(
+        Artist, Artist.id == Show.artist_id)
+    if start is not None:
+        query = query.filter(Show.start_time >= start)
+    if end is not None:
+        query = query.filter(Show.start_time < end)
+    if venue_id is not None:
+        query = query.filter(Show.venue_id == venue_id)
+    if artist_id is not None:
+        query = query.filter(Show.artist_id == artist_id)
+    if city is not None:
+        query = query.filter(Venue.city == city)
+    page = paginate(query, [Show.start_time, Show.id],
+                    after=after, before=before, limit=limit)
+    page.items = [{
+        "venue_id": row.venue_id,
+        "venue_name": row.venue_name,
+        "artist_id": row.artist_id,
+        "artist_name": row.artist_name,
+        "artist_image_link": row.artist_image_link,
+        "start_time": row.start_time
+    } for row in page.items]
+    return page
+
+#----------------------------------------------------------------------------#
+# Versions.
+#
+# Each returns (parts, last_modified) for a page in one aggregate query:
+# parts changes whenever the rendered page would, and last_modified is the
+# latest of those changes in UTC. Detail versions return None for unknown
+# ids.
+#----------------------------------------------------------------------------#
+
+# version of the venue page: the venue, its shows and their artists, and
+# how many of the shows are still upcoming
+
+
+def venue_version(venue_id, now=None):
+    if now is None:
+        now = datetime.now()
+
+    row = db.session.query(
+        Venue.updated_at,
+        func.max(Show.updated_at),
+        func.max(Artist.updated_at),
+        func.count(Show.id),
+        func.count(Show.id).filter(Show.start_time > now),
+        func.max(Show.start_time).filter(Show.start_time <= now)
+    ).outerjoin(Show, Show.venue_id == Venue.id).outerjoin(
+        Artist, Artist.id == Show.artist_id
+    ).filter(Venue.id == venue_id).group_by(Venue.id, Venue.updated_at).first()
+
+    if row is None:
+        return None
+    return _version(row, row[:3], started=row[5])
+
+
+# version of the artist page, as venue_version()
+def artist_version(artist_id, now=None):
+    if now is None:
+        now = datetime.now()
+
+    row = db.session.query(
+        Artist.updated_at,
+        func.max(Show.updated_at),
+        func.max(Venue.updated_at),
+        func.count(Show.id),
+        func.count(Show.id).filter(Show.start_time > now),
+        func.max(Show.start_time).filter(Show.start_time <= now)
+    ).outerjoin(Show, Show.artist_id == Artist.id).outerjoin(
+        Venue, Venue.id == Show.venue_id
+    ).filter(Artist.id == artist_id).group_by(Artist.id, Artist.updated_at).first()
+
+    if row is None:
+        return None
+    return _version(row, row[:3], started=row[5])
+
+
+# version of the venue listing
+def venues_version():
+    row = db.session.query(
+        func.max(Venue.updated_at), func.count(Venue.id)).one()
+    return _version(row, row[:1])
+
+
+# version of the artist listing
+def artists_version():
+    row = db.session.query(
+        func.max(Artist.updated_at), func.count(Artist.id)).one()
+    return _version(row, row[:1])
+
+
+# version of the show listing, which also shows venue and artist names and
+# by default only lists the shows that haven't started
+def shows_version(now=None):
+    if now is None:
+        now = datetime.now()
+
+    row = db.session.query(
+        db.session.query(func.max(Show.updated_at)).scalar_subquery(),
+        db.session.query(func.max(Venue.updated_at)).scalar_subquery(),
+        db.session.query(func.max(Artist.updated_at)).scalar_subquery(),
+        db.session.query(func.count(Show.id)).scalar_subquery(),
+        db.session.query(func.max(Show.start_time)).filter(
+            Show.start_time <= now).scalar_subquery()
+    ).one()
+    return _version(row, row[:3], started=row[4])
+
+
+# builds (parts, last_modified) from a version row, its updated_at values
+# (UTC) and the start time of the latest show that has begun (local time,
+# as elsewhere in the app), since that changed the past/upcoming split
+
+
+def _version(row, updated, started=None):
+    times = [value.replace(tzinfo=timezone.utc)
+             for value in updated if value is not None]
+    if started is not None:
+        times.append(started.astimezone(timezone.utc))
+    return tuple(row), max(times) if times else None
+
+#----------------------------------------------------------------------------#
+# Helpers.
+#----------------------------------------------------------------------------#
+
+# splits joined show rows into (past, upcoming) lists of template dicts,
+# using the `upcoming` flag computed by the query. fields maps template
+# keys to row attributes
+
+
+def _split_shows(rows, fields):
+    past = []
+    upcoming = []
+
+    for row in rows:
+        show = {key: getattr(row, attr) for key, attr in fields.items()}
+        show['start_time'] = row.start_time
+        if row.upcoming:
+            upcoming.append(show)
+        else:
+            past.append(show)
+
+    return past, upcoming
@@ -0,0 +1,195 @@
+#----------------------------------------------------------------------------#
+# Imports
+#----------------------------------------------------------------------------#
+
+import random
+import threading
+import time
+from flask import current_app, g, request, session, has_request_context
+from flask_sqlalchemy import SQLAlchemy, SignallingSession
+from sqlalchemy import create_engine, event, orm, text
+
+#----------------------------------------------------------------------------#
+# Read replicas.
+#
+# With DB_REPLICA_URIS set, requests that only read are served from a
+# healthy replica: GET and HEAD requests and the search forms. Requests
+# that write, the create_*, edit_* and delete_* views, flushes and
+# everything outside a request (CLI commands) use the primary. After a
+# write, the client reads from the primary for DB_READ_YOUR_WRITES seconds,
+# so the redirect that follows shows the change.
+#
+# Replicas are checked at most every DB_REPLICA_CHECK_INTERVAL seconds when
+# chosen, in a background thread. One that can't be reached, or that
+# replays more than DB_REPLICA_MAX_LAG seconds behind the primary, is
+# skipped until it recovers; with no healthy replica, reads go to the
+# primary. Pages cached from a replica can therefore be up to
+# DB_REPLICA_MAX_LAG seconds old.
+#----------------------------------------------------------------------------#
+
+# endpoints that always use the primary, by view name prefix
+PRIMARY_VIEWS = ('create_', 'edit_', 'delete_')
+
+# endpoints that only read, although they are POSTed
+READ_ONLY_VIEWS = ('search_venues', 'search_artists')
+
+SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS')
+
+# seconds of replay lag of a Postgres standby; 0 when it has replayed
+# everything it received, since the last replay time ages while the
+# primary is idle
+PG_LAG_QUERY = text(
+    'SELECT CASE WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() '
+    'THEN 0 ELSE extract(epoch FROM now() - pg_last_xact_replay_timestamp()) '
+    'END')
+
+
+class Replica:
+
+    def __init__(self, engine):
+        self.engine = engine
+        self.healthy = True
+        self.checked = 0.0
+        self.lag = None
+        self.error = None
+
+        # a dropped connection takes the replica out until its next check
+        @event.listens_for(engine, 'handle_error')
+        def _handle_error(context):
+            if context.is_disconnect:
+                self.healthy = False
+
+    # connects and measures the replication lag
+    def check(self, max_lag):
+        try:
+            with self.engine.connect() as connection:
+                if self.engine.dialect.name == 'postgresql':
+                    self.lag = float(connection.execute(PG_LAG_QUERY).scalar() or 0)
+                else:
+                    connection.execute(text('SELECT 1'))
+                    self.lag = 0.0
+            self.healthy = max_lag is None or self.lag <= max_lag
+            self.error = None if self.healthy else 'lagging'
+        except Exception as e:
+            self.healthy = False
+            self.error = str(e).splitlines()[0]
+        self.checked = time.monotonic()
+
+    def stats(self):
+        pool = self.engine.pool
+        return {
+            "healthy": self.healthy,
+            "lag_seconds": self.lag,
+            "error": self.error,
+            "pool": pool.stats() if hasattr(pool, 'stats') else pool.status()
+        }
+
+
+class ReplicaSet:
+
+    def __init__(self, replicas, check_interval, max_lag):
+        self.replicas = replicas
+        self.check_interval = check_interval
+        self.max_lag = max_lag
+        self.lock = threading.Lock()
+
+    # returns the engine of a random healthy replica, or None. replicas due
+    # a check are checked in the background, so requests never wait on a
+    # replica that is down; until then their last known health counts
+    def choose(self):
+        now = time.monotonic()
+        with self.lock:
+            due = [replica for replica in self.replicas
+                   if now - replica.checked >= self.check_interval]
+            # claimed here, so each replica has one check running at a time
+            for replica in due:
+                replica.checked = now
+        for replica in due:
+            threading.Thread(target=replica.check, args=(self.max_lag,),
+                             daemon=True).start()
+        healthy = [replica for replica in self.replicas if replica.healthy]
+        return random.choice(healthy).engine if healthy else None
+
+    # by URL, with the password masked
+    def stats(self):
+        return {repr(replica.engine.url): replica.stats()
+                for replica in self.replicas}
+
+
+# gives app engines for its DB_REPLICA_URIS, with the pool settings of the
+# primary. engine_options(config) builds the engine options for a config
+
+
+def init_app(app, engine_options):
+    replicas = []
+    for uri in app.config.get('DB_REPLICA_URIS') or ():
+        options = engine_options(dict(app.config, SQLALCHEMY_DATABASE_URI=uri))
+        if uri.startswith('postgresql'):
+            # a replica that is down should fail its check quickly
+            options.setdefault('connect_args', {}).setdefault('connect_timeout', 2)
+        replicas.append(Replica(create_engine(uri, **options)))
+    app.extensions['replicas'] = ReplicaSet(
+        replicas,
+        app.config.get('DB_REPLICA_CHECK_INTERVAL', 10),
+        app.config.get('DB_REPLICA_MAX_LAG'))
+    app.after_request(_pin_writers)
+
+
+# health and lag of every replica of the current app
+def replica_stats():
+    return current_app.extensions['replicas'].stats()
+
+#----------------------------------------------------------------------------#
+# Routing.
+#----------------------------------------------------------------------------#
+
+# whether the current request may read from a replica
+
+
+def _reads_from_replica():
+    view = (request.endpoint or '').rpartition('.')[2]
+    if view.startswith(PRIMARY_VIEWS):
+        return False
+    if request.method not in SAFE_METHODS and view not in READ_ONLY_VIEWS:
+        return False
+    return session.get('db_primary_until', 0) <= time.time()
+
+
+# the replica engine for the current request, or None for the primary. the
+# choice is made once per request
+def replica_engine():
+    if not has_request_context():
+        return None
+    if 'db_replica' not in g:
+        replicas = current_app.extensions.get('replicas')
+        g.db_replica = None
+        if replicas is not None and replicas.replicas and _reads_from_replica():
+            g.db_replica = replicas.choose()
+    return g.db_replica
+
+
+# sends the client to the primary for a while after it writes
+def _pin_writers(response):
+    view = (request.endpoint or '').rpartition('.')[2]
+    if request.method not in SAFE_METHODS and view not in READ_ONLY_VIEWS:
+        seconds = current_app.config.get('DB_READ_YOUR_WRITES', 5)
+        if seconds and current_app.extensions['replicas'].replicas:
+            session['db_primary_until'] = time.time() + seconds
+    return response
+
+
+# session that reads from the request's replica, and flushes to the primary
+class RoutingSession(SignallingSession):
+
+    def get_bind(self, mapper=None, clause=None):
+        if not self._flushing:
+            engine = replica_engine()
+            if engine is not None:
+                return engine
+        return super().get_bind(mapper, clause)
+
+
+class RoutingSQLAlchemy(SQLAlchemy):
+
+    def create_session(self, options):
+        return orm.sessionmaker(class_=RoutingSession, db=self, **options)
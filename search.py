@@ -0,0 +1,314 @@
+#----------------------------------------------------------------------------#
+# Imports
+#----------------------------------------------------------------------------#
+
+import re
+import threading
+from bisect import bisect_left
+from flask import current_app
+from sqlalchemy import DDL, event, func, text
+from models import db, Venue, Artist
+
+#----------------------------------------------------------------------------#
+# Search.
+#
+# On Postgres, Venue and Artist carry a trigger-maintained `search_vector`
+# tsvector over name, genres, city and state, with a GIN index on it and a
+# trigram index on name. Searches are ranked with ts_rank plus name
+# similarity. Any other database falls back to an in-process inverted index
+# that is kept in step with committed changes.
+#
+# The fallback index is per process: each worker loads it on its first
+# search and then only sees the changes committed through its own session.
+# Writes made by other workers, and bulk loads (`flask import`, `flask
+# seed`), show up in a worker's results once it restarts. It is meant for
+# development and tests on SQLite, with a single process.
+#----------------------------------------------------------------------------#
+
+# default page size for search results
+RESULTS_PER_PAGE = 20
+
+# relative weight of a match in each field, highest first
+FIELD_WEIGHTS = (('name', 4), ('genres', 2), ('city', 1), ('state', 1))
+
+TOKEN_RE = re.compile(r'\w+', re.UNICODE)
+
+
+# splits text into lowercase search tokens
+def tokenize(value):
+    return TOKEN_RE.findall(value.lower()) if value else []
+
+#----------------------------------------------------------------------------#
+# Postgres schema.
+#----------------------------------------------------------------------------#
+
+# keeps search_vector in step with name, genres, city and state. both are
+# formatted with the table name. migration 8e41b6f0c2d5 keeps a frozen
+# copy, so a change here needs a new revision as well
+TRIGGER_FUNCTION = '''CREATE OR REPLACE FUNCTION "{0}_search_vector_update"() RETURNS trigger AS $$
+BEGIN
+    NEW.search_vector :=
+        setweight(to_tsvector('simple', coalesce(NEW.name, '')), 'A') ||
+        setweight(to_tsvector('simple',
+            array_to_string(coalesce(NEW.genres, '{{}}'), ' ')), 'B') ||
+        setweight(to_tsvector('simple',
+            coalesce(NEW.city, '') || ' ' || coalesce(NEW.state, '')), 'C');
+    RETURN NEW;
+END
+$$ LANGUAGE plpgsql'''
+
+TRIGGER = '''CREATE TRIGGER "{0}_search_vector_trigger"
+BEFORE INSERT OR UPDATE ON "{0}"
+FOR EACH ROW EXECUTE PROCEDURE "{0}_search_vector_update"()'''
+
+
+# creates the search column, its trigger and the indexes for a table, as
+# migration 8e41b6f0c2d5 does
+
+
+def search_ddl(table):
+    return [
+        'CREATE EXTENSION IF NOT EXISTS pg_trgm',
+        'ALTER TABLE "{0}" ADD COLUMN search_vector tsvector',
+        TRIGGER_FUNCTION,
+        TRIGGER,
+        'UPDATE "{0}" SET search_vector = NULL',
+        'CREATE INDEX "ix_{0}_search_vector" ON "{0}" USING gin (search_vector)',
+        'CREATE INDEX "ix_{0}_name_trgm" ON "{0}" USING gin (name gin_trgm_ops)',
+    ]
+
+
+# tables created with db.create_all() get the same search schema
+for model in (Venue, Artist):
+    for statement in search_ddl(model.__tablename__):
+        event.listen(model.__table__, 'after_create', DDL(
+            statement.format(model.__tablename__).replace('%', '%%')
+        ).execute_if(dialect='postgresql'))
+
+# ranked page of matches with the total match count on every row
+PG_SEARCH = '''
+SELECT id, name, total FROM (
+    SELECT id, name,
+           ts_rank(search_vector, query) + similarity(name, :term) AS rank,
+           count(*) OVER () AS total
+    FROM "{table}", to_tsquery('simple', :tsquery) AS query
+    WHERE search_vector @@ query OR name ILIKE :pattern
+) AS matches
+ORDER BY rank DESC, name
+LIMIT :limit OFFSET :offset
+'''
+
+
+# returns (total, [(id, name)]) for one page of Postgres matches
+def _pg_search(model, tokens, term, limit, offset):
+    if not tokens:
+        return _all_search(model, limit, offset)
+
+    # every token must match, the last one as a prefix
+    tsquery = ' & '.join(tokens[:-1] + [tokens[-1] + ':*'])
+    pattern = '%' + re.sub(r'([\\%_])', r'\\\1', term) + '%'
+
+    rows = db.session.execute(text(PG_SEARCH.format(table=model.__tablename__)), {
+        "term": term,
+        "tsquery": tsquery,
+        "pattern": pattern,
+        "limit": limit,
+        "offset": offset
+    }).fetchall()
+
+    total = rows[0].total if rows else 0
+    return total, [(row.id, row.name) for row in rows]
+
+
+# returns (total, [(id, name)]) for a page of every entity, by name
+def _all_search(model, limit, offset):
+    total = db.session.query(func.count(model.id)).scalar()
+    rows = db.session.query(model.id, model.name).order_by(
+        model.name, model.id).limit(limit).offset(offset).all()
+    return total, [(row.id, row.name) for row in rows]
+
+#----------------------------------------------------------------------------#
+# In-process index.
+#----------------------------------------------------------------------------#
+
+# inverted index over the search fields of one model
+
+
+class SearchIndex:
+
+    def __init__(self, model):
+        self.model = model
+        self.lock = threading.Lock()
+        self.loaded = False
+        # token -> {id: weight}
+        self.postings = {}
+        # id -> (name, tokens)
+        self.entries = {}
+        # sorted tokens for prefix lookups, rebuilt lazily
+        self.tokens = None
+
+    # returns the (name, {token: weight}) entry indexed for an entity
+    @staticmethod
+    def entry(entity):
+        weights = {}
+        for field, weight in FIELD_WEIGHTS:
+            value = getattr(entity, field)
+            if isinstance(value, (list, tuple)):
+                value = ' '.join(value)
+            for token in tokenize(value):
+                weights[token] = max(weights.get(token, 0), weight)
+        return entity.name, weights
+
+    # indexes (or re-indexes) one entity from its entry
+    def add(self, entity_id, entry):
+        with self.lock:
+            self._add(entity_id, entry)
+
+    def _add(self, entity_id, entry):
+        self._remove(entity_id)
+        name, weights = entry
+        for token, weight in weights.items():
+            if token not in self.postings:
+                self.postings[token] = {}
+                self.tokens = None
+            self.postings[token][entity_id] = weight
+        self.entries[entity_id] = (name, list(weights))
+
+    def remove(self, entity_id):
+        with self.lock:
+            self._remove(entity_id)
+
+    def _remove(self, entity_id):
+        entry = self.entries.pop(entity_id, None)
+        if entry is None:
+            return
+        for token in entry[1]:
+            posting = self.postings[token]
+            posting.pop(entity_id, None)
+            if not posting:
+                del self.postings[token]
+                self.tokens = None
+
+    # loads every entity from the database on first use
+    def load(self):
+        with self.lock:
+            if self.loaded:
+                return
+            for entity in self.model.query.yield_per(1000):
+                self._add(entity.id, self.entry(entity))
+            self.loaded = True
+
+    # returns {id: weight} for entities with a token starting with prefix
+    def _prefix_matches(self, prefix):
+        if self.tokens is None:
+            self.tokens = sorted(self.postings)
+        matches = {}
+        i = bisect_left(self.tokens, prefix)
+        while i < len(self.tokens) and self.tokens[i].startswith(prefix):
+            for entity_id, weight in self.postings[self.tokens[i]].items():
+                matches[entity_id] = max(matches.get(entity_id, 0), weight)
+            i += 1
+        return matches
+
+    # returns (total, [(id, name)]) for one page of ranked matches
+    def search(self, tokens, limit, offset):
+        self.load()
+        with self.lock:
+            if not tokens:
+                ranked = sorted(self.entries.items(),
+                                key=lambda item: (item[1][0], item[0]))
+                return len(ranked), [(entity_id, entry[0])
+                                     for entity_id, entry in ranked[offset:offset + limit]]
+
+            # every token must match, the last one as a prefix
+            scores = None
+            for i, token in enumerate(tokens):
+                if i == len(tokens) - 1:
+                    matches = self._prefix_matches(token)
+                else:
+                    matches = self.postings.get(token, {})
+                if scores is None:
+                    scores = dict(matches)
+                else:
+                    scores = {entity_id: score + matches[entity_id]
+                              for entity_id, score in scores.items()
+                              if entity_id in matches}
+                if not scores:
+                    return 0, []
+
+            ranked = sorted(scores.items(), key=lambda item: (
+                -item[1], self.entries[item[0]][0], item[0]))
+            return len(ranked), [(entity_id, self.entries[entity_id][0])
+                                 for entity_id, _ in ranked[offset:offset + limit]]
+
+
+indexes = {Venue: SearchIndex(Venue), Artist: SearchIndex(Artist)}
+
+
+# collects entries for indexed entities changed by a flush. they are applied
+# once the transaction commits, since no SQL can run in after_commit
+@event.listens_for(db.session, 'after_flush')
+def _collect_changes(session, flush_context):
+    changes = session.info.setdefault('search_changes', {})
+    for entity in list(session.new) + list(session.dirty):
+        if type(entity) in indexes:
+            changes[(type(entity), entity.id)] = SearchIndex.entry(entity)
+    for entity in session.deleted:
+        if type(entity) in indexes:
+            changes[(type(entity), entity.id)] = None
+
+
+@event.listens_for(db.session, 'after_commit')
+def _apply_changes(session):
+    changes = session.info.pop('search_changes', {})
+    for (model, entity_id), entry in changes.items():
+        index = indexes[model]
+        if not index.loaded:
+            continue
+        if entry is None:
+            index.remove(entity_id)
+        else:
+            index.add(entity_id, entry)
+
+
+@event.listens_for(db.session, 'after_rollback')
+def _discard_changes(session):
+    session.info.pop('search_changes', None)
+
+#----------------------------------------------------------------------------#
+# Entry point.
+#----------------------------------------------------------------------------#
+
+# searches venues or artists for term and returns the search page results:
+# {"count", "page", "pages", "data": [{"id", "name", "num_upcoming_shows"}]}
+
+
+def search(model, term, page=1, per_page=None):
+    if per_page is None:
+        per_page = current_app.config.get('SEARCH_RESULTS_PER_PAGE', RESULTS_PER_PAGE)
+    page = max(page, 1)
+    offset = (page - 1) * per_page
+    term = term.strip()
+    tokens = tokenize(term)
+
+    if db.engine.dialect.name == 'postgresql':
+        total, matches = _pg_search(model, tokens, term, per_page, offset)
+    else:
+        total, matches = indexes[model].search(tokens, per_page, offset)
+
+    # maintained upcoming show counters for this page only
+    counts = {}
+    if matches:
+        counts = dict(db.session.query(model.id, model.upcoming_shows_count).filter(
+            model.id.in_([entity_id for entity_id, _ in matches])).all())
+
+    return {
+        "count": total,
+        "page": page,
+        "pages": max((total + per_page - 1) // per_page, 1),
+        "data": [{
+            "id": entity_id,
+            "name": name,
+            "num_upcoming_shows": counts.get(entity_id, 0)
+        } for entity_id, name in matches]
+    }
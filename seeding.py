@@ -0,0 +1,187 @@
+#----------------------------------------------------------------------------#
+# Imports
+#----------------------------------------------------------------------------#
+
+import random
+from datetime import datetime, timedelta
+from sqlalchemy import func
+from forms import VenueForm
+from models import db, Venue, Artist, Show
+from counters import reconcile_show_counts
+
+#----------------------------------------------------------------------------#
+# Synthetic data.
+#
+# seed_catalog() fills the database with venues, artists and shows that
+# look like real traffic: venues and artists are clustered in a weighted set
+# of US cities, a few popular artists and venues get most of the shows, and
+# show times fall mostly on weekend evenings, two thirds in the past year
+# and the rest over the next six months. The same seed always produces the
+# same data relative to `today`.
+#----------------------------------------------------------------------------#
+
+# rows generated and inserted at a time, so memory stays flat
+BATCH_SIZE = 5000
+
+# (city, state, area code, relative weight)
+CITIES = [
+    ('New York', 'NY', '212', 20),
+    ('Los Angeles', 'CA', '213', 16),
+    ('Chicago', 'IL', '312', 10),
+    ('Nashville', 'TN', '615', 9),
+    ('Austin', 'TX', '512', 9),
+    ('San Francisco', 'CA', '415', 8),
+    ('Seattle', 'WA', '206', 6),
+    ('New Orleans', 'LA', '504', 6),
+    ('Atlanta', 'GA', '404', 5),
+    ('Denver', 'CO', '303', 5),
+    ('Portland', 'OR', '503', 4),
+    ('Boston', 'MA', '617', 4),
+    ('Philadelphia', 'PA', '215', 4),
+    ('Detroit', 'MI', '313', 3),
+    ('Minneapolis', 'MN', '612', 3),
+    ('Memphis', 'TN', '901', 3),
+    ('Miami', 'FL', '305', 3),
+    ('Washington', 'DC', '202', 3),
+    ('Kansas City', 'MO', '816', 2),
+    ('Asheville', 'NC', '828', 1),
+]
+
+# the genres offered by the venue and artist forms
+GENRES = [value for value, _ in VenueForm.genres.kwargs['choices']]
+
+VENUE_WORDS = ['Blue', 'Velvet', 'Crystal', 'Iron', 'Golden', 'Red', 'Silver',
+               'Midnight', 'Electric', 'Lucky', 'Copper', 'Rusty', 'Neon']
+VENUE_KINDS = ['Room', 'Lounge', 'Hall', 'Tavern', 'Theatre', 'Club',
+               'Ballroom', 'Saloon', 'Garage', 'Cellar', 'Loft']
+ARTIST_WORDS = ['Wild', 'Quiet', 'Broken', 'Northern', 'Paper', 'Howling',
+                'Little', 'Static', 'Velvet', 'Hollow', 'Bright', 'Young']
+ARTIST_NOUNS = ['Wolves', 'Petals', 'Engines', 'Rivers', 'Saints', 'Ghosts',
+                'Lanterns', 'Horses', 'Tides', 'Sparrows', 'Machines']
+STREETS = ['Main St', 'Broadway', 'Market St', '2nd Ave', 'Elm St',
+           'Mission St', 'Sunset Blvd', 'Church St', 'Water St']
+
+
+def _cities(rng, n):
+    return rng.choices(CITIES, weights=[city[3] for city in CITIES], k=n)
+
+
+def _genres(rng):
+    return rng.sample(GENRES, rng.choice((1, 1, 2, 2, 3)))
+
+
+def _phone(rng, area_code):
+    return '%s-555-01%02d' % (area_code, rng.randint(0, 99))
+
+
+def _venue(rng, i, city):
+    name = '%s %s' % (rng.choice(VENUE_WORDS), rng.choice(VENUE_KINDS))
+    seeking = rng.random() < 0.3
+    return {
+        "name": '%s %d' % (name, i),
+        "city": city[0],
+        "state": city[1],
+        "address": '%d %s' % (rng.randint(1, 3000), rng.choice(STREETS)),
+        "phone": _phone(rng, city[2]),
+        "genres": _genres(rng),
+        "image_link": 'https://images.example.com/venues/%d.jpg' % i,
+        "website": 'https://venue%d.example.com' % i,
+        "facebook_link": 'https://www.facebook.com/venue%d' % i,
+        "seeking_talent": seeking,
+        "seeking_description": 'Looking for local acts.' if seeking else None
+    }
+
+
+def _artist(rng, i, city):
+    name = 'The %s %s' % (rng.choice(ARTIST_WORDS), rng.choice(ARTIST_NOUNS))
+    seeking = rng.random() < 0.4
+    return {
+        "name": '%s %d' % (name, i),
+        "city": city[0],
+        "state": city[1],
+        "phone": _phone(rng, city[2]),
+        "genres": _genres(rng),
+        "image_link": 'https://images.example.com/artists/%d.jpg' % i,
+        "website": 'https://artist%d.example.com' % i,
+        "facebook_link": 'https://www.facebook.com/artist%d' % i,
+        "seeking_venue": seeking,
+        "seeking_description": 'Touring next season.' if seeking else None
+    }
+
+
+# a show start time: two thirds in the past year, the rest in the next six
+# months, mostly Thursday to Saturday evenings, on the hour or half hour
+def _start_time(rng, today):
+    if rng.random() < 2 / 3:
+        day = today - timedelta(days=rng.randint(1, 365))
+    else:
+        day = today + timedelta(days=rng.randint(0, 182))
+    # move most early-week shows to Thursday, Friday or Saturday
+    if day.weekday() < 3 and rng.random() < 0.6:
+        day += timedelta(days=rng.randint(3, 5) - day.weekday())
+    hour = rng.choices([12, 15, 18, 19, 20, 21, 22],
+                       weights=[1, 1, 3, 5, 6, 5, 3])[0]
+    return day.replace(hour=hour, minute=rng.choice((0, 30)))
+
+
+# picks an index in range(n) with a long tail: low indexes are popular
+def _popular(rng, n):
+    return min(int(rng.paretovariate(1.2)) - 1, n - 1) if rng.random() < 0.5 \
+        else rng.randrange(n)
+
+
+# inserts the generated rows in batches and returns how many there were
+def _insert(model, rows):
+    count, batch = 0, []
+    for row in rows:
+        batch.append(row)
+        if len(batch) >= BATCH_SIZE:
+            db.session.execute(model.__table__.insert(), batch)
+            count += len(batch)
+            batch = []
+    if batch:
+        db.session.execute(model.__table__.insert(), batch)
+        count += len(batch)
+    db.session.commit()
+    return count
+
+
+# inserts the generated rows and returns their new ids in order
+def _insert_ids(model, rows):
+    start_id = db.session.query(func.coalesce(func.max(model.id), 0)).scalar()
+    _insert(model, rows)
+    return [entity_id for entity_id, in db.session.query(model.id).filter(
+        model.id > start_id).order_by(model.id)]
+
+
+# adds venues, artists and shows to the database, deterministically for a
+# given seed and day (midnight today by default). returns the number of
+# rows added per model
+
+
+def seed_catalog(venues, artists, shows, seed=0, today=None):
+    rng = random.Random(seed)
+    if today is None:
+        today = datetime.now().replace(hour=0, minute=0, second=0, microsecond=0)
+
+    venue_ids = _insert_ids(Venue, (
+        _venue(rng, i, city) for i, city in enumerate(_cities(rng, venues))))
+    artist_ids = _insert_ids(Artist, (
+        _artist(rng, i, city) for i, city in enumerate(_cities(rng, artists))))
+
+    show_count = 0
+    if venue_ids and artist_ids:
+        show_count = _insert(Show, ({
+            "venue_id": venue_ids[_popular(rng, len(venue_ids))],
+            "artist_id": artist_ids[_popular(rng, len(artist_ids))],
+            "start_time": _start_time(rng, today)
+        } for _ in range(shows)))
+
+        # bulk inserts skip the ORM events that maintain the show counters
+        reconcile_show_counts()
+
+    return {
+        "venues": len(venue_ids),
+        "artists": len(artist_ids),
+        "shows": show_count
+    }
@@ -0,0 +1,31 @@
+#----------------------------------------------------------------------------#
+# Imports
+#----------------------------------------------------------------------------#
+
+import json
+from datetime import date, datetime
+
+try:
+    # optional: several times faster, with native datetime support
+    import orjson
+except ImportError:
+    orjson = None
+
+#----------------------------------------------------------------------------#
+# JSON.
+#----------------------------------------------------------------------------#
+
+# serializes datetimes as ISO 8601
+
+
+def _default(value):
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    raise TypeError('%r is not JSON serializable' % (value,))
+
+
+# serializes payload to compact JSON bytes, with orjson when installed
+def dumps(payload):
+    if orjson is not None:
+        return orjson.dumps(payload, default=_default)
+    return json.dumps(payload, default=_default, separators=(',', ':')).encode('utf-8')
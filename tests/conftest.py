@@ -0,0 +1,60 @@
+#----------------------------------------------------------------------------#
+# Fixtures.
+#
+# Each test gets a testing app on its own SQLite file, with the schema
+# created from the models, so tests need no database server. Run from the
+# project root:
+#
+#   python -m pytest
+#----------------------------------------------------------------------------#
+
+from datetime import datetime, timedelta
+import pytest
+from app import create_app
+from models import db, Venue, Artist, Show
+
+
+# builds a testing app on the SQLite database at path
+def make_app(path, **settings):
+    return create_app('testing', SQLALCHEMY_DATABASE_URI='sqlite:///%s' % path,
+                      TEMPLATE_WARMUP=False, JINJA_BYTECODE_CACHE_DIR=None,
+                      **settings)
+
+
+@pytest.fixture
+def database(tmp_path):
+    return tmp_path / 'fyyur.db'
+
+
+@pytest.fixture
+def app(database):
+    app = make_app(database)
+    with app.app_context():
+        db.create_all()
+    yield app
+    with app.app_context():
+        db.session.remove()
+        db.engine.dispose()
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+
+# adds a venue, an artist and an upcoming show between them, and returns
+# their ids
+@pytest.fixture
+def catalog(app):
+    with app.app_context():
+        venue = Venue(name='The Musical Hop', city='San Francisco', state='CA',
+                      address='1015 Folsom Street', phone='123-123-1234',
+                      genres=['Jazz'])
+        artist = Artist(name='Guns N Petals', city='San Francisco',
+                        state='CA', phone='326-123-5000', genres=['Rock n Roll'])
+        db.session.add_all([venue, artist])
+        db.session.flush()
+        db.session.add(Show(venue_id=venue.id, artist_id=artist.id,
+                            start_time=datetime.now() + timedelta(days=30)))
+        db.session.commit()
+        return {"venue_id": venue.id, "artist_id": artist.id}
@@ -0,0 +1,58 @@
+import asyncio
+import pytest
+from aio import AsyncApp
+
+pytest.importorskip('aiosqlite')
+
+
+# runs one request through the ASGI app and returns the messages it sent,
+# which are also appended to messages
+def request(app, method, path, messages=None):
+    scope = {"type": 'http', "method": method, "path": path,
+             "query_string": b'', "headers": [], "http_version": '1.1'}
+    messages = [] if messages is None else messages
+
+    async def receive():
+        return {"type": 'http.request', "body": b''}
+
+    async def send(message):
+        messages.append(message)
+
+    async def call():
+        asgi = AsyncApp(app)
+        try:
+            await asgi(scope, receive, send)
+        finally:
+            await asgi.engine.dispose()
+
+    asyncio.run(call())
+    return messages
+
+
+def body(messages):
+    return b''.join(message.get('body', b'') for message in messages[1:])
+
+
+@pytest.mark.parametrize('path', ['/venues', '/api/v1/venues'])
+def test_get_and_head(app, catalog, path):
+    get = request(app, 'GET', path)
+    head = request(app, 'HEAD', path)
+    assert get[0]['status'] == head[0]['status'] == 200
+    assert b'The Musical Hop' in body(get)
+    assert body(head) == b''
+    assert not head[-1].get('more_body')
+
+
+# a WSGI app that raises before start_response gets a 500, and the error
+# reaches the server
+def test_error_before_start_response(app):
+    def boom():
+        raise LookupError('boom')
+    app.add_url_rule('/boom', view_func=boom)
+    app.config['PROPAGATE_EXCEPTIONS'] = True
+
+    messages = []
+    with pytest.raises(LookupError):
+        request(app, 'GET', '/boom', messages)
+    assert messages[0]['status'] == 500
+    assert body(messages) == b'Internal Server Error'
@@ -0,0 +1,46 @@
+import pytest
+from api import MAX_BATCH_IDS
+
+
+def test_batch_fetch_in_order_with_missing(client, catalog):
+    venue_id = catalog['venue_id']
+    response = client.get('/api/v1/venues?ids=999,%d,998' % venue_id)
+    assert response.status_code == 200
+    body = response.get_json()
+    assert [venue['id'] for venue in body['data']] == [venue_id]
+    assert body['missing'] == [999, 998]
+
+
+@pytest.mark.parametrize('ids', ['1,two', '1.5', '1;2'])
+def test_bad_ids_are_400(client, ids):
+    response = client.get('/api/v1/venues', query_string={"ids": ids})
+    assert response.status_code == 400
+    assert 'integers' in response.get_json()['error']
+
+
+def test_too_many_ids_are_400(client):
+    ids = ','.join(str(n) for n in range(MAX_BATCH_IDS + 1))
+    response = client.get('/api/v1/artists?ids=' + ids)
+    assert response.status_code == 400
+    assert response.get_json()['error'] == 'At most %d ids per request' % MAX_BATCH_IDS
+
+
+def test_fields_select_columns(client, catalog):
+    response = client.get('/api/v1/artists/%d?fields=name,city' % catalog['artist_id'])
+    # id is always included
+    assert response.get_json()['data'] == {
+        "id": catalog['artist_id'], "name": 'Guns N Petals', "city": 'San Francisco'}
+
+    body = client.get('/api/v1/venues?fields=name').get_json()
+    assert body['data'] == [{"id": catalog['venue_id'], "name": 'The Musical Hop'}]
+
+
+def test_unknown_fields_are_400(client):
+    response = client.get('/api/v1/venues?fields=name,password,secret')
+    assert response.status_code == 400
+    assert response.get_json()['error'] == 'Unknown fields: password, secret'
+
+
+def test_errors_are_json(client):
+    assert client.get('/api/v1/venues/12345').get_json()['error'] == 'Venue 12345 not found'
+    assert client.get('/api/v1/things').status_code == 404
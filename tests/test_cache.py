@@ -0,0 +1,45 @@
+from datetime import datetime, timedelta
+
+
+# GETs url twice, so the second response comes from the page cache
+def cached(client, url):
+    client.get(url)
+    response = client.get(url)
+    assert response.headers['X-Cache'] == 'HIT'
+    return response
+
+
+def test_create_show_invalidates_listings(app, client, catalog):
+    for url in ('/venues', '/artists', '/shows'):
+        cached(client, url)
+
+    start_time = datetime.now() + timedelta(days=60)
+    app.test_client().post('/shows/create', data={
+        "artist_id": catalog['artist_id'],
+        "venue_id": catalog['venue_id'],
+        "start_time": start_time.strftime('%Y-%m-%d %H:%M:%S')
+    })
+
+    for url in ('/venues', '/artists', '/shows'):
+        assert client.get(url).headers['X-Cache'] == 'MISS', url
+
+
+def test_delete_venue_invalidates_artists(client, catalog):
+    cached(client, '/artists')
+    cached(client, '/artists/%d' % catalog['artist_id'])
+
+    # a separate client, as the delete leaves a flashed message behind
+    client.application.test_client().delete('/venues/%d' % catalog['venue_id'])
+
+    assert client.get('/artists').headers['X-Cache'] == 'MISS'
+    assert client.get('/artists/%d' % catalog['artist_id']).headers['X-Cache'] == 'MISS'
+
+
+def test_delete_artist_invalidates_venues(client, catalog):
+    cached(client, '/venues')
+    cached(client, '/venues/%d' % catalog['venue_id'])
+
+    client.application.test_client().delete('/artists/%d' % catalog['artist_id'])
+
+    assert client.get('/venues').headers['X-Cache'] == 'MISS'
+    assert client.get('/venues/%d' % catalog['venue_id']).headers['X-Cache'] == 'MISS'
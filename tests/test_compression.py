@@ -0,0 +1,54 @@
+import gzip
+import pytest
+
+
+def get(client, path, encoding=None, **headers):
+    if encoding is not None:
+        headers['Accept-Encoding'] = encoding
+    return client.get(path, headers=headers)
+
+
+def test_gzip(client, catalog):
+    path = '/venues/%d' % catalog['venue_id']
+    plain = get(client, path)
+    # the second request is a page cache hit, served from the stored variant
+    for _ in range(2):
+        response = get(client, path, 'gzip')
+        assert response.content_encoding == 'gzip'
+        assert 'Accept-Encoding' in response.vary
+        assert gzip.decompress(response.get_data()) == plain.get_data()
+        assert response.get_etag() == (plain.get_etag()[0], True)
+
+
+def test_identity(client, catalog):
+    response = get(client, '/venues/%d' % catalog['venue_id'], 'identity')
+    assert response.content_encoding is None
+    assert 'Accept-Encoding' in response.vary
+    assert response.get_etag()[1] is False
+
+
+def test_prefers_brotli(client, catalog):
+    brotli = pytest.importorskip('brotli')
+    path = '/venues/%d' % catalog['venue_id']
+    plain = get(client, path).get_data()
+    response = get(client, path, 'gzip, deflate, br')
+    assert response.content_encoding == 'br'
+    assert brotli.decompress(response.get_data()) == plain
+    # unless the client says it would rather have gzip
+    assert get(client, path, 'br;q=0.5, gzip').content_encoding == 'gzip'
+
+
+# conditional GETs match the weak ETag of a compressed response
+def test_weak_etag_revalidates(client, catalog):
+    path = '/venues/%d' % catalog['venue_id']
+    etag = get(client, path, 'gzip').headers['ETag']
+    assert etag.startswith('W/')
+    assert get(client, path, 'gzip', **{"If-None-Match": etag}).status_code == 304
+    assert get(client, path, **{"If-None-Match": etag}).status_code == 304
+
+
+def test_small_responses_are_sent_as_is(client, catalog):
+    response = get(client, '/api/v1/venues/%d?fields=name' % catalog['venue_id'],
+                   'gzip')
+    assert response.content_encoding is None
+    assert 'Accept-Encoding' not in response.vary
@@ -0,0 +1,37 @@
+from models import db, Venue
+from tests.conftest import make_app
+
+
+# two workers on one database, each with its own in-process page cache,
+# must never send a stale body under the current ETag
+def test_cache_follows_changes_from_other_workers(app, database, catalog):
+    other = make_app(database)
+    reader = other.test_client()
+    url = '/venues/%d' % catalog['venue_id']
+
+    reader.get(url)
+    before = reader.get(url)
+    assert before.headers['X-Cache'] == 'HIT'
+
+    # edited through the first app, which only invalidates its own cache
+    with app.app_context():
+        venue = db.session.get(Venue, catalog['venue_id'])
+        venue.name = 'The Renamed Hop'
+        db.session.commit()
+
+    after = reader.get(url)
+    assert after.headers['X-Cache'] == 'MISS'
+    assert after.headers['ETag'] != before.headers['ETag']
+    assert b'The Renamed Hop' in after.get_data()
+
+    # and revalidating with the new ETag keeps the new page
+    assert reader.get(url, headers={
+        "If-None-Match": after.headers['ETag']}).status_code == 304
+    assert b'The Renamed Hop' in reader.get(url).get_data()
+
+
+def test_not_modified(client, catalog):
+    response = client.get('/venues')
+    assert response.headers['ETag']
+    assert client.get('/venues', headers={
+        "If-None-Match": response.headers['ETag']}).status_code == 304
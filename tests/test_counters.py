@@ -0,0 +1,88 @@
+from datetime import datetime, timedelta
+import pytest
+import counters
+from counters import reconcile_show_counts
+from models import db, Venue, Artist, Show
+
+
+# moves the counters' clock by an offset from the real one
+@pytest.fixture
+def clock(monkeypatch):
+    offset = {"delta": timedelta(0)}
+
+    class Clock(datetime):
+        @classmethod
+        def now(cls, tz=None):
+            return datetime.now(tz) + offset['delta']
+
+    monkeypatch.setattr(counters, 'datetime', Clock)
+    return offset
+
+
+def counts(catalog):
+    venue = db.session.get(Venue, catalog['venue_id'])
+    artist = db.session.get(Artist, catalog['artist_id'])
+    result = [(entity.upcoming_shows_count, entity.past_shows_count)
+              for entity in (venue, artist)]
+    assert result[0] == result[1]
+    return result[0]
+
+
+def add_show(catalog, start_time):
+    show = Show(venue_id=catalog['venue_id'], artist_id=catalog['artist_id'],
+                start_time=start_time)
+    db.session.add(show)
+    db.session.commit()
+    return show.id
+
+
+# the catalog has one upcoming show
+def test_insert_counts_upcoming_and_past(app, catalog):
+    with app.app_context():
+        assert counts(catalog) == (1, 0)
+        add_show(catalog, datetime.now() + timedelta(days=1))
+        add_show(catalog, datetime.now() - timedelta(days=1))
+        assert counts(catalog) == (2, 1)
+
+
+def test_delete_uncounts(app, catalog):
+    with app.app_context():
+        show_id = add_show(catalog, datetime.now() - timedelta(days=1))
+        assert counts(catalog) == (1, 1)
+        db.session.delete(db.session.get(Show, show_id))
+        db.session.commit()
+        assert counts(catalog) == (1, 0)
+
+
+# a show counted as upcoming that starts before it is deleted leaves the
+# counter it was added to
+def test_delete_after_start(app, catalog, clock):
+    with app.app_context():
+        show_id = add_show(catalog, datetime.now() + timedelta(hours=1))
+        assert counts(catalog) == (2, 0)
+
+        clock['delta'] = timedelta(hours=2)
+        db.session.delete(db.session.get(Show, show_id))
+        db.session.commit()
+        assert counts(catalog) == (1, 0)
+
+
+def test_reconcile_moves_started_shows(app, catalog, clock):
+    with app.app_context():
+        show_id = add_show(catalog, datetime.now() + timedelta(hours=1))
+        clock['delta'] = timedelta(hours=2)
+        reconcile_show_counts(now=datetime.now() + timedelta(hours=2))
+        assert counts(catalog) == (1, 1)
+        assert db.session.get(Show, show_id).counted_upcoming is False
+
+        db.session.delete(db.session.get(Show, show_id))
+        db.session.commit()
+        assert counts(catalog) == (1, 0)
+
+
+def test_deleting_a_venue_uncounts_its_artists(app, catalog):
+    with app.app_context():
+        db.session.delete(db.session.get(Venue, catalog['venue_id']))
+        db.session.commit()
+        artist = db.session.get(Artist, catalog['artist_id'])
+        assert (artist.upcoming_shows_count, artist.past_shows_count) == (0, 0)
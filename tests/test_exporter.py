@@ -0,0 +1,61 @@
+import csv
+import io
+import json
+import pytest
+import exporter
+from models import db, Venue
+
+
+def test_ndjson_export(client, catalog):
+    response = client.get('/api/v1/shows/export')
+    assert response.status_code == 200
+    assert response.mimetype == 'application/x-ndjson'
+    assert response.headers['Content-Disposition'] == \
+        'attachment; filename=shows.ndjson'
+    lines = response.get_data(as_text=True).splitlines()
+    show = json.loads(lines[0])
+    assert len(lines) == 1
+    assert (show['artist_id'], show['artist_name']) == \
+        (catalog['artist_id'], 'Guns N Petals')
+    assert (show['venue_id'], show['venue_name']) == \
+        (catalog['venue_id'], 'The Musical Hop')
+
+
+def test_csv_export(client, catalog):
+    response = client.get('/api/v1/venues/export?format=csv')
+    assert response.mimetype == 'text/csv'
+    rows = list(csv.DictReader(io.StringIO(response.get_data(as_text=True))))
+    assert len(rows) == 1
+    assert rows[0]['name'] == 'The Musical Hop'
+    assert rows[0]['genres'] == 'Jazz'
+
+
+# rows come out in id order across chunk boundaries
+def test_export_spans_chunks(app, catalog, monkeypatch):
+    monkeypatch.setattr(exporter, 'CHUNK_SIZE', 2)
+    with app.app_context():
+        for i in range(4):
+            db.session.add(Venue(name='Venue %d' % i, city='Austin', state='TX',
+                                 address='1 Main St', phone='512-555-0100',
+                                 genres=['Jazz', 'Blues']))
+        db.session.commit()
+
+        chunks = list(exporter.export_chunks('venues', 'ndjson'))
+        ids = [json.loads(line)['id']
+               for chunk in chunks for line in chunk.splitlines()]
+        assert len(chunks) == 3
+        assert ids == sorted(ids) and len(ids) == 5
+
+        text = b''.join(exporter.export_chunks('venues', 'csv')).decode()
+        rows = list(csv.DictReader(io.StringIO(text)))
+        assert [row['genres'] for row in rows][1:] == ['Jazz;Blues'] * 4
+
+
+@pytest.mark.parametrize('url, status', [
+    ('/api/v1/venues/export?format=xml', 400),
+    ('/api/v1/bands/export', 404),
+])
+def test_bad_exports(client, url, status):
+    response = client.get(url)
+    assert response.status_code == status
+    assert 'error' in response.get_json()
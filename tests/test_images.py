@@ -0,0 +1,98 @@
+import io
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import pytest
+from PIL import Image
+import images
+from images import ImageStore, fetch
+
+
+def png():
+    buffer = io.BytesIO()
+    Image.new('RGB', (800, 600), 'red').save(buffer, 'PNG')
+    return buffer.getvalue()
+
+
+# a local image server: /image.png is an image, /redirect redirects to
+# the Location given in its query string
+@pytest.fixture
+def server():
+    body = png()
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path.startswith('/redirect?'):
+                self.send_response(302)
+                self.send_header('Location', self.path.split('?', 1)[1])
+                self.end_headers()
+                return
+            self.send_response(200)
+            self.send_header('Content-Type', 'image/png')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    httpd = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+    threading.Thread(target=httpd.serve_forever, daemon=True).start()
+    yield 'http://127.0.0.1:%d' % httpd.server_address[1]
+    httpd.shutdown()
+    httpd.server_close()
+
+
+@pytest.mark.parametrize('address', [
+    '127.0.0.1', '10.0.0.1', '192.168.1.1', '169.254.169.254', '::1',
+    '::ffff:127.0.0.1', 'fd00::1', '0.0.0.0', '224.0.0.1'])
+def test_private_addresses_are_not_public(address):
+    assert not images.public_address(address)
+
+
+def test_public_address():
+    assert images.public_address('93.184.216.34')
+
+
+def test_refuses_private_hosts(server):
+    with pytest.raises(ValueError, match='not public'):
+        fetch(server + '/image.png')
+
+
+def test_store_skips_private_hosts(app, server, tmp_path):
+    store = ImageStore(str(tmp_path), app.static_folder, app.static_url_path)
+    with app.app_context():
+        assert store.variant(server + '/image.png', 160, 'jpg') is None
+
+
+# the server stands in for a public host; what it redirects to is checked
+# again
+def test_checks_redirects(server, monkeypatch):
+    monkeypatch.setattr(images, 'public_address',
+                        lambda address: address == '127.0.0.1')
+    assert fetch(server + '/image.png') == png()
+    assert fetch(server + '/redirect?/image.png') == png()
+
+    private = server.replace('127.0.0.1', '127.0.0.2')
+    with pytest.raises(ValueError, match='not public'):
+        fetch(server + '/redirect?' + private + '/image.png')
+    with pytest.raises(ValueError, match='redirected'):
+        fetch(server + '/redirect?/redirect?/redirect?/redirect?/image.png')
+
+
+def test_refuses_large_bodies(server, monkeypatch):
+    monkeypatch.setattr(images, 'public_address',
+                        lambda address: address == '127.0.0.1')
+    with pytest.raises(ValueError, match='over 100 bytes'):
+        fetch(server + '/image.png', max_bytes=100)
+
+
+def test_allowed_hosts(server):
+    with pytest.raises(ValueError, match='not allowed'):
+        fetch(server + '/image.png', allowed_hosts=['images.example.com'])
+
+
+def test_lock_table_is_bounded(app, tmp_path):
+    store = ImageStore(str(tmp_path), app.static_folder, app.static_url_path)
+    for n in range(1000):
+        store._lock(images.url_key('https://example.com/%d.png' % n))
+    assert len(store.locks) == images.LOCK_STRIPES
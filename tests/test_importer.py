@@ -0,0 +1,95 @@
+import io
+import json
+from importer import import_rows, read_rows
+from models import db, Venue, Artist, Show
+
+
+def venue(name, **data):
+    return dict({"name": name, "city": 'Austin', "state": 'TX',
+                 "address": '1 Main St', "phone": '512-555-0100',
+                 "genres": 'Jazz;Blues', "seeking_talent": False}, **data)
+
+
+def jsonl(*rows):
+    return io.StringIO(''.join(json.dumps(row) + '\n' for row in rows))
+
+
+def run(kind, file, format='jsonl', batch_size=1000):
+    errors = []
+    stats = import_rows(kind, read_rows(file, format), batch_size,
+                        on_error=lambda line_num, message: errors.append(
+                            (line_num, message)))
+    return stats, errors
+
+
+def test_imports_csv(app):
+    file = io.StringIO('name,city,state,address,phone,genres,seeking_talent\n'
+                       'The Blue Room,Austin,TX,1 Main St,512-555-0100,'
+                       'Jazz;Blues,No\n')
+    with app.app_context():
+        stats, errors = run('venues', file, 'csv')
+        assert (stats['imported'], stats['failed'], errors) == (1, 0, [])
+        assert db.session.query(Venue.genres).scalar() == ['Jazz', 'Blues']
+
+
+# rows that fail the form rules are reported by line and skipped
+def test_rejects_invalid_rows(app):
+    file = io.StringIO(jsonl(venue('Good'), venue('Bad phone', phone='555'),
+                             venue('No state', state=None)).getvalue()
+                       + '{not json\n')
+    with app.app_context():
+        stats, errors = run('venues', file)
+        assert (stats['imported'], stats['failed']) == (1, 3)
+        assert [line_num for line_num, _ in errors] == [2, 3, 4]
+        assert errors[0][1].startswith('phone:')
+        assert errors[1][1].startswith('state:')
+        assert errors[2][1].startswith('Invalid JSON')
+        assert [name for name, in db.session.query(Venue.name)] == ['Good']
+
+
+# a duplicate external id rejects the whole executemany, and the retry in
+# savepoints keeps the other rows of the batch
+def test_retries_rejected_batch_row_by_row(app):
+    file = jsonl(venue('One', external_id='v1'), venue('Two', external_id='v1'),
+                 venue('Three', external_id='v3'))
+    with app.app_context():
+        stats, errors = run('venues', file)
+        assert (stats['imported'], stats['failed']) == (2, 1)
+        assert [line_num for line_num, _ in errors] == [2]
+        assert 'UNIQUE' in errors[0][1]
+        assert sorted(name for name, in db.session.query(Venue.name)) == \
+            ['One', 'Three']
+
+
+def test_shows_resolve_references(app, catalog):
+    with app.app_context():
+        db.session.get(Venue, catalog['venue_id']).external_id = 'hop'
+        db.session.add(Artist(name='Guns N Petals', city='Austin', state='TX',
+                              phone='512-555-0101', genres=['Jazz']))
+        db.session.commit()
+
+        file = jsonl(
+            {"artist_id": catalog['artist_id'], "venue_external_id": 'hop',
+             "start_time": '2035-05-21 21:30:00'},
+            {"artist_id": catalog['artist_id'], "venue_name": 'The Musical Hop',
+             "start_time": '2035-06-21 21:30:00'},
+            {"artist_name": 'Guns N Petals', "venue_id": catalog['venue_id'],
+             "start_time": '2035-07-21 21:30:00'},
+            {"artist_id": catalog['artist_id'], "venue_name": 'Nowhere',
+             "start_time": '2035-08-21 21:30:00'},
+            {"artist_id": 'x', "venue_id": catalog['venue_id'],
+             "start_time": '2035-09-21 21:30:00'},
+            {"venue_id": catalog['venue_id'], "start_time": '2035-10-21'})
+        stats, errors = run('shows', file, batch_size=4)
+        assert (stats['imported'], stats['failed']) == (2, 4)
+        # the first batch is resolved before the last row is read
+        assert errors == [
+            (3, "artist name 'Guns N Petals' is ambiguous"),
+            (4, "venue name 'Nowhere' not found"),
+            (6, 'artist: give artist_id, artist_external_id or artist_name'),
+            (5, 'artist_id must be an integer'),
+        ]
+        shows = db.session.query(Show).filter(Show.start_time.like('2035%'))
+        assert sorted(show.start_time.month for show in shows) == [5, 6]
+        # bulk inserted shows are counted
+        assert db.session.get(Venue, catalog['venue_id']).upcoming_shows_count == 3
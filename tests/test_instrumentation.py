@@ -0,0 +1,46 @@
+import json
+import logging
+import re
+from models import db
+from instrumentation import normalize
+from tests.conftest import make_app
+
+
+def timings(response):
+    return dict(re.match(r'(\w+);dur=([\d.]+)', value).groups()
+                for value in response.headers.getlist('Server-Timing'))
+
+
+def test_server_timing(client, catalog):
+    response = client.get('/venues/%d' % catalog['venue_id'])
+    values = response.headers.getlist('Server-Timing')
+    assert len(values) == 2
+    assert re.fullmatch(r'db;dur=[\d.]+;desc="[1-9]\d* statements"', values[0])
+    durations = timings(response)
+    assert float(durations['db']) <= float(durations['total'])
+
+
+def test_no_header_when_disabled(database):
+    app = make_app(database, SQL_INSTRUMENTATION=False)
+    with app.app_context():
+        db.create_all()
+    response = app.test_client().get('/venues')
+    assert response.status_code == 200
+    assert 'Server-Timing' not in response.headers
+
+
+def test_logs_repeated_statements(database, caplog):
+    app = make_app(database, SQL_REPEAT_THRESHOLD=0)
+    with app.app_context():
+        db.create_all()
+    with caplog.at_level(logging.WARNING, logger=app.logger.name):
+        app.test_client().get('/venues')
+    events = [json.loads(record.getMessage()) for record in caplog.records
+              if 'sql_repeated_statements' in record.getMessage()]
+    assert events and events[0]['endpoint'] == 'main.venues'
+
+
+def test_normalize():
+    assert normalize("SELECT * FROM x WHERE id IN (1, 2, 3) AND name = 'it''s'") \
+        == normalize('SELECT *  FROM x WHERE id IN (?) AND name = :name_1') \
+        == 'SELECT * FROM x WHERE id IN (?) AND name = ?'
@@ -0,0 +1,29 @@
+import os
+from flask_migrate import upgrade, downgrade
+from sqlalchemy import inspect
+from models import db
+from tests.conftest import make_app
+
+MIGRATIONS = os.path.join(os.path.dirname(os.path.dirname(__file__)),
+                          'migrations')
+
+
+def tables():
+    return set(inspect(db.engine).get_table_names()) - {'alembic_version'}
+
+
+# every migration runs both ways on SQLite, and head matches the models
+def test_upgrade_and_downgrade_on_sqlite(database):
+    app = make_app(database)
+    with app.app_context():
+        upgrade(directory=MIGRATIONS)
+        assert tables() == set(db.metadata.tables)
+        foreign_keys = inspect(db.engine).get_foreign_keys('Show')
+        assert {fk['referred_table'] for fk in foreign_keys} == {'Venue', 'Artist'}
+
+        downgrade(directory=MIGRATIONS, revision='base')
+        assert tables() == set()
+
+        upgrade(directory=MIGRATIONS)
+        assert tables() == set(db.metadata.tables)
+        db.engine.dispose()
@@ -0,0 +1,66 @@
+from datetime import datetime
+import pytest
+from models import db, Venue, Show
+from pagination import encode_cursor, decode_cursor
+
+
+def test_cursor_round_trip():
+    keys = [Venue.state, Venue.city, Venue.id]
+    values = ('DC', 'Washington, D.C.', 12)
+    cursor = encode_cursor(values)
+    assert cursor.count(',') == 2
+    assert decode_cursor(cursor, keys) == values
+
+
+def test_datetime_cursor_round_trip():
+    values = (datetime(2019, 10, 10, 20, 30), 17)
+    cursor = encode_cursor(values)
+    assert cursor == '2019-10-10T20:30:00,17'
+    assert decode_cursor(cursor, [Show.start_time, Show.id]) == values
+
+
+@pytest.mark.parametrize('cursor', ['12', 'CA,Oakland,x', 'CA,Oakland,1,2'])
+def test_bad_cursors_are_rejected(cursor):
+    with pytest.raises(ValueError):
+        decode_cursor(cursor, [Venue.state, Venue.city, Venue.id])
+
+
+@pytest.mark.parametrize('url', [
+    '/venues?after=nope', '/artists?before=1,2', '/shows?after=yesterday,1'])
+def test_tampered_cursor_is_400(client, url):
+    assert client.get(url).status_code == 400
+
+
+# walks /venues a page at a time: every area's venues come together, and
+# the previous page cursor leads back
+def test_venue_areas_stay_together(app, client):
+    with app.app_context():
+        for n in range(12):
+            city, state = [('Washington, D.C.', 'DC'), ('Austin', 'TX'),
+                           ('Albany', 'NY')][n % 3]
+            db.session.add(Venue(name='Venue %d' % n, city=city, state=state,
+                                 address='1 Main Street', phone='415-000-0000'))
+        db.session.commit()
+
+        from queries import venue_areas
+        pages, after = [], None
+        while True:
+            page = venue_areas(after=after, limit=5)
+            pages.append(page)
+            after = page.next_cursor
+            if after is None:
+                break
+
+        areas = [(area['state'], area['city'])
+                 for page in pages for area in page.items]
+        # an area only repeats across a page boundary
+        assert [area for n, area in enumerate(areas)
+                if n == 0 or area != areas[n - 1]] == [
+            ('DC', 'Washington, D.C.'), ('NY', 'Albany'), ('TX', 'Austin')]
+
+        back = venue_areas(before=pages[1].prev_cursor, limit=5)
+        assert back.items == pages[0].items
+
+    response = client.get('/venues', query_string={
+        "limit": 5, "after": pages[0].next_cursor})
+    assert response.status_code == 200
@@ -0,0 +1,41 @@
+import threading
+import time
+from replicas import Replica, ReplicaSet
+
+
+# a replica whose checks block until released
+class SlowReplica(Replica):
+
+    def __init__(self):
+        self.engine = object()
+        self.healthy = True
+        self.checked = 0.0
+        self.checks = 0
+        self.release = threading.Event()
+
+    def check(self, max_lag):
+        self.checks += 1
+        self.release.wait(5)
+        self.healthy = False
+        self.checked = time.monotonic()
+
+
+def test_choose_does_not_wait_for_checks():
+    replica = SlowReplica()
+    replicas = ReplicaSet([replica], check_interval=10, max_lag=None)
+
+    start = time.monotonic()
+    # the last known health counts while the check runs
+    assert replicas.choose() is replica.engine
+    assert replicas.choose() is replica.engine
+    assert time.monotonic() - start < 1
+    # one check at a time
+    time.sleep(0.05)
+    assert replica.checks == 1
+
+    replica.release.set()
+    for _ in range(50):
+        if not replica.healthy:
+            break
+        time.sleep(0.01)
+    assert replicas.choose() is None
@@ -0,0 +1,82 @@
+import pytest
+import search
+from models import db, Venue
+from search import SearchIndex
+
+
+# a fresh in-process index per test, as the module's is per process
+@pytest.fixture(autouse=True)
+def indexes(monkeypatch):
+    fresh = {model: SearchIndex(model) for model in search.indexes}
+    monkeypatch.setattr(search, 'indexes', fresh)
+    return fresh
+
+
+def add_venue(name, city='Oakland', genres=()):
+    venue = Venue(name=name, city=city, state='CA', address='1 Main Street',
+                  phone='415-000-0000', genres=list(genres))
+    db.session.add(venue)
+    db.session.commit()
+    return venue.id
+
+
+def names(term):
+    return [row['name'] for row in search.search(Venue, term)['data']]
+
+
+def test_ranks_name_over_genre_over_city(app):
+    with app.app_context():
+        add_venue('Quiet Place', city='Jazzville')
+        add_venue('Blue Room', genres=['Jazz'])
+        add_venue('Jazz Club')
+        assert names('jazz') == ['Jazz Club', 'Blue Room', 'Quiet Place']
+
+
+def test_last_token_matches_as_prefix(app):
+    with app.app_context():
+        add_venue('The Musical Hop')
+        add_venue('Music Box')
+        assert names('mus') == ['Music Box', 'The Musical Hop']
+        # earlier tokens must match whole
+        assert names('the mus') == ['The Musical Hop']
+        assert names('th musical') == []
+
+
+def test_counts_and_pages(app):
+    with app.app_context():
+        for n in range(5):
+            add_venue('Hall %d' % n)
+        results = search.search(Venue, 'hall', page=2, per_page=2)
+        assert results['count'] == 5
+        assert results['pages'] == 3
+        assert [row['name'] for row in results['data']] == ['Hall 2', 'Hall 3']
+
+
+def test_index_follows_commits(app):
+    with app.app_context():
+        venue_id = add_venue('Jazz Club')
+        assert names('jazz') == ['Jazz Club']
+
+        # loaded now, so later commits update it in place
+        add_venue('Jazz Cellar')
+        db.session.get(Venue, venue_id).name = 'Rock Club'
+        db.session.commit()
+        assert names('jazz') == ['Jazz Cellar']
+        assert names('rock') == ['Rock Club']
+
+        db.session.delete(db.session.get(Venue, venue_id))
+        db.session.commit()
+        assert names('rock') == []
+
+
+def test_index_ignores_rolled_back_changes(app):
+    with app.app_context():
+        add_venue('Jazz Club')
+        assert names('jazz') == ['Jazz Club']
+
+        db.session.add(Venue(name='Jazz Cellar', city='Oakland', state='CA',
+                             address='1 Main Street', phone='415-000-0000',
+                             genres=[]))
+        db.session.flush()
+        db.session.rollback()
+        assert names('jazz') == ['Jazz Club']
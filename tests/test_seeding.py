@@ -0,0 +1,45 @@
+from datetime import datetime
+import seeding
+from models import db, Venue, Artist, Show
+from seeding import seed_catalog
+from tests.conftest import make_app
+
+TODAY = datetime(2026, 5, 1)
+
+
+def catalog_rows():
+    return [db.session.query(model.name).order_by(model.id).all()
+            for model in (Venue, Artist)] + [
+        db.session.query(Show.venue_id, Show.artist_id, Show.start_time)
+        .order_by(Show.id).all()]
+
+
+def test_counts_across_batches(app, monkeypatch):
+    monkeypatch.setattr(seeding, 'BATCH_SIZE', 7)
+    with app.app_context():
+        assert seed_catalog(10, 12, 30, today=TODAY) == \
+            {"venues": 10, "artists": 12, "shows": 30}
+        assert [db.session.query(model).count()
+                for model in (Venue, Artist, Show)] == [10, 12, 30]
+        # seeding again adds to what is there
+        assert seed_catalog(3, 3, 5, today=TODAY)['venues'] == 3
+        assert db.session.query(Show).count() == 35
+
+
+def test_no_shows_without_venues(app):
+    with app.app_context():
+        assert seed_catalog(0, 5, 10, today=TODAY) == \
+            {"venues": 0, "artists": 5, "shows": 0}
+
+
+def test_same_seed_same_data(database, tmp_path):
+    rows = []
+    for path in (database, tmp_path / 'other.db'):
+        app = make_app(path)
+        with app.app_context():
+            db.create_all()
+            seed_catalog(5, 5, 20, seed=3, today=TODAY)
+            rows.append(catalog_rows())
+            db.session.remove()
+            db.engine.dispose()
+    assert rows[0] == rows[1]
@@ -0,0 +1,74 @@
+from datetime import datetime, timedelta
+import pytest
+from models import db, Venue, Artist, Show
+from queries import show_list
+
+
+# adds a second venue in another city, a second artist, and shows on
+# either side of now. returns the catalog ids with the new ones
+@pytest.fixture
+def shows(app, catalog):
+    with app.app_context():
+        venue = Venue(name='Park Square Live', city='New York', state='NY',
+                      address='34 Whiskey Moore Ave', phone='415-000-1234',
+                      genres=['Rock n Roll'])
+        artist = Artist(name='Matt Quevedo', city='New York', state='NY',
+                        phone='300-400-5000', genres=['Jazz'])
+        db.session.add_all([venue, artist])
+        db.session.flush()
+        now = datetime.now()
+        db.session.add_all([
+            Show(venue_id=venue.id, artist_id=artist.id,
+                 start_time=now + timedelta(days=10)),
+            Show(venue_id=catalog['venue_id'], artist_id=artist.id,
+                 start_time=now - timedelta(days=10)),
+        ])
+        db.session.commit()
+        return dict(catalog, other_venue_id=venue.id, other_artist_id=artist.id)
+
+
+def listed(**filters):
+    filters.setdefault('start', datetime.now())
+    return [(show['venue_name'], show['artist_name'])
+            for show in show_list(**filters).items]
+
+
+def test_upcoming_in_start_time_order(app, shows):
+    with app.app_context():
+        assert listed() == [('Park Square Live', 'Matt Quevedo'),
+                            ('The Musical Hop', 'Guns N Petals')]
+
+
+def test_filters(app, shows):
+    now = datetime.now()
+    with app.app_context():
+        assert listed(start=now - timedelta(days=30), end=now) == [
+            ('The Musical Hop', 'Matt Quevedo')]
+        assert listed(venue_id=shows['venue_id']) == [
+            ('The Musical Hop', 'Guns N Petals')]
+        assert listed(start=None, artist_id=shows['other_artist_id']) == [
+            ('The Musical Hop', 'Matt Quevedo'),
+            ('Park Square Live', 'Matt Quevedo')]
+        assert listed(city='New York') == [('Park Square Live', 'Matt Quevedo')]
+        assert listed(city='Chicago') == []
+
+
+# without a from date the page lists only upcoming shows
+def test_page_defaults_to_upcoming(client, shows):
+    html = client.get('/shows').get_data(as_text=True)
+    assert 'Guns N Petals' in html
+    assert 'Park Square Live' in html
+    assert html.count('Matt Quevedo') == 1
+
+
+# a bare to date includes that whole day
+def test_page_date_window(client, shows):
+    day = (datetime.now() - timedelta(days=10)).date().isoformat()
+    html = client.get('/shows?from=%s&to=%s' % (day, day)).get_data(as_text=True)
+    assert 'Matt Quevedo' in html
+    assert 'Guns N Petals' not in html
+
+
+@pytest.mark.parametrize('query', ['from=yesterday', 'to=2024-13-01'])
+def test_bad_dates_are_400(client, query):
+    assert client.get('/shows?' + query).status_code == 400
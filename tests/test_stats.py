@@ -0,0 +1,12 @@
+from tests.conftest import make_app
+
+
+def test_stats_are_off_by_default(client):
+    for url in ('/stats/cache', '/stats/pool', '/stats/startup'):
+        assert client.get(url).status_code == 404
+
+
+def test_stats_enabled(database):
+    client = make_app(database, STATS_ENABLED=True).test_client()
+    for url in ('/stats/cache', '/stats/pool', '/stats/startup'):
+        assert client.get(url).status_code == 200
@@ -0,0 +1,60 @@
+#----------------------------------------------------------------------------#
+# Imports
+#----------------------------------------------------------------------------#
+
+import os
+import time
+from flask import current_app
+from jinja2 import FileSystemBytecodeCache
+
+#----------------------------------------------------------------------------#
+# Template warm-up.
+#
+# Jinja compiles a template on its first render, which made the first hits
+# on each page after a deploy or worker recycle slow. create_app() compiles
+# every template up front instead. Under gunicorn that happens once in the
+# master (preload_app), so every worker, including recycled ones, forks
+# with the templates already compiled. Compiled bytecode is also kept in
+# JINJA_BYTECODE_CACHE_DIR, so a restart only parses templates that
+# changed. How long startup and warm-up took is logged, and served by
+# /stats/startup when STATS_ENABLED is set.
+#----------------------------------------------------------------------------#
+
+# gives app a filesystem bytecode cache, if JINJA_BYTECODE_CACHE_DIR is set
+
+
+def init_app(app):
+    directory = app.config.get('JINJA_BYTECODE_CACHE_DIR')
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+        app.jinja_env.bytecode_cache = FileSystemBytecodeCache(directory)
+    app.extensions['startup'] = {}
+
+
+# compiles every template of app and returns (count, seconds)
+def warm_templates(app):
+    start = time.perf_counter()
+    names = [name for name in app.jinja_env.list_templates()
+             if name.endswith('.html')]
+    for name in names:
+        app.jinja_env.get_template(name)
+    return len(names), time.perf_counter() - start
+
+
+# records the startup metrics of app, which began `started` (perf_counter)
+def record_startup(app, started, templates, template_seconds):
+    metrics = app.extensions['startup']
+    metrics.update({
+        "app_seconds": round(time.perf_counter() - started, 4),
+        "templates": templates,
+        "template_seconds": round(template_seconds, 4),
+        "bytecode_cache": app.jinja_env.bytecode_cache is not None
+    })
+    app.logger.info('started in %.0f ms, %d templates compiled in %.0f ms',
+                    metrics['app_seconds'] * 1000, templates,
+                    template_seconds * 1000)
+
+
+# startup metrics of the current app
+def startup_stats():
+    return current_app.extensions['startup']
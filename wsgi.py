@@ -0,0 +1,12 @@
+#----------------------------------------------------------------------------#
+# Production WSGI entry point.
+#
+#   SECRET_KEY=... DATABASE_URL=... gunicorn -c gunicorn.conf.py wsgi:app
+#
+# Uses the production config unless FYYUR_ENV names another one.
+#----------------------------------------------------------------------------#
+
+import os
+from app import create_app
+
+app = create_app(os.environ.get('FYYUR_ENV', 'production'))